@@ -0,0 +1,40 @@
+"""case-insensitive identifier indexes
+
+Revision ID: 1b32ad1736ea
+Revises: 9f14f83640d9
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1b32ad1736ea'
+down_revision: Union[str, None] = '9f14f83640d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # idx_email/idx_login дублируют индексы уникальных ограничений
+    # users_email_key/users_login_key; поиск теперь идёт по lower(...).
+    # Создание упадёт, если уже есть email или логины, различающиеся
+    # только регистром, — такие записи нужно разобрать до миграции.
+    op.drop_index('idx_login', table_name='users')
+    op.drop_index('idx_email', table_name='users')
+    op.create_index(
+        'ux_users_email_lower', 'users', [sa.text('lower(email)')], unique=True
+    )
+    op.create_index(
+        'ux_users_login_lower', 'users', [sa.text('lower(login)')], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ux_users_login_lower', table_name='users')
+    op.drop_index('ux_users_email_lower', table_name='users')
+    op.create_index('idx_email', 'users', ['email'], unique=False)
+    op.create_index('idx_login', 'users', ['login'], unique=False)
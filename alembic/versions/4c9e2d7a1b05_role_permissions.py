@@ -0,0 +1,63 @@
+"""permissions and role permissions
+
+Revision ID: 4c9e2d7a1b05
+Revises: 833a3ef89e66
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c9e2d7a1b05'
+down_revision: Union[str, None] = '833a3ef89e66'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# номера битов закреплены за правами навсегда: новые права получают
+# следующий свободный бит, удалённые биты не переиспользуются
+PERMISSIONS = (
+    ('roles:read', 0, 'Read roles and their permissions'),
+    ('roles:write', 1, 'Create, change and delete roles'),
+    ('users:read', 2, 'Read other users'),
+    ('users:write', 3, 'Change other users and their roles'),
+)
+
+
+def upgrade() -> None:
+    permissions = op.create_table(
+        'permissions',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('code', sa.String(length=100), nullable=False),
+        sa.Column('bit', sa.SmallInteger(), nullable=False),
+        sa.Column('description', sa.String(length=255), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('code'),
+        sa.UniqueConstraint('bit'),
+    )
+    op.create_table(
+        'role_permissions',
+        sa.Column('role_id', sa.UUID(), nullable=False),
+        sa.Column('permission_id', sa.UUID(), nullable=False),
+        sa.ForeignKeyConstraint(['role_id'], ['roles.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(
+            ['permission_id'], ['permissions.id'], ondelete='CASCADE'
+        ),
+        sa.PrimaryKeyConstraint('role_id', 'permission_id'),
+    )
+    op.bulk_insert(
+        permissions,
+        [
+            {'id': uuid.uuid4(), 'code': code, 'bit': bit, 'description': description}
+            for code, bit, description in PERMISSIONS
+        ],
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('role_permissions')
+    op.drop_table('permissions')
@@ -0,0 +1,61 @@
+"""hashed refresh tokens with rotation families
+
+Revision ID: 833a3ef89e66
+Revises: 1b32ad1736ea
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '833a3ef89e66'
+down_revision: Union[str, None] = '1b32ad1736ea'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Старые записи нельзя перенести: в них лежал access токен, а не
+    # refresh. Пользователям придётся войти заново.
+    op.execute('DELETE FROM refresh_tokens')
+    op.drop_column('refresh_tokens', 'token')
+    op.add_column(
+        'refresh_tokens', sa.Column('token_hash', sa.LargeBinary(), nullable=False)
+    )
+    op.add_column(
+        'refresh_tokens', sa.Column('family_id', sa.UUID(), nullable=False)
+    )
+    op.create_index(
+        'ux_refresh_tokens_token_hash', 'refresh_tokens', ['token_hash'], unique=True
+    )
+    op.create_index(
+        'ix_refresh_tokens_active_user_id',
+        'refresh_tokens',
+        ['user_id'],
+        unique=False,
+        postgresql_where=sa.text('revoked IS false'),
+    )
+    op.create_index(
+        'ix_refresh_tokens_active_family_id',
+        'refresh_tokens',
+        ['family_id'],
+        unique=False,
+        postgresql_where=sa.text('revoked IS false'),
+    )
+
+
+def downgrade() -> None:
+    op.execute('DELETE FROM refresh_tokens')
+    op.drop_index('ix_refresh_tokens_active_family_id', table_name='refresh_tokens')
+    op.drop_index('ix_refresh_tokens_active_user_id', table_name='refresh_tokens')
+    op.drop_index('ux_refresh_tokens_token_hash', table_name='refresh_tokens')
+    op.drop_column('refresh_tokens', 'family_id')
+    op.drop_column('refresh_tokens', 'token_hash')
+    op.add_column('refresh_tokens', sa.Column('token', sa.Text(), nullable=False))
+    op.create_unique_constraint(
+        'refresh_tokens_token_key', 'refresh_tokens', ['token']
+    )
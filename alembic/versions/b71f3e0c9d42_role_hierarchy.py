@@ -0,0 +1,53 @@
+"""role hierarchy with closure table
+
+Revision ID: b71f3e0c9d42
+Revises: 4c9e2d7a1b05
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b71f3e0c9d42'
+down_revision: Union[str, None] = '4c9e2d7a1b05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('roles', sa.Column('parent_id', sa.UUID(), nullable=True))
+    op.create_foreign_key(
+        'fk_roles_parent_id', 'roles', 'roles', ['parent_id'], ['id'],
+        ondelete='SET NULL',
+    )
+    op.create_table(
+        'role_closure',
+        sa.Column('ancestor_id', sa.UUID(), nullable=False),
+        sa.Column('descendant_id', sa.UUID(), nullable=False),
+        sa.Column('depth', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['ancestor_id'], ['roles.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['descendant_id'], ['roles.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id'),
+    )
+    op.create_index(
+        'ix_role_closure_descendant_id',
+        'role_closure',
+        ['descendant_id', 'ancestor_id'],
+        unique=False,
+    )
+    # существующие роли — корни; иерархия задаётся через API
+    op.execute(
+        'INSERT INTO role_closure (ancestor_id, descendant_id, depth) '
+        'SELECT id, id, 0 FROM roles'
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_role_closure_descendant_id', table_name='role_closure')
+    op.drop_table('role_closure')
+    op.drop_constraint('fk_roles_parent_id', 'roles', type_='foreignkey')
+    op.drop_column('roles', 'parent_id')
@@ -0,0 +1,87 @@
+"""grant every permission to super_admin
+
+Revision ID: e5a1c7d3f820
+Revises: b71f3e0c9d42
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+import uuid
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a1c7d3f820'
+down_revision: Union[str, None] = 'b71f3e0c9d42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SUPER_ADMIN_ROLE = 'super_admin'
+
+roles = sa.table(
+    'roles',
+    sa.column('id', sa.UUID()),
+    sa.column('name', sa.String()),
+    sa.column('description', sa.String()),
+    sa.column('created_at', sa.DateTime()),
+)
+role_closure = sa.table(
+    'role_closure',
+    sa.column('ancestor_id', sa.UUID()),
+    sa.column('descendant_id', sa.UUID()),
+    sa.column('depth', sa.Integer()),
+)
+permissions = sa.table('permissions', sa.column('id', sa.UUID()))
+role_permissions = sa.table(
+    'role_permissions',
+    sa.column('role_id', sa.UUID()),
+    sa.column('permission_id', sa.UUID()),
+)
+
+
+def upgrade() -> None:
+    # права выдаются только через PUT /roles/{id}/permissions, который сам
+    # требует roles:write, поэтому без этой выдачи им не воспользоваться
+    bind = op.get_bind()
+    role_id = bind.execute(
+        sa.select(roles.c.id).where(roles.c.name == SUPER_ADMIN_ROLE)
+    ).scalar()
+    if role_id is None:
+        role_id = uuid.uuid4()
+        op.bulk_insert(
+            roles,
+            [{
+                'id': role_id,
+                'name': SUPER_ADMIN_ROLE,
+                'description': 'All permissions',
+                'created_at': datetime.utcnow(),
+            }],
+        )
+        op.bulk_insert(
+            role_closure,
+            [{'ancestor_id': role_id, 'descendant_id': role_id, 'depth': 0}],
+        )
+    granted = sa.select(role_permissions.c.permission_id).where(
+        role_permissions.c.role_id == role_id
+    )
+    op.execute(
+        role_permissions.insert().from_select(
+            ['role_id', 'permission_id'],
+            sa.select(sa.literal(role_id, sa.UUID()), permissions.c.id).where(
+                permissions.c.id.not_in(granted)
+            ),
+        )
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        role_permissions.delete().where(
+            role_permissions.c.role_id.in_(
+                sa.select(roles.c.id).where(roles.c.name == SUPER_ADMIN_ROLE)
+            )
+        )
+    )
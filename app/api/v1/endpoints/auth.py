@@ -1,9 +1,12 @@
+import time
 from typing import Annotated
-from fastapi import APIRouter, Body, Depends
+from uuid import UUID
+
+from fastapi import APIRouter, Body, Depends, Request, Response, status
+from fastapi.responses import ORJSONResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
-
 from app.auth.auth_helpers import (
     authenticate_user,
     create_access_and_refresh_tokens,
@@ -12,9 +15,15 @@ from app.auth.auth_helpers import (
     register_new_user,
     revoke_refresh_token,
 )
+from app.auth.identity import RequestIdentity, get_identity
+from app.auth.introspection import require_introspection_client, token_introspector
+from app.auth.role_cache import role_cache
+from app.core.config import settings
 from app.infrastructure.db.database import get_session
-from app.schemas.auth import Tokens
+from app.schemas.auth import TokenIntrospectRequest, TokenIntrospectResponse, Tokens
+from app.schemas.login_history import LOGIN_HISTORY_LIST_ADAPTER, LoginHistoryGet
 from app.schemas.user import UserCreate
+
 router = APIRouter()
 
 OAUTH2_SCHEME = OAuth2PasswordBearer(tokenUrl="v1/tokens")
@@ -38,22 +47,78 @@ async def login_for_access_token(
     user = await authenticate_user(
         db=db, email_or_login=form_data.username, password=form_data.password
     )
-    tokens = await create_access_and_refresh_tokens(db=db, login=user.login)
+    tokens = await create_access_and_refresh_tokens(
+        db=db, login=user.login, user_id=user.id, role_id=user.role_id
+    )
     return tokens
 
 
-@router.get("/login_history",
-            # response_model=List[LoginHistoryDbModel]
-            )
-async def login_history(
-    db: AsyncSession = Depends(get_session),
-    token: str = Depends(OAUTH2_SCHEME)
+@router.post(
+    "/tokens/introspect",
+    response_model=TokenIntrospectResponse,
+    dependencies=[Depends(require_introspection_client)],
+)
+async def introspect_tokens(
+    request: TokenIntrospectRequest, db: AsyncSession = Depends(get_session)
+):
+    # результаты в порядке токенов запроса; словари отдаются как есть,
+    # без повторной валидации response_model
+    results = await token_introspector.introspect(db, request.tokens)
+    return ORJSONResponse({"results": results})
+
+
+def _auth_request_cache_control(exp) -> str:
+    max_age = settings.AUTH_REQUEST_CACHE_MAX_AGE_SECONDS
+    if exp is not None:
+        max_age = min(max_age, int(exp) - int(time.time()))
+    return f"max-age={max_age}" if max_age > 0 else "no-store"
+
+
+def _role_name(role_id) -> str:
+    if role_id is None:
+        return ""
+    role = role_cache.get_by_id(UUID(role_id))
+    return role.name if role else role_id
+
+
+@router.get(
+    "/auth/verify", status_code=status.HTTP_204_NO_CONTENT, response_class=Response
+)
+async def verify_auth_request(
+    request: Request, db: AsyncSession = Depends(get_session)
 ):
+    # подзапрос nginx auth_request: без тела и моделей ответа, только статус
+    # и заголовки; ответ кешируется nginx по заголовку Authorization
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return Response(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            headers={"WWW-Authenticate": "Bearer", "Cache-Control": "no-store"},
+        )
+
+    [result] = await token_introspector.introspect(db, [token])
+    headers = {
+        "Cache-Control": _auth_request_cache_control(result["exp"]),
+        "Vary": "Authorization",
+    }
+    if not result["active"]:
+        headers["WWW-Authenticate"] = "Bearer"
+        return Response(status_code=status.HTTP_401_UNAUTHORIZED, headers=headers)
+    headers["X-User-Id"] = result["user_id"]
+    headers["X-User-Role"] = _role_name(result["role_id"])
+    return Response(status_code=status.HTTP_204_NO_CONTENT, headers=headers)
+
+
+@router.get("/login_history", response_model=list[LoginHistoryGet])
+async def login_history(identity: RequestIdentity = Depends(get_identity)):
 
     # Получение истории входа с учетом пагинации
-    login_history = await get_login_history(db, token)
+    login_history = await get_login_history(identity)
 
-    return login_history
+    return Response(
+        content=LOGIN_HISTORY_LIST_ADAPTER.dump_json(login_history),
+        media_type="application/json",
+    )
 
 
 @router.post("/refresh")
@@ -65,9 +130,6 @@ async def refresh_access_and_refresh_tokens(
 
 
 @router.post("/logout")
-async def user_logout(
-    db: AsyncSession = Depends(get_session),
-    token: str = Depends(OAUTH2_SCHEME)
-):
-    await revoke_refresh_token(db, token)
+async def user_logout(identity: RequestIdentity = Depends(get_identity)):
+    await revoke_refresh_token(identity)
     return "Logged out successfully"
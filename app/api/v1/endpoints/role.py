@@ -1,12 +1,24 @@
 
-from fastapi import APIRouter, Depends
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth.permissions import Permission
 from app.auth.role_helpers import (
     get_all_roles,
+    permission_required,
+    set_role_parent,
+    set_role_permissions,
 )
 from app.infrastructure.db.database import get_session
-from app.schemas.role import RoleGet
+from app.schemas.role import (
+    ROLE_LIST_ADAPTER,
+    RoleGet,
+    RoleParentUpdate,
+    RolePermissions,
+    RolePermissionsUpdate,
+)
 
 router = APIRouter()
 
@@ -16,7 +28,32 @@ async def list_roles(
     db: AsyncSession = Depends(get_session)
 ):
     roles_list = await get_all_roles(db)
-    return roles_list
+    # список сериализуется в JSON целиком в pydantic-core, минуя
+    # повторную валидацию response_model и промежуточные dict
+    return Response(
+        content=ROLE_LIST_ADAPTER.dump_json(roles_list),
+        media_type="application/json",
+    )
+
+
+@router.put("/roles/{role_id}/permissions", response_model=RolePermissions)
+async def set_role_permissions_endpoint(
+    role_id: UUID,
+    update: RolePermissionsUpdate,
+    db: AsyncSession = Depends(get_session),
+    _=Depends(permission_required(Permission.ROLES_WRITE)),
+):
+    return await set_role_permissions(db, role_id, update.permissions)
+
+
+@router.put("/roles/{role_id}/parent", response_model=RoleGet)
+async def set_role_parent_endpoint(
+    role_id: UUID,
+    update: RoleParentUpdate,
+    db: AsyncSession = Depends(get_session),
+    _=Depends(permission_required(Permission.ROLES_WRITE)),
+):
+    return await set_role_parent(db, role_id, update.parent_id)
 
 
 # @router.post("/roles", response_model=list[RoleGet])
@@ -1,28 +1,20 @@
 from typing import Annotated
+
 from fastapi import APIRouter, Body, Depends
-from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.auth_helpers import (
     get_current_session_user,
     update_user_login_and_password,
 )
-from app.infrastructure.db.database import get_session
-from app.schemas.user import (
-    UserGet,
-    UserLoginPasswordUpdate,
-)
-
-OAUTH2_SCHEME = OAuth2PasswordBearer(tokenUrl="api/v1/tokens")
+from app.auth.identity import RequestIdentity, get_identity
+from app.schemas.user import UserGet, UserLoginPasswordUpdate
 
 router = APIRouter()
 
 
 @router.post("/user/me", response_model=UserGet)
-async def read_users_me(
-    db: AsyncSession = Depends(get_session), token: str = Depends(OAUTH2_SCHEME)
-):
-    active_user = await get_current_session_user(db, token)
+async def read_users_me(identity: RequestIdentity = Depends(get_identity)):
+    active_user = await get_current_session_user(identity)
     return active_user
 
 
@@ -41,9 +33,8 @@ async def read_users_me(
 @router.patch("/user")  # , response_model=UserGet)
 async def update_login_and_password(
     user_update: UserLoginPasswordUpdate = Body(...),
-    db: AsyncSession = Depends(get_session),
-    token: str = Depends(OAUTH2_SCHEME),
+    identity: RequestIdentity = Depends(get_identity),
 ):
     # Обновление логина и пароля пользователя
-    updated_user = await update_user_login_and_password(db, user_update, token)
+    updated_user = await update_user_login_and_password(identity, user_update)
     return updated_user
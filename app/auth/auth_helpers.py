@@ -1,16 +1,24 @@
 # Import necessary modules and classes
+import hashlib
+import logging
 from datetime import datetime, timedelta
 from typing import Optional
+from uuid import UUID, uuid4
 
-from fastapi import HTTPException, Request
+from fastapi import Request
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.encryption_facade import EncryptionFacade
 from app.auth.encryption_repository import KeyStorageRepositoryFactory
+from app.auth.identity import RequestIdentity
 from app.auth.login_history_repository import LoginHistoryRepositoryFactory
+from app.auth.login_throttle import login_throttle
 from app.auth.token_repository import RefreshTokenRepositoryFactory
 from app.auth.token_strategy import AccessTokenStrategy, RefreshTokenStrategy
 from app.auth.user_repository import UserRepositoryFactory
+from app.core.metrics import REFRESH_TOKEN_REUSE
+from app.core.tracing import traced
 from app.exceptions.exceptions import (
     get_database_error_exception,
     get_incorrect_credentials_exception,
@@ -18,7 +26,16 @@ from app.exceptions.exceptions import (
     get_user_already_exists,
     get_user_not_found_exception,
 )
-from app.schemas.user import UserCreate, UserGet, UserLoginPasswordUpdate
+from app.schemas.login_history import LOGIN_HISTORY_LIST_ADAPTER
+from app.schemas.user import (
+    UserAuthenticated,
+    UserCreate,
+    UserGet,
+    UserLoginPasswordUpdate,
+)
+from app.services.login_history_writer import login_history_writer
+
+logger = logging.getLogger(__name__)
 
 
 async def get_client_details(request: Request):
@@ -27,15 +44,22 @@ async def get_client_details(request: Request):
     return {"ip": client_host, "user_agent": user_agent}
 
 
+@traced("auth.register_new_user")
 async def register_new_user(
     db: AsyncSession,
     user_data: UserCreate
 ) -> str:
     user_repo = await UserRepositoryFactory(db).get_repository()
-    user = await user_repo.get_user_by_email_or_login(user_data.login)
+    # для проверки занятости хватает записи без ORM; кеш отсутствующих
+    # логинов не используется: его промах мог устареть в другом воркере
+    user = await user_repo.get_user_record_by_email_or_login(
+        user_data.login, use_negative_cache=False
+    )
     if user:
         raise get_user_already_exists("User with this login already exists")
-    user = await user_repo.get_user_by_email_or_login(user_data.email)
+    user = await user_repo.get_user_record_by_email_or_login(
+        user_data.email, use_negative_cache=False
+    )
     if user:
         raise get_user_already_exists("User with this email already exists")
 
@@ -46,15 +70,20 @@ async def register_new_user(
     )
 
     # Создание и сохранение нового пользователя в базу данных
-    new_user = await user_repo.create_user(
-        {
-            "login": user_data.login,
-            "email": user_data.email,
-            "first_name": user_data.first_name,
-            "last_name": user_data.last_name,
-            "encrypted_password": encrypted_password,
-        }
-    )
+    try:
+        new_user = await user_repo.create_user(
+            {
+                "login": user_data.login,
+                "email": user_data.email,
+                "first_name": user_data.first_name,
+                "last_name": user_data.last_name,
+                "encrypted_password": encrypted_password,
+            }
+        )
+    except IntegrityError:
+        # логин или email заняли одновременно с проверкой выше
+        await db.rollback()
+        raise get_user_already_exists()
     if not new_user:
         raise get_database_error_exception()
 
@@ -77,19 +106,28 @@ async def register_new_user(
     return new_user.id
 
 
+@traced("auth.authenticate_user")
 async def authenticate_user(
     db: AsyncSession, email_or_login: str, password: str
-) -> Optional[UserGet]:
+) -> Optional[UserAuthenticated]:
     user_repo = await UserRepositoryFactory(db).get_repository()
     user = await user_repo.get_user_by_email_or_login(email_or_login)
+    # до криптографии; попытки считаются на аккаунт, а не на написание
+    # идентификатора
+    throttle_subject = login_throttle.subject(
+        email_or_login, user.id if user else None
+    )
+    await login_throttle.check(throttle_subject)
     if not user:
+        await login_throttle.register_failure(throttle_subject)
         raise get_user_not_found_exception()
     # инициализировать encryption_repository
     encryption_repository = await KeyStorageRepositoryFactory(db).get_repository()
     # получим ключи
-    user_keys = await encryption_repository.get_keys(user.id)
+    user_keys = await encryption_repository.get_decryption_keys(user.id)
     if not user_keys:
         # to do : только восстановление через смену пароля
+        await login_throttle.register_failure(throttle_subject)
         raise get_incorrect_credentials_exception()
 
     encryption_facade = EncryptionFacade()
@@ -105,23 +143,28 @@ async def authenticate_user(
     # Compare the provided password with the decrypted password
     if decrypted_password != password:
         # Handle authentication failure
+        await login_throttle.register_failure(throttle_subject)
         raise get_incorrect_credentials_exception()
+    await login_throttle.reset(throttle_subject)
 
-    login_history_repo = LoginHistoryRepositoryFactory(db).get_repository()
-    await login_history_repo.create_login_history(
-        user.id, ip="127.0.0.1", user_agent="test"
+    await login_history_writer.record(
+        db, user.id, ip="127.0.0.1", user_agent="test"
     )
 
-    return UserGet.from_orm(user)
+    return UserAuthenticated.model_validate(user)
 
 
-async def create_access_and_refresh_tokens(db: AsyncSession, login: str):
-    # Assuming you have a method to get the user by login
-    user_repo = await UserRepositoryFactory(db).get_repository()
-    user = await user_repo.get_user_by_email_or_login(login)
-    if not user:
-        raise get_user_not_found_exception()
+def hash_refresh_token(refresh_token: str) -> bytes:
+    return hashlib.sha256(refresh_token.encode()).digest()
+
 
+async def _issue_tokens(
+    db: AsyncSession,
+    user_id: UUID,
+    login: str,
+    family_id: UUID,
+    role_id: Optional[UUID],
+) -> dict:
     access_token_strategy = AccessTokenStrategy()
     refresh_token_strategy = RefreshTokenStrategy()
 
@@ -129,19 +172,24 @@ async def create_access_and_refresh_tokens(db: AsyncSession, login: str):
     refresh_token_expires = timedelta(days=30)
     refresh_token_expires_at = datetime.utcnow() + refresh_token_expires
 
+    # rid — роль на момент выпуска; права роли берутся из кеша ролей,
+    # так что permission_required не ходит в базу
     access_token = await access_token_strategy.create_token(
-        data={"sub": login}, expires_delta=access_token_expires
+        data={"sub": login, "rid": str(role_id) if role_id else None},
+        expires_delta=access_token_expires,
     )
 
     refresh_token = await refresh_token_strategy.create_token(
         data={"sub": login}, expires_delta=refresh_token_expires
     )
 
-    # Сохраняем токены в базу данных
+    # В базе хранится только SHA-256 refresh токена
     tokens_repo = await RefreshTokenRepositoryFactory(db).get_repository()
-    await tokens_repo.delete_refresh_token(user.id)
     await tokens_repo.create_refresh_token(
-        user_id=user.id, token=access_token, expires_at=refresh_token_expires_at
+        user_id=user_id,
+        token_hash=hash_refresh_token(refresh_token),
+        family_id=family_id,
+        expires_at=refresh_token_expires_at,
     )
 
     return {
@@ -151,76 +199,84 @@ async def create_access_and_refresh_tokens(db: AsyncSession, login: str):
     }
 
 
+@traced("auth.create_access_and_refresh_tokens")
+async def create_access_and_refresh_tokens(
+    db: AsyncSession,
+    login: str,
+    user_id: Optional[UUID] = None,
+    role_id: Optional[UUID] = None,
+):
+    # после authenticate_user id и роль уже известны, повторный поиск не нужен
+    if user_id is None:
+        user_repo = await UserRepositoryFactory(db).get_repository()
+        user = await user_repo.get_user_record_by_email_or_login(login)
+        if not user:
+            raise get_user_not_found_exception()
+        user_id, role_id = user.id, user.role_id
+
+    # каждый вход начинает новое семейство refresh токенов
+    return await _issue_tokens(
+        db, user_id, login, family_id=uuid4(), role_id=role_id
+    )
+
+
+@traced("auth.refresh_user_tokens")
 async def refresh_user_tokens(refresh_token: str, db: AsyncSession):
-    # TODO проверить какой тип токена нужно проверять, access или refresh
-    # изменить название метода на более понятное
     # Верифицируем refresh токен
     refresh_token_strategy = RefreshTokenStrategy()
     refresh_token_verefied = await refresh_token_strategy.verify_token(refresh_token)
     if not refresh_token_verefied:
         raise get_token_validation_exception()
 
-    refresh_token_updated = await create_access_and_refresh_tokens(
-        db, refresh_token_verefied.login
-    )
-
-    return refresh_token_updated
+    token_hash = hash_refresh_token(refresh_token)
+    tokens_repo = await RefreshTokenRepositoryFactory(db).get_repository()
+    rotated = await tokens_repo.rotate_refresh_token(token_hash)
+    if rotated is None:
+        # токен неизвестен, истёк или уже был обменян; в последнем случае
+        # его кто-то сохранил — отзываем всё семейство
+        if await tokens_repo.revoke_family_of_reused_token(token_hash):
+            REFRESH_TOKEN_REUSE.inc()
+            logger.warning("Refresh token reuse detected, token family revoked")
+        raise get_token_validation_exception()
 
+    # логин берётся из базы: после смены логина старый мог занять другой
+    # пользователь
+    user_id, family_id, login, role_id = rotated
+    return await _issue_tokens(
+        db,
+        user_id,
+        login,
+        family_id=family_id,
+        role_id=role_id,
+    )
 
-async def revoke_refresh_token(db: AsyncSession, acesss_token: str):
-    access_token_strategy = AccessTokenStrategy()
-    # Верифицируем access токен текущей сессии
-    acesss_token_verefied = await access_token_strategy.verify_token(acesss_token)
-    if not acesss_token_verefied:
-        raise get_token_validation_exception()
 
-    user_repo = await UserRepositoryFactory(db).get_repository()
-    # Получаем из базы данных пользователя с указанным логином
-    user = await user_repo.get_user_by_email_or_login(acesss_token_verefied.login)
-    if not user:
-        raise get_user_not_found_exception()
+@traced("auth.revoke_refresh_token")
+async def revoke_refresh_token(identity: RequestIdentity):
+    user = await identity.user()
 
-    # Получаем refresh токен текущего пользователя
-    tokens_repo = await RefreshTokenRepositoryFactory(db).get_repository()
-    refresh_token_db = await tokens_repo.get_refresh_token_by_user_id(user.id)
-    if refresh_token_db:
-        await tokens_repo.revoke_refresh_token(refresh_token_db.id)
+    # Отзываем действующие refresh токены пользователя
+    tokens_repo = await RefreshTokenRepositoryFactory(identity.db).get_repository()
+    await tokens_repo.revoke_user_refresh_tokens(user.id)
     return {"message": "Refresh token revoked"}
 
 
-async def get_current_session_user(db: AsyncSession, acesss_token: str):
-    access_token_strategy = AccessTokenStrategy()
-    # Верифицируем access токен текущей сессии
-    acesss_token_verefied = await access_token_strategy.verify_token(acesss_token)
-    if not acesss_token_verefied:
-        raise HTTPException(status_code=401, detail="Invalid access token")
-
-    user_repo = await UserRepositoryFactory(db).get_repository()
-    # Получаем из базы данных пользователя с указанным логином
-    user = await user_repo.get_user_by_email_or_login(acesss_token_verefied.login)
-    if not user:
-        raise get_user_not_found_exception()
-    return UserGet.from_orm(user)
+@traced("auth.get_current_session_user")
+async def get_current_session_user(identity: RequestIdentity) -> UserGet:
+    return UserGet.model_validate(await identity.user())
 
 
+@traced("auth.update_user_login_and_password")
 async def update_user_login_and_password(
-    db: AsyncSession, user_update: UserLoginPasswordUpdate, token: str
+    identity: RequestIdentity, user_update: UserLoginPasswordUpdate
 ) -> UserGet:
-    acces_token_strategy = AccessTokenStrategy()
-
-    access_token = await acces_token_strategy.verify_token(token)
-    if not access_token:
-        # TODO не авторизован exception
-        raise get_user_not_found_exception()
-
+    db = identity.db
+    user = await identity.user()
     user_repo = await UserRepositoryFactory(db).get_repository()
-
-    # Получаем пользователя по ID которого будем обновлять
-    user = await user_repo.get_user_by_email_or_login(access_token.login)
-    if not user:
-        raise get_user_not_found_exception()
     # проверяем форму с новыми данными
-    new_user = await user_repo.get_user_by_email_or_login(user_update.login)
+    new_user = await user_repo.get_user_record_by_email_or_login(
+        user_update.login, use_negative_cache=False
+    )
     if new_user:
         raise get_user_already_exists("User with this login already exists")
 
@@ -233,9 +289,15 @@ async def update_user_login_and_password(
     # критически важная зона!
     # TODO проверить работу db перед обновлением данных
     # Обновляем логин и зашифрованный пароль пользователя
-    updated_user = await user_repo.update_user(
-        user.id, login=user_update.login, encrypted_password=encrypted_password
-    )
+    try:
+        updated_user = await user_repo.update_user(
+            user.id, login=user_update.login, encrypted_password=encrypted_password
+        )
+    except IntegrityError:
+        await db.rollback()
+        raise get_user_already_exists("User with this login already exists")
+    if not updated_user:
+        raise get_user_not_found_exception()
     keys_repo = await KeyStorageRepositoryFactory(db).get_repository()
     await keys_repo.delete_keys(user.id)
     # Обновляем ключи шифрования пользователя
@@ -249,26 +311,26 @@ async def update_user_login_and_password(
         raise get_database_error_exception()
     # TODO обновить сессионные ключи
 
-    # Возвращаем обновленные данные пользователя
-    updated_user = await user_repo.get_user_by_id(user.id)
+    # refresh токены выданы на старый логин, после смены логина и пароля
+    # нужно войти заново
+    tokens_repo = await RefreshTokenRepositoryFactory(db).get_repository()
+    await tokens_repo.revoke_user_refresh_tokens(user.id)
 
-    login_history_repo = LoginHistoryRepositoryFactory(db).get_repository()
-    await login_history_repo.create_login_history(
-        user_id=user.id, ip="127.0.0.1", user_agent="test"
-    )
+    # update_user вернул строку после изменения (UPDATE ... RETURNING)
+    identity.replace_user(updated_user)
 
-    return UserGet.from_orm(updated_user)
+    await login_history_writer.record(
+        db, user.id, ip="127.0.0.1", user_agent="test"
+    )
 
+    return UserGet.model_validate(updated_user)
 
-async def get_login_history(db: AsyncSession, token: str):
-    access_token = await AccessTokenStrategy().verify_token(token)
-    if not access_token:
-        raise get_user_not_found_exception()
-    user_repo = await UserRepositoryFactory(db).get_repository()
-    user = await user_repo.get_user_by_email_or_login(access_token.login)
-    if not user:
-        raise get_user_not_found_exception()
 
-    login_history_repo = LoginHistoryRepositoryFactory(db).get_repository()
+@traced("auth.get_login_history")
+async def get_login_history(identity: RequestIdentity):
+    user = await identity.user()
+    login_history_repo = LoginHistoryRepositoryFactory(identity.db).get_repository()
     login_history = await login_history_repo.get_login_history_by_user_id(user.id)
-    return login_history
+    return LOGIN_HISTORY_LIST_ADAPTER.validate_python(
+        login_history, from_attributes=True
+    )
@@ -0,0 +1,56 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from app.core.config import settings
+from app.core.metrics import CRYPTO_EXECUTOR_QUEUE_DEPTH
+
+
+class CryptoExecutor:
+    """Выделенный пул потоков для RSA/AES операций.
+
+    В отличие от пула по умолчанию (`run_in_executor(None, ...)`) считает
+    задачи, которые ещё ждут свободного потока, и экспортирует эту глубину
+    очереди в метрики.
+    """
+
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="crypto"
+        )
+        self._queued = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queued
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        # задачу снимает с учёта либо старт в потоке пула, либо выход из
+        # ожидания (отмена до старта); list.pop() гарантирует, что только один
+        pending = [None]
+
+        def call():
+            loop.call_soon_threadsafe(self._dequeue, pending)
+            return func(*args)
+
+        self._queued += 1
+        CRYPTO_EXECUTOR_QUEUE_DEPTH.inc()
+        try:
+            return await loop.run_in_executor(self._executor, call)
+        finally:
+            self._dequeue(pending)
+
+    def _dequeue(self, pending: list) -> None:
+        try:
+            pending.pop()
+        except IndexError:
+            return
+        self._queued -= 1
+        CRYPTO_EXECUTOR_QUEUE_DEPTH.dec()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+crypto_executor = CryptoExecutor(settings.CRYPTO_EXECUTOR_WORKERS)
@@ -1,8 +1,7 @@
-import json
-from typing import Dict, Union
+from __future__ import annotations
 
-# Вспомогательные классы и функции определены выше
-from Crypto.PublicKey import RSA
+import json
+from typing import TYPE_CHECKING, Dict, Union
 
 from app.auth.encryption_strategy import (
     AESEncryptor,
@@ -11,6 +10,10 @@ from app.auth.encryption_strategy import (
     RSAKeyPairGenerator,
     get_session_key_async,
 )
+from app.core.tracing import traced
+
+if TYPE_CHECKING:
+    from Crypto.PublicKey import RSA
 
 
 class EncryptionFacade:
@@ -19,6 +22,7 @@ class EncryptionFacade:
         self.rsa_encryptor = RSAEncryptor()
         self.aes_encryptor = AESEncryptor()
 
+    @traced("encryption.generate_keys")
     async def generate_keys(
         self,
     ) -> Dict[str, Union[RSA.RsaKey, RSA.RsaKey, bytes, str]]:
@@ -47,6 +51,7 @@ class EncryptionFacade:
             "encrypted_session_key": encrypted_session_key,
         }
 
+    @traced("encryption.encrypt_data")
     async def encrypt_data(self, data: str, session_key: bytes) -> str:
         encrypted_message = await self.aes_encryptor.encrypt(data, session_key)
         encrypted_data_json = json.dumps(
@@ -58,6 +63,7 @@ class EncryptionFacade:
         )
         return encrypted_data_json
 
+    @traced("encryption.decrypt_data")
     async def decrypt_data(self, encrypted_data_json: str, session_key: bytes) -> str:
         encrypted_data = json.loads(encrypted_data_json)
         encrypted_message = EncryptedMessage(
@@ -70,9 +76,13 @@ class EncryptionFacade:
         )
         return decrypted_data
 
+    @traced("encryption.import_rsa_key")
     async def import_rsa_key(self, pem_key: bytes) -> RSA.RsaKey:
+        from Crypto.PublicKey import RSA
+
         return RSA.import_key(pem_key)
 
+    @traced("encryption.decrypt_session_key")
     async def decrypt_session_key(
         self, encrypted_session_key: bytes, private_key: RSA.RsaKey
     ):
@@ -2,12 +2,28 @@ from abc import ABC, abstractmethod
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import delete, update
+from sqlalchemy import bindparam, delete, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import load_only
 
+from app.core.tracing import traced
 from app.models.users import EncryptionKeysModel
 
+_SELECT_KEYS_BY_USER_ID = select(EncryptionKeysModel).where(
+    EncryptionKeysModel.user_id == bindparam("user_id")
+)
+# Для проверки пароля нужны только закрытый ключ и зашифрованный
+# сеансовый ключ; открытый ключ не загружается, обращение к нему
+# падает вместо скрытого запроса
+_SELECT_DECRYPTION_KEYS_BY_USER_ID = _SELECT_KEYS_BY_USER_ID.options(
+    load_only(
+        EncryptionKeysModel.private_key,
+        EncryptionKeysModel.encrypted_session_key,
+        raiseload=True,
+    )
+)
+
 
 class AbstractKeyStorageRepository(ABC):
     @abstractmethod
@@ -24,6 +40,13 @@ class AbstractKeyStorageRepository(ABC):
     async def get_keys(self, user_id: UUID) -> Optional[EncryptionKeysModel]:
         pass
 
+    @abstractmethod
+    async def get_decryption_keys(
+        self, user_id: UUID
+    ) -> Optional[EncryptionKeysModel]:
+        """Keys with only private_key and encrypted_session_key loaded."""
+        pass
+
     @abstractmethod
     async def revoke_keys(self, user_id: UUID) -> None:
         pass
@@ -38,6 +61,7 @@ class KeyStorageRepository(AbstractKeyStorageRepository):
         self.db = db
         self.key_prefix_id = "encryption_keys:user:id"
 
+    @traced("db.encryption_keys.save_keys")
     async def save_keys(
         self,
         user_id: UUID,
@@ -56,14 +80,25 @@ class KeyStorageRepository(AbstractKeyStorageRepository):
         await self.db.refresh(user_key)
         return user_key
 
+    @traced("db.encryption_keys.get_keys")
     async def get_keys(self, user_id: UUID) -> Optional[EncryptionKeysModel]:
 
         result = await self.db.execute(
-            select(EncryptionKeysModel).filter_by(user_id=user_id)
+            _SELECT_KEYS_BY_USER_ID, {"user_id": user_id}
         )
         user_key = result.scalars().first()
         return user_key
 
+    @traced("db.encryption_keys.get_decryption_keys")
+    async def get_decryption_keys(
+        self, user_id: UUID
+    ) -> Optional[EncryptionKeysModel]:
+        result = await self.db.execute(
+            _SELECT_DECRYPTION_KEYS_BY_USER_ID, {"user_id": user_id}
+        )
+        return result.scalars().first()
+
+    @traced("db.encryption_keys.revoke_keys")
     async def revoke_keys(self, user_id: UUID) -> None:
         await self.db.execute(
             update(EncryptionKeysModel)
@@ -72,6 +107,7 @@ class KeyStorageRepository(AbstractKeyStorageRepository):
         )
         await self.db.commit()
 
+    @traced("db.encryption_keys.delete_keys")
     async def delete_keys(self, user_id: UUID) -> None:
         await self.db.execute(
             delete(EncryptionKeysModel).where(
@@ -1,10 +1,15 @@
-import asyncio
+from __future__ import annotations
+
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from app.auth.crypto_executor import crypto_executor
 
-from Crypto.Cipher import AES, PKCS1_OAEP
-from Crypto.PublicKey import RSA
-from Crypto.Random import get_random_bytes
+# pycryptodome импортируется при первой операции (или при прогреве воркера),
+# а не при импорте модуля
+if TYPE_CHECKING:
+    from Crypto.PublicKey import RSA
 
 
 @dataclass
@@ -15,8 +20,9 @@ class EncryptedMessage:
 
 
 async def get_session_key_async():
-    loop = asyncio.get_running_loop()
-    session_key = await loop.run_in_executor(None, get_random_bytes, 16)
+    from Crypto.Random import get_random_bytes
+
+    session_key = await crypto_executor.run(get_random_bytes, 16)
     return session_key
 
 
@@ -52,8 +58,9 @@ class DataEncryptor(ABC):
 
 class RSAKeyPairGenerator(KeyPairGenerator):
     async def generate_key_pair(self) -> (RSA.RsaKey, RSA.RsaKey):
-        loop = asyncio.get_running_loop()
-        key_pair = await loop.run_in_executor(None, RSA.generate, 2048)
+        from Crypto.PublicKey import RSA
+
+        key_pair = await crypto_executor.run(RSA.generate, 2048)
         return key_pair, key_pair.public_key()
 
 
@@ -61,32 +68,35 @@ class RSAEncryptor(SessionKeyEncryptor):
     async def encrypt_session_key(
         self, session_key: bytes, public_key: RSA.RsaKey
     ) -> bytes:
-        loop = asyncio.get_running_loop()
-        enc_session_key = await loop.run_in_executor(
-            None, PKCS1_OAEP.new(public_key).encrypt, session_key
+        from Crypto.Cipher import PKCS1_OAEP
+
+        enc_session_key = await crypto_executor.run(
+            PKCS1_OAEP.new(public_key).encrypt, session_key
         )
         return enc_session_key
 
     async def decrypt_session_key(
         self, encrypted_session_key: bytes, private_key: RSA.RsaKey
     ) -> bytes:
-        loop = asyncio.get_running_loop()
-        session_key = await loop.run_in_executor(
-            None, PKCS1_OAEP.new(private_key).decrypt, encrypted_session_key
+        from Crypto.Cipher import PKCS1_OAEP
+
+        session_key = await crypto_executor.run(
+            PKCS1_OAEP.new(private_key).decrypt, encrypted_session_key
         )
         return session_key
 
 
 class AESEncryptor(DataEncryptor):
     async def encrypt(self, data: str, session_key: bytes) -> EncryptedMessage:
-        loop = asyncio.get_running_loop()
-        encrypted_message = await loop.run_in_executor(
-            None, lambda: self._encrypt_data(data, session_key)
+        encrypted_message = await crypto_executor.run(
+            self._encrypt_data, data, session_key
         )
         return encrypted_message
 
     @staticmethod
     def _encrypt_data(data: str, session_key: bytes) -> EncryptedMessage:
+        from Crypto.Cipher import AES
+
         cipher_aes = AES.new(session_key, AES.MODE_EAX)
         ciphertext, digest = cipher_aes.encrypt_and_digest(data.encode())
         return EncryptedMessage(
@@ -94,14 +104,15 @@ class AESEncryptor(DataEncryptor):
         )
 
     async def decrypt(self, encrypted: EncryptedMessage, session_key: bytes) -> str:
-        loop = asyncio.get_running_loop()
-        decrypted_data = await loop.run_in_executor(
-            None, lambda: self._decrypt_data(encrypted, session_key)
+        decrypted_data = await crypto_executor.run(
+            self._decrypt_data, encrypted, session_key
         )
         return decrypted_data
 
     @staticmethod
     def _decrypt_data(encrypted: EncryptedMessage, session_key: bytes) -> str:
+        from Crypto.Cipher import AES
+
         cipher_aes = AES.new(session_key, AES.MODE_EAX, nonce=encrypted.nonce)
         data = cipher_aes.decrypt_and_verify(
             encrypted.message, encrypted.digest)
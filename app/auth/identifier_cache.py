@@ -0,0 +1,95 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS
+from app.infrastructure.cache.backends import RedisCacheBackend
+from app.infrastructure.cache.cache import Cache
+from app.infrastructure.cache.client import init_redis
+
+_NAMESPACE = "user_missing"
+
+
+class UnknownIdentifierCache:
+    """Нормализованные email и логины, которых заведомо нет в `users`.
+
+    Перебор и подстановка чужих учётных данных приходят в основном с
+    несуществующими логинами; повторный такой запрос отвечается без
+    обращения к БД. В памяти процесса это LRU на `max_size` записей с
+    коротким TTL; в режиме `shared` записи лежат в Redis, и сброс при
+    регистрации виден всем воркерам сразу. В памяти сброс виден только
+    своему воркеру, остальные помнят промах до TTL — поэтому при
+    нескольких воркерах по умолчанию выбирается Redis.
+
+    Запись сбрасывается сразу после создания пользователя и смены логина
+    (`discard`). Поиск, начатый до сброса, не должен записать устаревший
+    промах. В памяти `add` сверяет номер поколения, взятый до запроса в БД.
+    В Redis поиск может идти в другом воркере, поэтому `discard` оставляет
+    на TTL отметку «есть», а промах пишется только в пустой ключ (SET NX).
+    """
+
+    def __init__(self, ttl: float, max_size: int, shared: Optional[Cache] = None):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.shared = shared
+        # identifier -> expires_at (monotonic), порядок — давность обращения
+        self._entries: OrderedDict[str, float] = OrderedDict()
+        self.generation = 0
+
+    async def contains(self, identifier: str) -> bool:
+        if self.shared is not None:
+            # False — отметка после discard
+            return await self.shared.get(identifier) is True
+        expires_at = self._entries.get(identifier)
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[identifier]
+            expires_at = None
+        if expires_at is None:
+            CACHE_REQUESTS.labels(_NAMESPACE, "miss").inc()
+            return False
+        self._entries.move_to_end(identifier)
+        CACHE_REQUESTS.labels(_NAMESPACE, "hit").inc()
+        return True
+
+    async def add(self, identifier: str, generation: int) -> None:
+        if self.shared is not None:
+            await self.shared.add(identifier, True)
+            return
+        if generation != self.generation:
+            return
+        self._entries[identifier] = time.monotonic() + self.ttl
+        self._entries.move_to_end(identifier)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def discard(self, *identifiers: str) -> None:
+        self.generation += 1
+        if self.shared is not None:
+            await self.shared.set_many(dict.fromkeys(identifiers, False))
+            return
+        for identifier in identifiers:
+            self._entries.pop(identifier, None)
+
+
+def build_unknown_identifier_cache() -> UnknownIdentifierCache:
+    shared = None
+    backend = settings.USER_NEGATIVE_CACHE_BACKEND
+    if backend == "auto":
+        backend = "redis" if settings.WEB_CONCURRENCY > 1 else "memory"
+    if backend == "redis":
+        shared = Cache(
+            _NAMESPACE,
+            ttl=settings.USER_NEGATIVE_CACHE_TTL_SECONDS,
+            backend=RedisCacheBackend(init_redis()),
+            # пересчитывать нечего: запись просто истекает
+            early_refresh_beta=0,
+        )
+    return UnknownIdentifierCache(
+        ttl=settings.USER_NEGATIVE_CACHE_TTL_SECONDS,
+        max_size=settings.USER_NEGATIVE_CACHE_MAX_SIZE,
+        shared=shared,
+    )
+
+
+unknown_identifiers = build_unknown_identifier_cache()
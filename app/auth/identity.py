@@ -0,0 +1,96 @@
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Depends
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.role_cache import role_cache
+from app.auth.role_repository import RoleRepositoryFactory
+from app.auth.token_strategy import AccessTokenStrategy
+from app.auth.user_repository import UserRecord, UserRepositoryFactory
+from app.exceptions.exceptions import get_user_not_found_exception
+from app.infrastructure.db.database import get_session
+from app.schemas.auth import AccessTokenData
+from app.schemas.role import RoleGet
+
+OAUTH2_SCHEME = OAuth2PasswordBearer(tokenUrl="api/v1/tokens")
+
+
+class RequestIdentity:
+    """Пользователь текущего запроса по access токену.
+
+    Токен проверяется один раз, пользователь и его роль загружаются
+    не больше одного раза за запрос, сколько бы хелперов и зависимостей
+    к ним ни обращались.
+    """
+
+    __slots__ = ("db", "token", "_claims", "_user", "_role", "_role_loaded")
+
+    def __init__(self, db: AsyncSession, token: str):
+        self.db = db
+        self.token = token
+        self._claims: Optional[AccessTokenData] = None
+        self._user: Optional[UserRecord] = None
+        self._role: Optional[RoleGet] = None
+        self._role_loaded = False
+
+    async def claims(self) -> AccessTokenData:
+        if self._claims is None:
+            # неверный или истёкший токен — исключение 401
+            self._claims = await AccessTokenStrategy().verify_token(self.token)
+        return self._claims
+
+    async def user(self) -> UserRecord:
+        if self._user is None:
+            claims = await self.claims()
+            user_repo = await UserRepositoryFactory(self.db).get_repository()
+            user = await user_repo.get_user_record_by_email_or_login(claims.login)
+            if not user:
+                raise get_user_not_found_exception()
+            self._user = user
+        return self._user
+
+    def replace_user(self, user: UserRecord) -> None:
+        """Подменяет пользователя после его изменения в этом же запросе."""
+        self._user = user
+        self._role_loaded = False
+
+    async def role(self) -> Optional[RoleGet]:
+        if not self._role_loaded:
+            user = await self.user()
+            role = None
+            if user.role_id:
+                role = role_cache.get_by_id(user.role_id)
+                if role is None:
+                    role_repo = await RoleRepositoryFactory(self.db).get_repository()
+                    db_role = await role_repo.get_role_by_id(user.role_id)
+                    role = RoleGet.model_validate(db_role) if db_role else None
+            self._role = role
+            self._role_loaded = True
+        return self._role
+
+
+# Каждый HTTP-запрос выполняется в своей задаче, со своей копией контекста
+_current_identity: ContextVar[Optional[RequestIdentity]] = ContextVar(
+    "current_identity", default=None
+)
+
+
+def resolve_identity(db: AsyncSession, token: str) -> RequestIdentity:
+    """Личность текущего запроса; создаётся при первом обращении.
+
+    Сверка токена и сессии защищает от чужой личности, если несколько
+    запросов выполняются в одной задаче (тестовый ASGI-клиент).
+    """
+    identity = _current_identity.get()
+    if identity is None or identity.token != token or identity.db is not db:
+        identity = RequestIdentity(db, token)
+        _current_identity.set(identity)
+    return identity
+
+
+async def get_identity(
+    db: AsyncSession = Depends(get_session), token: str = Depends(OAUTH2_SCHEME)
+) -> RequestIdentity:
+    return resolve_identity(db, token)
@@ -0,0 +1,201 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import time
+from typing import Optional
+
+import orjson
+from fastapi import Header
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.token_strategy import ACCESS_TOKEN_TYPE, TOKEN_TYPE_CLAIM
+from app.auth.user_repository import UserRepositoryFactory, normalize_identifier
+from app.core.config import settings
+from app.core.tracing import traced
+from app.exceptions.exceptions import get_introspection_client_exception
+from app.infrastructure.cache.cache import Cache
+
+# Claims access токенов, которые выпускает сервис; токены с другими
+# claims проверяются через jose
+_FAST_PATH_CLAIMS = frozenset({"sub", "exp", TOKEN_TYPE_CLAIM, "rid"})
+
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+class AccessTokenBatchVerifier:
+    """Проверка пачки HS256 токенов с общим ключевым материалом.
+
+    HMAC с ключом подготавливается один раз, для каждого токена
+    копируется (`copy()` не пересчитывает ipad/opad) и проверяется подпись
+    и срок. Результат совпадает с `AccessTokenStrategy.verify_token`:
+    claims токена или None для невалидного.
+    """
+
+    def __init__(self, secret: str):
+        self._secret = secret
+        self._mac = hmac.new(secret.encode(), digestmod=hashlib.sha256)
+
+    def verify_many(self, tokens: list[str]) -> list[Optional[dict]]:
+        now = int(time.time())
+        return [self._verify(token, now) for token in tokens]
+
+    def _verify(self, token: str, now: int) -> Optional[dict]:
+        if token.count(".") != 2:
+            return None
+        signing_input, _, signature = token.rpartition(".")
+        header_segment, _, payload_segment = signing_input.partition(".")
+        try:
+            mac = self._mac.copy()
+            mac.update(signing_input.encode("ascii"))
+            if not hmac.compare_digest(mac.digest(), _b64decode(signature)):
+                return None
+            header = orjson.loads(_b64decode(header_segment))
+            claims = orjson.loads(_b64decode(payload_segment))
+        except (ValueError, binascii.Error, UnicodeEncodeError):
+            return None
+        if not isinstance(header, dict) or header.get("alg") != "HS256":
+            return None
+        if not isinstance(claims, dict):
+            return None
+        # refresh и прочие токены с тем же ключом access токенами не считаются
+        if claims.get(TOKEN_TYPE_CLAIM) != ACCESS_TOKEN_TYPE:
+            return None
+        if not claims.keys() <= _FAST_PATH_CLAIMS:
+            return self._verify_with_jose(token)
+        exp = claims.get("exp")
+        # как в jose: exp приводится к int, равный текущей секунде ещё валиден
+        if "exp" in claims and (
+            not isinstance(exp, (int, float)) or int(exp) < now
+        ):
+            return None
+        sub = claims.get("sub")
+        if not isinstance(sub, str) or not sub:
+            return None
+        return claims
+
+    def _verify_with_jose(self, token: str) -> Optional[dict]:
+        from jose import JWTError, jwt
+
+        try:
+            claims = jwt.decode(token, self._secret, algorithms=["HS256"])
+        except JWTError:
+            return None
+        return claims if claims.get("sub") else None
+
+
+def _inactive() -> dict:
+    return {
+        "active": False,
+        "revoked": False,
+        "sub": None,
+        "user_id": None,
+        "role_id": None,
+        "exp": None,
+    }
+
+
+class TokenIntrospector:
+    """Пакетная интроспекция access токенов.
+
+    Повторы токенов в запросе схлопываются, кеш читается одним
+    запросом по SHA-256 токенов, непроверенные токены проверяются
+    пачкой, а владельцы всех валидных токенов загружаются одним запросом
+    по уникальным логинам. Токен с верной подписью, владельца которого
+    больше нет (удалён или сменил логин), считается отозванным. Другого
+    отзыва у access токенов нет: выход отзывает только refresh токены,
+    access токен остаётся активным до `exp`.
+    """
+
+    def __init__(self, cache: Cache):
+        self.cache = cache
+        self._verifier: Optional[AccessTokenBatchVerifier] = None
+
+    @property
+    def verifier(self) -> AccessTokenBatchVerifier:
+        # ключ читается из настроек при первом использовании, не при импорте
+        if self._verifier is None:
+            self._verifier = AccessTokenBatchVerifier(settings.JWT_SECRET_KEY)
+        return self._verifier
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    @traced("auth.introspect_tokens")
+    async def introspect(self, db: AsyncSession, tokens: list[str]) -> list[dict]:
+        unique = list(dict.fromkeys(tokens))
+        digests = [self._digest(token) for token in unique]
+        now = int(time.time())
+
+        results: dict[str, dict] = {}
+        misses: list[tuple[str, str]] = []
+        for token, digest, cached in zip(
+            unique, digests, await self.cache.get_many(digests)
+        ):
+            if cached is None:
+                misses.append((token, digest))
+            elif cached["active"] and cached["exp"] is not None and cached["exp"] < now:
+                # запись пережила срок токена
+                results[token] = _inactive()
+            else:
+                results[token] = cached
+
+        if misses:
+            fresh = await self._introspect_uncached(db, [token for token, _ in misses])
+            results.update(zip((token for token, _ in misses), fresh))
+            await self.cache.set_many(
+                {digest: result for (_, digest), result in zip(misses, fresh)}
+            )
+
+        return [results[token] for token in tokens]
+
+    async def _introspect_uncached(
+        self, db: AsyncSession, tokens: list[str]
+    ) -> list[dict]:
+        claims_list = self.verifier.verify_many(tokens)
+        logins = {claims["sub"] for claims in claims_list if claims}
+        users = {}
+        if logins:
+            user_repo = await UserRepositoryFactory(db).get_repository()
+            users = await user_repo.get_user_records_by_logins(logins)
+
+        results = []
+        for claims in claims_list:
+            if claims is None:
+                results.append(_inactive())
+                continue
+            user = users.get(normalize_identifier(claims["sub"]))
+            results.append(
+                {
+                    "active": user is not None,
+                    "revoked": user is None,
+                    "sub": claims["sub"],
+                    "user_id": str(user.id) if user else None,
+                    "role_id": str(user.role_id) if user and user.role_id else None,
+                    "exp": claims.get("exp"),
+                }
+            )
+        return results
+
+
+async def require_introspection_client(
+    x_introspect_key: Optional[str] = Header(default=None),
+) -> None:
+    # интроспекция раскрывает владельцев токенов, поэтому только для шлюзов
+    if x_introspect_key is None or not any(
+        hmac.compare_digest(x_introspect_key.encode(), key.encode())
+        for key in settings.TOKEN_INTROSPECT_CLIENT_KEYS
+    ):
+        raise get_introspection_client_exception()
+
+
+token_introspector = TokenIntrospector(
+    Cache(
+        "token_introspection",
+        ttl=settings.TOKEN_INTROSPECT_CACHE_TTL_SECONDS,
+        early_refresh_beta=0,
+    )
+)
@@ -2,11 +2,17 @@ from abc import ABC, abstractmethod
 from typing import List
 from uuid import UUID
 
+from sqlalchemy import bindparam
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from app.core.tracing import traced
 from app.models.users import LoginHistoryDbModel
 
+_SELECT_LOGIN_HISTORY_BY_USER_ID = select(LoginHistoryDbModel).where(
+    LoginHistoryDbModel.user_id == bindparam("user_id")
+)
+
 
 # Abstract Repository for Login History Operations
 class AbstractLoginHistoryRepository(ABC):
@@ -28,6 +34,7 @@ class LoginHistoryRepository(AbstractLoginHistoryRepository):
     def __init__(self, db: AsyncSession):
         self.db = db
 
+    @traced("db.login_history.create_login_history")
     async def create_login_history(
         self, user_id: UUID, ip: str, user_agent: str
     ) -> LoginHistoryDbModel:
@@ -39,11 +46,12 @@ class LoginHistoryRepository(AbstractLoginHistoryRepository):
         await self.db.refresh(login_history)
         return login_history
 
+    @traced("db.login_history.get_login_history_by_user_id")
     async def get_login_history_by_user_id(
         self, user_id: UUID
     ) -> List[LoginHistoryDbModel]:
         result = await self.db.execute(
-            select(LoginHistoryDbModel).where(LoginHistoryDbModel.user_id == user_id)
+            _SELECT_LOGIN_HISTORY_BY_USER_ID, {"user_id": user_id}
         )
         return result.scalars().all()
 
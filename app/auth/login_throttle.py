@@ -0,0 +1,224 @@
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+from uuid import UUID
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.metrics import LOGIN_LOCKOUTS, LOGIN_THROTTLED
+from app.exceptions.exceptions import get_too_many_login_attempts_exception
+from app.infrastructure.cache.client import init_redis
+
+logger = logging.getLogger(__name__)
+
+
+class AttemptStore(ABC):
+    """Хранилище счётчиков неудачных входов с TTL."""
+
+    @abstractmethod
+    async def get(self, key: str) -> tuple[int, float]:
+        """Возвращает (число неудач, время окончания блокировки)."""
+        pass
+
+    @abstractmethod
+    async def register_failure(self, key: str, ttl: int) -> int:
+        """Увеличивает счётчик неудач и продлевает TTL; возвращает новое значение."""
+        pass
+
+    @abstractmethod
+    async def block(self, key: str, until: float, ttl: int) -> None:
+        """Блокирует вход до `until`; запись живёт ещё не меньше `ttl` секунд."""
+        pass
+
+    @abstractmethod
+    async def reset(self, key: str) -> None:
+        pass
+
+
+class InMemoryAttemptStore(AttemptStore):
+    """Счётчики в памяти воркера, не больше `max_keys` записей.
+
+    При переполнении вытесняются давно не обновлявшиеся счётчики (LRU).
+    Действующие блокировки не вытесняются никогда, иначе поток неудач с
+    уникальными логинами снимал бы блокировку с атакуемого аккаунта; пока
+    все записи — блокировки, хранилище растёт сверх `max_keys`.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        # key -> [failures, blocked_until, expires_at], порядок — давность
+        # последнего обновления
+        self._entries: OrderedDict[str, list] = OrderedDict()
+        self._max_keys = max_keys
+
+    def _live_entry(self, key: str, now: float) -> Optional[list]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[2] <= now:
+            del self._entries[key]
+            return None
+        return entry
+
+    async def get(self, key: str) -> tuple[int, float]:
+        entry = self._live_entry(key, time.time())
+        if entry is None:
+            return 0, 0.0
+        return entry[0], entry[1]
+
+    async def register_failure(self, key: str, ttl: int) -> int:
+        now = time.time()
+        entry = self._live_entry(key, now)
+        if entry is None:
+            if len(self._entries) >= self._max_keys:
+                self._evict(now)
+            entry = self._entries[key] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[2] = now + ttl
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    async def block(self, key: str, until: float, ttl: int) -> None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry[1] = until
+            entry[2] = time.time() + ttl
+            self._entries.move_to_end(key)
+
+    async def reset(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def _evict(self, now: float) -> None:
+        # от самых старых: истёкшие удаляются, первый счётчик без
+        # действующей блокировки вытесняется
+        for key, entry in list(self._entries.items()):
+            if entry[2] <= now:
+                del self._entries[key]
+            elif entry[1] <= now:
+                del self._entries[key]
+                return
+            if len(self._entries) < self._max_keys:
+                return
+
+
+class RedisAttemptStore(AttemptStore):
+    """Счётчики в Redis — общие для всех воркеров; ключ живёт TTL секунд."""
+
+    def __init__(self, redis: Redis):
+        self._redis = redis
+
+    async def get(self, key: str) -> tuple[int, float]:
+        failures, blocked_until = await self._redis.hmget(
+            key, "failures", "blocked_until"
+        )
+        return int(failures or 0), float(blocked_until or 0.0)
+
+    async def register_failure(self, key: str, ttl: int) -> int:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hincrby(key, "failures", 1)
+            pipe.expire(key, ttl)
+            failures, _ = await pipe.execute()
+        return failures
+
+    async def block(self, key: str, until: float, ttl: int) -> None:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, "blocked_until", until)
+            pipe.expire(key, ttl)
+            await pipe.execute()
+
+    async def reset(self, key: str) -> None:
+        await self._redis.delete(key)
+
+
+class LoginThrottle:
+    """Экспоненциальная задержка и временная блокировка входа в аккаунт.
+
+    Счётчик ведётся на аккаунт (`subject`): вход по логину и по email в
+    любом регистре расходует одни и те же попытки; неизвестный
+    идентификатор считается сам по себе. Проверка выполняется до
+    расшифровки пароля, поэтому перебор паролей к одному аккаунту не
+    нагружает сервис. Недоступность хранилища счётчиков не блокирует вход.
+    """
+
+    def __init__(self, store: AttemptStore):
+        self.store = store
+
+    @staticmethod
+    def subject(identifier: str, user_id: Optional[UUID]) -> str:
+        if user_id is not None:
+            return f"user:{user_id}"
+        return f"identifier:{identifier.strip().lower()}"
+
+    @staticmethod
+    def _key(subject: str) -> str:
+        return f"login_failures:{subject}"
+
+    async def check(self, subject: str) -> None:
+        if not settings.LOGIN_THROTTLE_ENABLED:
+            return
+        try:
+            failures, blocked_until = await self.store.get(self._key(subject))
+        except RedisError:
+            logger.warning("Login attempt store unavailable, check skipped")
+            return
+        retry_after = blocked_until - time.time()
+        if retry_after > 0:
+            reason = (
+                "lockout"
+                if failures >= settings.LOGIN_LOCKOUT_THRESHOLD
+                else "backoff"
+            )
+            LOGIN_THROTTLED.labels(reason).inc()
+            raise get_too_many_login_attempts_exception(math.ceil(retry_after))
+
+    async def register_failure(self, subject: str) -> None:
+        if not settings.LOGIN_THROTTLE_ENABLED:
+            return
+        key = self._key(subject)
+        try:
+            failures = await self.store.register_failure(
+                key, settings.LOGIN_FAILURE_WINDOW_SECONDS
+            )
+        except RedisError:
+            logger.warning("Login attempt store unavailable, failure not counted")
+            return
+        if failures >= settings.LOGIN_LOCKOUT_THRESHOLD:
+            if failures == settings.LOGIN_LOCKOUT_THRESHOLD:
+                LOGIN_LOCKOUTS.inc()
+            delay = settings.LOGIN_LOCKOUT_SECONDS
+        elif failures > settings.LOGIN_FREE_ATTEMPTS:
+            exponent = failures - settings.LOGIN_FREE_ATTEMPTS - 1
+            delay = min(
+                settings.LOGIN_BACKOFF_BASE_SECONDS * 2**exponent,
+                settings.LOGIN_BACKOFF_MAX_SECONDS,
+            )
+        else:
+            return
+        try:
+            await self.store.block(
+                key,
+                time.time() + delay,
+                max(settings.LOGIN_FAILURE_WINDOW_SECONDS, math.ceil(delay)),
+            )
+        except RedisError:
+            logger.warning("Login attempt store unavailable, block not stored")
+
+    async def reset(self, subject: str) -> None:
+        try:
+            await self.store.reset(self._key(subject))
+        except RedisError:
+            logger.warning("Login attempt store unavailable, counter not reset")
+
+
+def build_attempt_store() -> AttemptStore:
+    backend = settings.LOGIN_THROTTLE_BACKEND
+    if backend == "auto":
+        backend = "redis" if settings.WEB_CONCURRENCY > 1 else "memory"
+    if backend == "redis":
+        return RedisAttemptStore(init_redis())
+    return InMemoryAttemptStore()
+
+
+login_throttle = LoginThrottle(build_attempt_store())
@@ -0,0 +1,71 @@
+import uuid
+from abc import ABC, abstractmethod
+from typing import List
+
+from sqlalchemy import bindparam, delete, insert, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from app.core.tracing import traced
+from app.models.users import PermissionDbModel, RolePermissionDbModel
+
+_SELECT_ALL_PERMISSIONS = select(PermissionDbModel).order_by(PermissionDbModel.bit)
+_SELECT_ROLE_PERMISSION_BITS = select(
+    RolePermissionDbModel.role_id, PermissionDbModel.bit
+).join(PermissionDbModel, PermissionDbModel.id == RolePermissionDbModel.permission_id)
+_DELETE_ROLE_PERMISSIONS = delete(RolePermissionDbModel).where(
+    RolePermissionDbModel.role_id == bindparam("role_id")
+)
+
+
+class AbstractPermissionRepository(ABC):
+    @abstractmethod
+    async def get_all_permissions(self) -> List[PermissionDbModel]:
+        pass
+
+    @abstractmethod
+    async def get_role_permission_bits(self) -> List[tuple[uuid.UUID, int]]:
+        """Pairs (role_id, bit) of every granted permission."""
+        pass
+
+    @abstractmethod
+    async def set_role_permissions(self, role_id: uuid.UUID, codes: list[str]) -> None:
+        """Replaces the permissions granted to the role."""
+        pass
+
+
+class PermissionRepository(AbstractPermissionRepository):
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    @traced("db.permissions.get_all_permissions")
+    async def get_all_permissions(self) -> List[PermissionDbModel]:
+        result = await self.db.execute(_SELECT_ALL_PERMISSIONS)
+        return result.scalars().all()
+
+    @traced("db.permissions.get_role_permission_bits")
+    async def get_role_permission_bits(self) -> List[tuple[uuid.UUID, int]]:
+        result = await self.db.execute(_SELECT_ROLE_PERMISSION_BITS)
+        return [tuple(row) for row in result]
+
+    @traced("db.permissions.set_role_permissions")
+    async def set_role_permissions(self, role_id: uuid.UUID, codes: list[str]) -> None:
+        await self.db.execute(_DELETE_ROLE_PERMISSIONS, {"role_id": role_id})
+        if codes:
+            await self.db.execute(
+                insert(RolePermissionDbModel).from_select(
+                    ["role_id", "permission_id"],
+                    select(literal(role_id), PermissionDbModel.id).where(
+                        PermissionDbModel.code.in_(codes)
+                    ),
+                )
+            )
+        await self.db.commit()
+
+
+class PermissionRepositoryFactory:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_repository(self) -> AbstractPermissionRepository:
+        return PermissionRepository(self.db)
@@ -0,0 +1,19 @@
+from enum import Enum
+from uuid import UUID
+
+
+class Permission(str, Enum):
+    """Коды прав; строки и номера битов задаются миграцией в `permissions`."""
+
+    ROLES_READ = "roles:read"
+    ROLES_WRITE = "roles:write"
+    USERS_READ = "users:read"
+    USERS_WRITE = "users:write"
+
+
+def compile_role_masks(grants: list[tuple[UUID, int]]) -> dict[UUID, int]:
+    """Пары (role_id, bit) в маску прав каждой роли."""
+    masks: dict[UUID, int] = {}
+    for role_id, bit in grants:
+        masks[role_id] = masks.get(role_id, 0) | (1 << bit)
+    return masks
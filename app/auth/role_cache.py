@@ -0,0 +1,117 @@
+from typing import Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.permission_repository import PermissionRepositoryFactory
+from app.auth.permissions import compile_role_masks
+from app.auth.role_hierarchy import ancestors_or_self
+from app.auth.role_repository import RoleRepositoryFactory
+from app.schemas.role import ROLE_LIST_ADAPTER, RoleGet
+
+
+class RoleCache:
+    """Роли и их права в памяти процесса.
+
+    Ролей мало и меняются они редко: кеш заполняется при старте воркера,
+    периодически перечитывается фоновой задачей и сразу после изменения
+    ролей через API этого воркера. Права каждой роли при загрузке
+    сворачиваются в битовую маску, проверка права — одно `&`.
+
+    Иерархия ролей загружается из role_closure: для каждой роли хранится
+    множество её самой и её предков, так что «роль X или выше» — одна
+    проверка вхождения. Роль наследует права всех ролей ниже себя.
+    """
+
+    def __init__(self):
+        self._by_id: dict[UUID, RoleGet] = {}
+        self._by_name: dict[str, RoleGet] = {}
+        self._permission_bits: dict[str, int] = {}
+        # собственные права роли и права с учётом ролей ниже неё
+        self._own_masks: dict[UUID, int] = {}
+        self._role_masks: dict[UUID, int] = {}
+        self._closure: list[tuple[UUID, UUID]] = []
+        self._ancestors: dict[UUID, frozenset[UUID]] = {}
+        # маски наборов прав из permission_required, считаются один раз
+        self._required_masks: dict[tuple[str, ...], Optional[int]] = {}
+        self.loaded = False
+
+    async def load(self, db: AsyncSession) -> None:
+        role_repo = await RoleRepositoryFactory(db).get_repository()
+        permission_repo = await PermissionRepositoryFactory(db).get_repository()
+        roles = await role_repo.get_all_roles()
+        permissions = await permission_repo.get_all_permissions()
+        grants = await permission_repo.get_role_permission_bits()
+        closure = await role_repo.get_role_closure()
+        self.replace(
+            ROLE_LIST_ADAPTER.validate_python(roles, from_attributes=True),
+            {permission.code: permission.bit for permission in permissions},
+            compile_role_masks(grants),
+            closure,
+        )
+
+    def replace(
+        self,
+        roles: list[RoleGet],
+        permission_bits: dict[str, int],
+        role_masks: dict[UUID, int],
+        closure: list[tuple[UUID, UUID]],
+    ) -> None:
+        effective_masks = dict(role_masks)
+        for ancestor, descendant in closure:
+            effective_masks[ancestor] = effective_masks.get(
+                ancestor, 0
+            ) | role_masks.get(descendant, 0)
+        # словари подменяются целиком, читатели не видят промежуточного состояния
+        self._by_id = {role.id: role for role in roles}
+        self._by_name = {role.name: role for role in roles}
+        self._permission_bits = permission_bits
+        self._own_masks = role_masks
+        self._role_masks = effective_masks
+        self._closure = closure
+        self._ancestors = ancestors_or_self(self._by_id, closure)
+        self._required_masks = {}
+        self.loaded = True
+
+    def get_by_id(self, role_id: UUID) -> Optional[RoleGet]:
+        return self._by_id.get(role_id)
+
+    def get_by_name(self, name: str) -> Optional[RoleGet]:
+        return self._by_name.get(name)
+
+    def all(self) -> list[RoleGet]:
+        return list(self._by_id.values())
+
+    def role_mask(self, role_id: Optional[UUID]) -> int:
+        return self._role_masks.get(role_id, 0)
+
+    def role_or_above(self, name: str) -> frozenset[UUID]:
+        """Роль с этим именем и все роли выше неё; пусто, если роли нет."""
+        role = self._by_name.get(name)
+        return self._ancestors.get(role.id, frozenset()) if role else frozenset()
+
+    def permission_mask(self, codes: Iterable[str]) -> Optional[int]:
+        """Маска набора прав; None, если какого-то права нет в базе."""
+        key = tuple(codes)
+        if key not in self._required_masks:
+            mask = 0
+            for code in key:
+                bit = self._permission_bits.get(code)
+                if bit is None:
+                    mask = None
+                    break
+                mask |= 1 << bit
+            self._required_masks[key] = mask
+        return self._required_masks[key]
+
+    def permission_bits(self) -> dict[str, int]:
+        return dict(self._permission_bits)
+
+    def role_masks(self) -> dict[UUID, int]:
+        return dict(self._own_masks)
+
+    def closure(self) -> list[tuple[UUID, UUID]]:
+        return list(self._closure)
+
+
+role_cache = RoleCache()
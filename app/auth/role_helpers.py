@@ -2,44 +2,78 @@ from typing import Optional
 from uuid import UUID
 
 from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.auth.auth_helpers import get_current_session_user
+from app.auth.identity import RequestIdentity, get_identity
+from app.auth.permission_repository import PermissionRepositoryFactory
+from app.auth.permissions import Permission
+from app.auth.role_cache import role_cache
+from app.auth.role_hierarchy import RoleHierarchyError
 from app.auth.role_repository import RoleRepositoryFactory
 from app.auth.user_repository import UserRepositoryFactory
-from app.infrastructure.db.database import get_session
-from app.models.users import RoleDbModel
-from app.schemas.role import RoleCreate, RoleGet, RoleUpdate
+from app.exceptions.exceptions import get_permission_denied_exception
+from app.schemas.role import (
+    ROLE_LIST_ADAPTER,
+    RoleCreate,
+    RoleGet,
+    RolePermissions,
+    RoleUpdate,
+)
 from app.schemas.user import UserCreate
-
-OAUTH2_SCHEME = OAuth2PasswordBearer(tokenUrl="v1/tokens")
+from app.services.config_snapshot import publish_role_cache
 
 
 async def get_current_session_user_role(
-    db: AsyncSession = Depends(get_session), token: str = Depends(OAUTH2_SCHEME)
-) -> Optional[RoleDbModel]:
-    user = await get_current_session_user(db, token)
-    if not user:
-        return None
-    role_repo = await RoleRepositoryFactory(db).get_repository()
-    role = await role_repo.get_role_by_user_id(user.id)
-    return role
+    identity: RequestIdentity = Depends(get_identity),
+) -> Optional[RoleGet]:
+    # пользователь уже загружен личностью запроса, роль — из кеша ролей
+    return await identity.role()
+
+
+async def _request_role_id(identity: RequestIdentity) -> Optional[UUID]:
+    # текущая роль пользователя, а не claim `rid` токена: после понижения
+    # роли старый access токен сразу теряет её права. Пользователь
+    # загружается один раз за запрос и нужен большинству эндпоинтов
+    user = await identity.user()
+    return user.role_id
 
 
 def role_required(allowed_roles: list[str]):
-    async def role_checker(
-        role: Optional[RoleGet] = Depends(get_current_session_user_role),
-    ):
-        if not role or role.name not in allowed_roles:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="You do not have permission to perform this action",
-            )
+    """Зависимость: роль пользователя — одна из `allowed_roles` или выше.
+
+    Роли ниже перечислять не нужно: `role_required(["admin"])` пропускает
+    и super_admin. Роль — текущая роль пользователя в базе, множество ролей
+    «не ниже» берётся из загруженного в кеш замыкания иерархии.
+    """
+
+    async def role_checker(identity: RequestIdentity = Depends(get_identity)):
+        role_id = await _request_role_id(identity)
+        if not any(role_id in role_cache.role_or_above(name) for name in allowed_roles):
+            raise get_permission_denied_exception()
 
     return role_checker
 
 
+def permission_required(*permissions: Permission | str):
+    """Зависимость: у роли пользователя есть все перечисленные права.
+
+    Роль — текущая роль пользователя в базе (пользователь загружается один
+    раз за запрос), её маска прав и маска требуемых прав — из кеша ролей.
+    Право, которого нет в таблице `permissions`, не выдано никому.
+    """
+    codes = tuple(Permission(permission).value for permission in permissions)
+
+    async def permission_checker(
+        identity: RequestIdentity = Depends(get_identity),
+    ):
+        role_id = await _request_role_id(identity)
+        required = role_cache.permission_mask(codes)
+        if required is None or role_cache.role_mask(role_id) & required != required:
+            raise get_permission_denied_exception()
+
+    return permission_checker
+
+
 async def set_user_role(
     db: AsyncSession, user_id: UUID, role_id: UUID
 ) -> Optional[UserCreate]:
@@ -71,6 +105,13 @@ async def set_user_role(
     return updated_user
 
 
+async def _refresh_role_cache(db: AsyncSession) -> None:
+    # остальные воркеры хоста увидят изменение через снимок ролей
+    if role_cache.loaded:
+        await role_cache.load(db)
+        publish_role_cache()
+
+
 async def create_role(db: AsyncSession, role_data: RoleCreate) -> Optional[RoleGet]:
     role_repo = await RoleRepositoryFactory(db).get_repository()
 
@@ -78,12 +119,19 @@ async def create_role(db: AsyncSession, role_data: RoleCreate) -> Optional[RoleG
     role = await role_repo.get_role_by_name(role_data.name)
     if role:
         return None
+    if role_data.parent_id and not await role_repo.get_role_by_id(role_data.parent_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Parent role not found"
+        )
     # Create new Role
     role = await role_repo.create_role(
-        name=role_data.name, description=role_data.description
+        name=role_data.name,
+        description=role_data.description,
+        parent_id=role_data.parent_id,
     )
     if not role:
         return None
+    await _refresh_role_cache(db)
 
     return role
 
@@ -96,6 +144,7 @@ async def delete_role(db: AsyncSession, role_id: UUID) -> Optional[RoleGet]:
             status_code=status.HTTP_404_NOT_FOUND, detail="Role not found"
         )
     await role_repo.delete_role(role_id)
+    await _refresh_role_cache(db)
     return role
 
 
@@ -109,13 +158,60 @@ async def update_role(
             status_code=status.HTTP_404_NOT_FOUND, detail="Role not found"
         )
     await role_repo.update_role(role_id, role_data)
+    await _refresh_role_cache(db)
     return role
 
 
+async def set_role_permissions(
+    db: AsyncSession, role_id: UUID, permissions: list[Permission]
+) -> RolePermissions:
+    role_repo = await RoleRepositoryFactory(db).get_repository()
+    role = await role_repo.get_role_by_id(role_id)
+    if not role:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Role not found"
+        )
+    codes = sorted({permission.value for permission in permissions})
+    permission_repo = await PermissionRepositoryFactory(db).get_repository()
+    known = {
+        permission.code
+        for permission in await permission_repo.get_all_permissions()
+    }
+    unknown = [code for code in codes if code not in known]
+    if unknown:
+        # код есть в Permission, но миграция с ним ещё не применена
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown permissions: {', '.join(unknown)}",
+        )
+    await permission_repo.set_role_permissions(role_id, codes)
+    await _refresh_role_cache(db)
+    return RolePermissions(role_id=role_id, permissions=codes)
+
+
+async def set_role_parent(
+    db: AsyncSession, role_id: UUID, parent_id: Optional[UUID]
+) -> RoleGet:
+    role_repo = await RoleRepositoryFactory(db).get_repository()
+    if parent_id is not None and not await role_repo.get_role_by_id(parent_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Parent role not found"
+        )
+    try:
+        role = await role_repo.set_role_parent(role_id, parent_id)
+    except RoleHierarchyError as exc:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+    if not role:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Role not found"
+        )
+    await _refresh_role_cache(db)
+    return RoleGet.model_validate(role)
+
+
 async def get_all_roles(db: AsyncSession) -> list[RoleGet]:
     role_repo = await RoleRepositoryFactory(db).get_repository()
     roles = await role_repo.get_all_roles()
-    roles_list = [
-        RoleGet.from_orm(role) for role in roles
-    ]  # Преобразование в Pydantic объекты
-    return roles_list
+    # Преобразование в Pydantic объекты одним вызовом закешированного адаптера
+    return ROLE_LIST_ADAPTER.validate_python(roles, from_attributes=True)
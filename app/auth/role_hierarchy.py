@@ -0,0 +1,53 @@
+from typing import Iterable, Optional
+from uuid import UUID
+
+
+class RoleHierarchyError(ValueError):
+    """Изменение создало бы цикл в иерархии ролей."""
+
+
+def compute_closure(
+    parents: dict[UUID, Optional[UUID]]
+) -> list[tuple[UUID, UUID, int]]:
+    """Строки role_closure (ancestor, descendant, depth) по родителям ролей.
+
+    Цепочка предков каждой роли считается один раз и переиспользуется
+    потомками, поэтому пересчёт линеен по числу строк замыкания и не
+    упирается в глубину рекурсии на длинных цепочках.
+    """
+    chains: dict[UUID, tuple[UUID, ...]] = {}
+    for role_id in parents:
+        # подъём до роли с уже известной цепочкой или до корня
+        path: list[UUID] = []
+        on_path: set[UUID] = set()
+        current: Optional[UUID] = role_id
+        while current is not None and current not in chains:
+            if current in on_path:
+                raise RoleHierarchyError(f"Role {current} is its own ancestor")
+            path.append(current)
+            on_path.add(current)
+            current = parents.get(current)
+        chain = chains[current] if current is not None else ()
+        for node in reversed(path):
+            parent = parents.get(node)
+            chain = (parent,) + chain if parent is not None else ()
+            chains[node] = chain
+
+    rows = []
+    for role_id, chain in chains.items():
+        rows.append((role_id, role_id, 0))
+        rows.extend(
+            (ancestor, role_id, depth)
+            for depth, ancestor in enumerate(chain, start=1)
+        )
+    return rows
+
+
+def ancestors_or_self(
+    role_ids: Iterable[UUID], closure: Iterable[tuple[UUID, UUID]]
+) -> dict[UUID, frozenset[UUID]]:
+    """Роль -> она сама и все её предки по парам (ancestor, descendant)."""
+    ancestors: dict[UUID, set[UUID]] = {role_id: {role_id} for role_id in role_ids}
+    for ancestor, descendant in closure:
+        ancestors.setdefault(descendant, {descendant}).add(ancestor)
+    return {role_id: frozenset(found) for role_id, found in ancestors.items()}
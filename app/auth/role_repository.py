@@ -2,16 +2,94 @@ import uuid
 from abc import ABC, abstractmethod
 from typing import List, Optional
 
+from sqlalchemy import bindparam, delete, insert, literal, or_, true, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy.orm import aliased
 
-from app.models.users import RoleDbModel, UsersDbModel
+from app.auth.role_hierarchy import RoleHierarchyError, compute_closure
+from app.core.tracing import traced
+from app.models.users import RoleClosureDbModel, RoleDbModel, UsersDbModel
+
+_SELECT_ROLE_BY_ID = select(RoleDbModel).where(
+    RoleDbModel.id == bindparam("role_id")
+)
+_SELECT_ROLE_BY_NAME = select(RoleDbModel).where(
+    RoleDbModel.name == bindparam("name")
+)
+# нужна только роль пользователя, строка пользователя не загружается
+_SELECT_ROLE_ID_OF_USER = select(UsersDbModel.role_id).where(
+    UsersDbModel.id == bindparam("user_id")
+)
+_SELECT_ALL_ROLES = select(RoleDbModel)
+
+# Замыкание иерархии меняется инкрементально: затрагиваются только пути,
+# проходящие через перемещаемое поддерево
+_Closure = RoleClosureDbModel
+_Above = aliased(RoleClosureDbModel)
+_Below = aliased(RoleClosureDbModel)
+
+_SELECT_CLOSURE = select(_Closure.ancestor_id, _Closure.descendant_id).where(
+    _Closure.depth > 0
+)
+_SELECT_ROLE_PARENTS = select(RoleDbModel.id, RoleDbModel.parent_id)
+_IS_DESCENDANT = select(literal(1)).where(
+    _Closure.ancestor_id == bindparam("role_id"),
+    _Closure.descendant_id == bindparam("other_id"),
+)
+# пути от строгих предков роли ко всему её поддереву
+_SUBTREE = select(_Below.descendant_id).where(
+    _Below.ancestor_id == bindparam("role_id")
+)
+_STRICT_ANCESTORS = select(_Above.ancestor_id).where(
+    _Above.descendant_id == bindparam("role_id"),
+    _Above.ancestor_id != bindparam("role_id"),
+)
+_DETACH_SUBTREE = delete(_Closure).where(
+    _Closure.descendant_id.in_(_SUBTREE),
+    _Closure.ancestor_id.in_(_STRICT_ANCESTORS),
+)
+_ATTACH_SUBTREE = insert(_Closure.__table__).from_select(
+    ["ancestor_id", "descendant_id", "depth"],
+    # каждый предок нового родителя с каждой ролью поддерева
+    select(
+        _Above.ancestor_id, _Below.descendant_id, _Above.depth + _Below.depth + 1
+    )
+    .select_from(_Above)
+    .join(_Below, true())
+    .where(
+        _Above.descendant_id == bindparam("parent_id"),
+        _Below.ancestor_id == bindparam("role_id"),
+    ),
+)
+# удаляемая роль выпадает из цепочек: её потомки становятся на уровень ближе
+_SHORTEN_PATHS_THROUGH_ROLE = (
+    update(_Closure)
+    .where(
+        _Closure.descendant_id.in_(
+            select(_Below.descendant_id).where(
+                _Below.ancestor_id == bindparam("role_id"), _Below.depth > 0
+            )
+        ),
+        _Closure.ancestor_id.in_(_STRICT_ANCESTORS),
+    )
+    .values(depth=_Closure.depth - 1)
+    .execution_options(synchronize_session=False)
+)
+_DELETE_ROLE_PATHS = delete(_Closure).where(
+    or_(
+        _Closure.ancestor_id == bindparam("role_id"),
+        _Closure.descendant_id == bindparam("role_id"),
+    )
+)
 
 
 # Abstract Repository for Role Operations
 class AbstractRoleRepository(ABC):
     @abstractmethod
-    async def create_role(self, name: str, description: str) -> RoleDbModel:
+    async def create_role(
+        self, name: str, description: str, parent_id: Optional[uuid.UUID] = None
+    ) -> RoleDbModel:
         pass
 
     @abstractmethod
@@ -38,40 +116,67 @@ class AbstractRoleRepository(ABC):
     async def get_all_roles(self) -> List[RoleDbModel]:
         pass
 
+    @abstractmethod
+    async def set_role_parent(
+        self, role_id: uuid.UUID, parent_id: Optional[uuid.UUID]
+    ) -> Optional[RoleDbModel]:
+        """Moves the role with its subtree; RoleHierarchyError on a cycle."""
+        pass
+
+    @abstractmethod
+    async def get_role_closure(self) -> List[tuple[uuid.UUID, uuid.UUID]]:
+        """Pairs (ancestor_id, descendant_id) of distinct roles."""
+        pass
+
+    @abstractmethod
+    async def rebuild_role_closure(self) -> int:
+        """Recomputes role_closure from parent links; returns row count."""
+        pass
+
 
 # Concrete Repository Implementation for Role Operations
 class RoleRepository(AbstractRoleRepository):
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def create_role(self, name: str, description: str) -> RoleDbModel:
-        role = RoleDbModel(name=name, description=description)
+    @traced("db.roles.create_role")
+    async def create_role(
+        self, name: str, description: str, parent_id: Optional[uuid.UUID] = None
+    ) -> RoleDbModel:
+        role = RoleDbModel(name=name, description=description, parent_id=parent_id)
         self.db.add(role)
+        await self.db.flush()
+        await self.db.execute(
+            insert(RoleClosureDbModel).values(
+                ancestor_id=role.id, descendant_id=role.id, depth=0
+            )
+        )
+        if parent_id is not None:
+            await self.db.execute(
+                _ATTACH_SUBTREE, {"role_id": role.id, "parent_id": parent_id}
+            )
         await self.db.commit()
         await self.db.refresh(role)
         return role
 
+    @traced("db.roles.get_role_by_id")
     async def get_role_by_id(self, role_id: uuid.UUID) -> Optional[RoleDbModel]:
-        result = await self.db.execute(
-            select(RoleDbModel).where(RoleDbModel.id == role_id)
-        )
+        result = await self.db.execute(_SELECT_ROLE_BY_ID, {"role_id": role_id})
         role = result.scalars().first()
         if role:
             return role
         return None
 
+    @traced("db.roles.get_role_by_name")
     async def get_role_by_name(self, name: str) -> Optional[RoleDbModel]:
-        result = await self.db.execute(
-            select(RoleDbModel).where(RoleDbModel.name1 == name)
-        )
+        result = await self.db.execute(_SELECT_ROLE_BY_NAME, {"name": name})
         role = result.scalars().first()
 
         return role
 
+    @traced("db.roles.update_role")
     async def update_role(self, role_id: uuid.UUID, **kwargs) -> Optional[RoleDbModel]:
-        result = await self.db.execute(
-            select(RoleDbModel).where(RoleDbModel.id == role_id)
-        )
+        result = await self.db.execute(_SELECT_ROLE_BY_ID, {"role_id": role_id})
         role = result.scalars().first()
         if role:
             for key, value in kwargs.items():
@@ -81,36 +186,95 @@ class RoleRepository(AbstractRoleRepository):
             return role
         return None
 
+    @traced("db.roles.delete_role")
     async def delete_role(self, role_id: uuid.UUID) -> bool:
-        result = await self.db.execute(
-            select(RoleDbModel).where(RoleDbModel.id == role_id)
-        )
+        result = await self.db.execute(_SELECT_ROLE_BY_ID, {"role_id": role_id})
         role = result.scalars().first()
         if role:
+            # дети удаляемой роли переходят к её родителю
+            await self.db.execute(
+                update(RoleDbModel)
+                .where(RoleDbModel.parent_id == role_id)
+                .values(parent_id=role.parent_id)
+            )
+            await self.db.execute(_SHORTEN_PATHS_THROUGH_ROLE, {"role_id": role_id})
+            await self.db.execute(_DELETE_ROLE_PATHS, {"role_id": role_id})
             await self.db.delete(role)
             await self.db.commit()
             return True
         return False
 
+    @traced("db.roles.get_role_by_user_id")
     async def get_role_by_user_id(self, user_id: uuid.UUID) -> Optional[RoleDbModel]:
-        result = await self.db.execute(
-            select(UsersDbModel).where(UsersDbModel.id == user_id)
-        )
-        user = result.scalars().first()
+        result = await self.db.execute(_SELECT_ROLE_ID_OF_USER, {"user_id": user_id})
+        role_id = result.scalar()
 
-        if user and user.role_id:
+        if role_id:
             role_result = await self.db.execute(
-                select(RoleDbModel).where(RoleDbModel.id == user.role_id)
+                _SELECT_ROLE_BY_ID, {"role_id": role_id}
             )
             role = role_result.scalars().first()
             # кешируем роли
             return role
         return None
 
+    @traced("db.roles.get_all_roles")
     async def get_all_roles(self) -> List[RoleDbModel]:
-        result = await self.db.execute(select(RoleDbModel))
+        result = await self.db.execute(_SELECT_ALL_ROLES)
         return result.scalars().all()
 
+    @traced("db.roles.set_role_parent")
+    async def set_role_parent(
+        self, role_id: uuid.UUID, parent_id: Optional[uuid.UUID]
+    ) -> Optional[RoleDbModel]:
+        result = await self.db.execute(_SELECT_ROLE_BY_ID, {"role_id": role_id})
+        role = result.scalars().first()
+        if not role:
+            return None
+        if parent_id is not None:
+            # новый родитель не может лежать в поддереве самой роли
+            below = await self.db.execute(
+                _IS_DESCENDANT, {"role_id": role_id, "other_id": parent_id}
+            )
+            if below.first():
+                raise RoleHierarchyError(
+                    f"Role {parent_id} is a descendant of role {role_id}"
+                )
+        await self.db.execute(_DETACH_SUBTREE, {"role_id": role_id})
+        if parent_id is not None:
+            await self.db.execute(
+                _ATTACH_SUBTREE, {"role_id": role_id, "parent_id": parent_id}
+            )
+        role.parent_id = parent_id
+        await self.db.commit()
+        return role
+
+    @traced("db.roles.get_role_closure")
+    async def get_role_closure(self) -> List[tuple[uuid.UUID, uuid.UUID]]:
+        result = await self.db.execute(_SELECT_CLOSURE)
+        return [tuple(row) for row in result]
+
+    @traced("db.roles.rebuild_role_closure")
+    async def rebuild_role_closure(self) -> int:
+        result = await self.db.execute(_SELECT_ROLE_PARENTS)
+        rows = compute_closure({role_id: parent_id for role_id, parent_id in result})
+        await self.db.execute(delete(RoleClosureDbModel))
+        if rows:
+            # executemany: драйвер отправляет строки пачками
+            await self.db.execute(
+                insert(RoleClosureDbModel),
+                [
+                    {
+                        "ancestor_id": ancestor,
+                        "descendant_id": descendant,
+                        "depth": depth,
+                    }
+                    for ancestor, descendant, depth in rows
+                ],
+            )
+        await self.db.commit()
+        return len(rows)
+
 
 # Factory for Role Repository
 class RoleRepositoryFactory:
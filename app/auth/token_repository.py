@@ -3,17 +3,83 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import delete, update
+from sqlalchemy import bindparam, delete
+from sqlalchemy import select as core_select
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from app.models.users import RefreshTokenDbModel
+from app.core.tracing import traced
+from app.models.users import RefreshTokenDbModel, UsersDbModel
+
+_ACTIVE = RefreshTokenDbModel.revoked.is_(False)
+
+_SELECT_ACTIVE_TOKEN_BY_USER_ID = select(RefreshTokenDbModel).where(
+    RefreshTokenDbModel.user_id == bindparam("owner_id"), _ACTIVE
+)
+
+
+def _owner_column(column):
+    return (
+        core_select(column)
+        .where(UsersDbModel.id == RefreshTokenDbModel.user_id)
+        .scalar_subquery()
+        .label(column.key)
+    )
+
+
+# Ротация одним запросом: действующий токен отзывается и возвращает
+# владельца, семейство, текущие логин и роль владельца — новые токены
+# выпускаются на текущий логин, а не на записанный в старом токене.
+# Объекты токенов в сессию не загружаются, поэтому синхронизация сессии
+# не нужна.
+_ROTATE_TOKEN = (
+    update(RefreshTokenDbModel)
+    .where(
+        RefreshTokenDbModel.token_hash == bindparam("hash"),
+        _ACTIVE,
+        RefreshTokenDbModel.expires_at > bindparam("now"),
+    )
+    .values(revoked=True)
+    .returning(
+        RefreshTokenDbModel.user_id,
+        RefreshTokenDbModel.family_id,
+        _owner_column(UsersDbModel.login),
+        _owner_column(UsersDbModel.role_id),
+    )
+    .execution_options(synchronize_session=False)
+)
+
+# Уже отозванный токен предъявлен снова — цепочка скомпрометирована,
+# отзываются все действующие токены его семейства
+_REVOKE_FAMILY_OF_REUSED_TOKEN = (
+    update(RefreshTokenDbModel)
+    .where(
+        RefreshTokenDbModel.family_id
+        == core_select(RefreshTokenDbModel.family_id)
+        .where(
+            RefreshTokenDbModel.token_hash == bindparam("hash"),
+            RefreshTokenDbModel.revoked.is_(True),
+        )
+        .scalar_subquery(),
+        _ACTIVE,
+    )
+    .values(revoked=True)
+    .execution_options(synchronize_session=False)
+)
+
+_REVOKE_USER_TOKENS = (
+    update(RefreshTokenDbModel)
+    .where(RefreshTokenDbModel.user_id == bindparam("owner_id"), _ACTIVE)
+    .values(revoked=True)
+    .execution_options(synchronize_session=False)
+)
 
 
 class AbstractRefreshTokenRepository(ABC):
     @abstractmethod
     async def create_refresh_token(
-        self, user_id: UUID, token: str, expires_at: datetime
+        self, user_id: UUID, token_hash: bytes, family_id: UUID, expires_at: datetime
     ) -> None:
         """Creates a new refresh token."""
         pass
@@ -22,7 +88,25 @@ class AbstractRefreshTokenRepository(ABC):
     async def get_refresh_token_by_user_id(
         self, user_id: UUID
     ) -> Optional[RefreshTokenDbModel]:
-        """Retrieves a refresh token by its token value."""
+        """Retrieves an active refresh token of the user."""
+        pass
+
+    @abstractmethod
+    async def rotate_refresh_token(
+        self, token_hash: bytes
+    ) -> Optional[tuple[UUID, UUID, str, Optional[UUID]]]:
+        """Revokes an active token; returns the owner's
+        (user_id, family_id, login, role_id) or None."""
+        pass
+
+    @abstractmethod
+    async def revoke_family_of_reused_token(self, token_hash: bytes) -> int:
+        """Revokes the family of an already revoked token; returns row count."""
+        pass
+
+    @abstractmethod
+    async def revoke_user_refresh_tokens(self, user_id: UUID) -> None:
+        """Revokes all active refresh tokens of the user."""
         pass
 
     @abstractmethod
@@ -41,30 +125,58 @@ class RefreshTokenRepository(AbstractRefreshTokenRepository):
         self.db = db
         self.key_prefix_id = "refresh_token:user:id"
 
+    @traced("db.refresh_tokens.create_refresh_token")
     async def create_refresh_token(
-        self, user_id: UUID, token: str, expires_at: datetime
+        self, user_id: UUID, token_hash: bytes, family_id: UUID, expires_at: datetime
     ) -> None:
         refresh_token = RefreshTokenDbModel(
-            user_id=user_id, token=token, expires_at=expires_at, revoked=False
+            user_id=user_id,
+            token_hash=token_hash,
+            family_id=family_id,
+            expires_at=expires_at,
+            revoked=False,
         )
         self.db.add(refresh_token)
         await self.db.commit()
-        await self.db.refresh(refresh_token)
 
         return refresh_token
 
+    @traced("db.refresh_tokens.get_refresh_token_by_user_id")
     async def get_refresh_token_by_user_id(
         self, user_id: UUID
     ) -> Optional[RefreshTokenDbModel]:
-        query = select(RefreshTokenDbModel).where(
-            RefreshTokenDbModel.user_id == user_id,
-            RefreshTokenDbModel.revoked is False
+        result = await self.db.execute(
+            _SELECT_ACTIVE_TOKEN_BY_USER_ID, {"owner_id": user_id}
         )
-        result = await self.db.execute(query)
         refresh_token = result.scalars().first()
 
         return refresh_token
 
+    @traced("db.refresh_tokens.rotate_refresh_token")
+    async def rotate_refresh_token(
+        self, token_hash: bytes
+    ) -> Optional[tuple[UUID, UUID, str, Optional[UUID]]]:
+        # без commit: новый токен семейства пишется в той же транзакции
+        result = await self.db.execute(
+            _ROTATE_TOKEN, {"hash": token_hash, "now": datetime.utcnow()}
+        )
+        row = result.first()
+        return (row.user_id, row.family_id, row.login, row.role_id) if row else None
+
+    @traced("db.refresh_tokens.revoke_family_of_reused_token")
+    async def revoke_family_of_reused_token(self, token_hash: bytes) -> int:
+        result = await self.db.execute(
+            _REVOKE_FAMILY_OF_REUSED_TOKEN, {"hash": token_hash}
+        )
+        await self.db.commit()
+        return result.rowcount
+
+    @traced("db.refresh_tokens.revoke_user_refresh_tokens")
+    async def revoke_user_refresh_tokens(self, user_id: UUID) -> None:
+        await self.db.execute(_REVOKE_USER_TOKENS, {"owner_id": user_id})
+        await self.db.commit()
+
+    @traced("db.refresh_tokens.revoke_refresh_token")
     async def revoke_refresh_token(self, id: UUID) -> None:
         await self.db.execute(
             update(RefreshTokenDbModel)
@@ -73,6 +185,7 @@ class RefreshTokenRepository(AbstractRefreshTokenRepository):
         )
         await self.db.commit()
 
+    @traced("db.refresh_tokens.delete_refresh_token")
     async def delete_refresh_token(self, id: UUID) -> None:
         await self.db.execute(
             delete(RefreshTokenDbModel).where(
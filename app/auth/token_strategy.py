@@ -1,12 +1,23 @@
 from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
+from uuid import uuid4
 
-from jose import JWTError, jwt
+from pydantic import ValidationError
 
 from app.core.config import settings
+from app.core.tracing import traced
 from app.exceptions.exceptions import get_token_validation_exception
 from app.schemas.auth import AccessTokenData, RefreshTokenData
 
+# python-jose (вместе с бэкендом cryptography) импортируется при первом
+# выпуске или проверке токена, а не при импорте модуля
+
+# access и refresh токены подписаны одним ключом; claim `typ` не даёт
+# предъявить refresh токен вместо access
+TOKEN_TYPE_CLAIM = "typ"
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
+
 
 class TokenStrategy(ABC):
     @abstractmethod
@@ -19,46 +30,67 @@ class TokenStrategy(ABC):
 
 
 class AccessTokenStrategy(TokenStrategy):
+    @traced("token.access.create_token")
     async def create_token(self, *, data: dict, expires_delta: timedelta) -> str:
+        from jose import jwt
+
         to_encode = data.copy()
         expire = datetime.utcnow() + expires_delta
-        to_encode.update({"exp": expire})
+        to_encode.update({"exp": expire, TOKEN_TYPE_CLAIM: ACCESS_TOKEN_TYPE})
         encoded_jwt = jwt.encode(
             to_encode, settings.JWT_SECRET_KEY, algorithm='HS256'
         )
         return encoded_jwt
 
+    @traced("token.access.verify_token")
     async def verify_token(self, token: str) -> AccessTokenData:
+        from jose import JWTError, jwt
+
         try:
             payload = jwt.decode(
                 token, settings.JWT_SECRET_KEY, algorithms=['HS256']
             )
             login: str = payload.get("sub")
-            if not login:
+            if not login or payload.get(TOKEN_TYPE_CLAIM) != ACCESS_TOKEN_TYPE:
                 raise get_token_validation_exception()
-            token_data = AccessTokenData(login=login)
-        except JWTError:
+            token_data = AccessTokenData(
+                login=login,
+                role_id=payload.get("rid"),
+            )
+        except (JWTError, ValidationError):
             raise get_token_validation_exception()
         return token_data
 
 
 class RefreshTokenStrategy(TokenStrategy):
+    @traced("token.refresh.create_token")
     async def create_token(self, *, data: dict, expires_delta: timedelta) -> str:
+        from jose import jwt
+
         to_encode = data.copy()
         expire = datetime.utcnow() + expires_delta
-        to_encode.update({"exp": expire})
+        # jti делает каждый токен уникальным (и его хеш в базе), даже если
+        # два токена выданы одному пользователю в одну секунду
+        to_encode.update(
+            {"exp": expire, "jti": uuid4().hex, TOKEN_TYPE_CLAIM: REFRESH_TOKEN_TYPE}
+        )
         encoded_jwt = jwt.encode(
             to_encode, settings.JWT_SECRET_KEY, algorithm='HS256'
         )
         return encoded_jwt
 
+    @traced("token.refresh.verify_token")
     async def verify_token(self, token: str) -> RefreshTokenData:
+        from jose import JWTError, jwt
+
         try:
             payload = jwt.decode(
                 token, settings.JWT_SECRET_KEY, algorithms=['HS256']
             )
             login: str = payload.get("sub")
-            if not login:
+            # токены без `typ` не принимаются: так выглядели и старые access
+            # токены, а refresh токены тех версий удалены миграцией 833a3ef89e66
+            if not login or payload.get(TOKEN_TYPE_CLAIM) != REFRESH_TOKEN_TYPE:
                 raise get_token_validation_exception()
             token_data = RefreshTokenData(login=login)
         except JWTError:
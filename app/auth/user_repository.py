@@ -1,11 +1,119 @@
 from abc import ABC, abstractmethod
-from typing import Optional
+from time import perf_counter
+from typing import Collection, NamedTuple, Optional
+from uuid import UUID
 
+from sqlalchemy import Executable, bindparam, func, union_all, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
+from app.auth.identifier_cache import unknown_identifiers
+from app.core.config import settings
+from app.core.tracing import traced
+from app.infrastructure.db.instrumentation import record_query
 from app.models.users import UsersDbModel
 
+# Горячие запросы строятся один раз: ключ кеша компиляции SQLAlchemy
+# мемоизируется на объекте, значения передаются через bindparam.
+#
+# Поиск регистронезависимый и идёт по функциональным уникальным индексам
+# на lower(email) и lower(login). Email всегда содержит "@", поэтому
+# идентификатор без "@" ищется только по логину; с "@" — UNION ALL двух
+# индексных поисков (email, затем логин) с LIMIT 1, вместо OR, который
+# планировщик не умеет разложить на два индекса.
+_EMAIL_MATCHES = func.lower(UsersDbModel.email) == bindparam("identifier")
+_LOGIN_MATCHES = func.lower(UsersDbModel.login) == bindparam("identifier")
+
+# колонки, нужные UserRecord для пути без ORM
+_USER_RECORD_COLUMNS = (
+    UsersDbModel.id,
+    UsersDbModel.email,
+    UsersDbModel.login,
+    UsersDbModel.first_name,
+    UsersDbModel.last_name,
+    UsersDbModel.role_id,
+)
+_USER_RECORD_SELECT_SQL = (
+    "SELECT id, email, login, first_name, last_name, role_id FROM users"
+)
+
+
+class _IdentifierLookup(NamedTuple):
+    orm: Executable
+    record: Executable
+    raw_sql: str
+
+
+_LOOKUP_BY_LOGIN = _IdentifierLookup(
+    orm=select(UsersDbModel).where(_LOGIN_MATCHES).limit(1),
+    record=select(*_USER_RECORD_COLUMNS).where(_LOGIN_MATCHES).limit(1),
+    raw_sql=f"{_USER_RECORD_SELECT_SQL} WHERE lower(login) = $1 LIMIT 1",
+)
+_LOOKUP_BY_EMAIL_OR_LOGIN = _IdentifierLookup(
+    orm=select(UsersDbModel).from_statement(
+        union_all(
+            select(UsersDbModel).where(_EMAIL_MATCHES),
+            select(UsersDbModel).where(_LOGIN_MATCHES),
+        ).limit(1)
+    ),
+    record=union_all(
+        select(*_USER_RECORD_COLUMNS).where(_EMAIL_MATCHES),
+        select(*_USER_RECORD_COLUMNS).where(_LOGIN_MATCHES),
+    ).limit(1),
+    raw_sql=(
+        f"{_USER_RECORD_SELECT_SQL} WHERE lower(email) = $1 UNION ALL "
+        f"{_USER_RECORD_SELECT_SQL} WHERE lower(login) = $1 LIMIT 1"
+    ),
+)
+
+# Пачка логинов одним запросом: в asyncpg — массивом, один prepared
+# statement на любое число логинов; в остальных драйверах — IN
+_SELECT_USER_RECORDS_BY_LOGINS = select(*_USER_RECORD_COLUMNS).where(
+    func.lower(UsersDbModel.login).in_(bindparam("logins", expanding=True))
+)
+_SELECT_USER_RECORDS_BY_LOGINS_SQL = (
+    f"{_USER_RECORD_SELECT_SQL} WHERE lower(login) = ANY($1::text[])"
+)
+
+_SELECT_USER_RECORD_BY_ID = select(*_USER_RECORD_COLUMNS).where(
+    UsersDbModel.id == bindparam("user_id")
+)
+
+
+def normalize_identifier(identifier: str) -> str:
+    return identifier.strip().lower()
+
+
+def _identifier_lookup(identifier: str) -> tuple[_IdentifierLookup, str]:
+    normalized = normalize_identifier(identifier)
+    if "@" in normalized:
+        return _LOOKUP_BY_EMAIL_OR_LOGIN, normalized
+    return _LOOKUP_BY_LOGIN, normalized
+
+
+class UserRecord:
+    """Пользователь только для чтения, без ORM: нет identity map,
+    отслеживания изменений и ленивых связей. Подходит для ответа
+    `UserGet.model_validate(record)`, но не для изменения и сохранения."""
+
+    __slots__ = ("id", "email", "login", "first_name", "last_name", "role_id")
+
+    def __init__(
+        self,
+        id: UUID,
+        email: str,
+        login: str,
+        first_name: str,
+        last_name: str,
+        role_id: Optional[UUID],
+    ):
+        self.id = id
+        self.email = email
+        self.login = login
+        self.first_name = first_name
+        self.last_name = last_name
+        self.role_id = role_id
+
 
 class AbstractUserRepository(ABC):
     @abstractmethod
@@ -18,13 +126,26 @@ class AbstractUserRepository(ABC):
     ) -> Optional[UsersDbModel]:
         pass
 
-    # @abstractmethod
-    # async def get_user_by_id(self, user_id: UUID) -> Optional[UsersDbModel]:
-    #     pass
+    @abstractmethod
+    async def get_user_record_by_email_or_login(
+        self, identifier: str, use_negative_cache: bool = True
+    ) -> Optional[UserRecord]:
+        pass
 
-    # @abstractmethod
-    # async def update_user(self, user_id: UUID, **kwargs) -> Optional[UsersDbModel]:
-    #     pass
+    @abstractmethod
+    async def get_user_records_by_logins(
+        self, logins: Collection[str]
+    ) -> dict[str, UserRecord]:
+        """Records keyed by normalized login; missing logins are absent."""
+        pass
+
+    @abstractmethod
+    async def get_user_by_id(self, user_id: UUID) -> Optional[UserRecord]:
+        pass
+
+    @abstractmethod
+    async def update_user(self, user_id: UUID, **kwargs) -> Optional[UserRecord]:
+        pass
 
     # @abstractmethod
     # async def delete_user(self, user_id: UUID) -> bool:
@@ -55,22 +176,44 @@ class UserRepository(AbstractUserRepository):
     # async def _invalidate_cache(self, prefix_key, key):
     #     await self.cache_manager.delete(f"{prefix_key}:{key}")
 
+    async def _known_missing(self, normalized: str) -> bool:
+        return (
+            settings.USER_NEGATIVE_CACHE_ENABLED
+            and await unknown_identifiers.contains(normalized)
+        )
+
+    async def _forget_missing(self, *identifiers: str) -> None:
+        # после commit: поиск, начатый раньше, уже не запишет промах
+        if settings.USER_NEGATIVE_CACHE_ENABLED:
+            await unknown_identifiers.discard(
+                *(normalize_identifier(identifier) for identifier in identifiers)
+            )
+
+    @traced("db.users.create_user")
     async def create_user(self, user_data: dict) -> UsersDbModel:
         new_user = UsersDbModel(**user_data)
         self.db.add(new_user)
         await self.db.commit()
+        await self._forget_missing(new_user.login, new_user.email)
         await self.db.refresh(new_user)
 
         # # блок кеширования
-        # await self._set_cache(prefix_key=self.key_prefix_id, key=new_user.id, model_data=new_user)
         # await self._set_cache(
-        #     prefix_key=self.key_prefix_identifier, key=new_user.email, model_data=new_user
+        #     prefix_key=self.key_prefix_id, key=new_user.id, model_data=new_user
+        # )
+        # await self._set_cache(
+        #     prefix_key=self.key_prefix_identifier,
+        #     key=new_user.email,
+        #     model_data=new_user,
         # )
         # await self._set_cache(
-        #     prefix_key=self.key_prefix_identifier, key=new_user.login, model_data=new_user
+        #     prefix_key=self.key_prefix_identifier,
+        #     key=new_user.login,
+        #     model_data=new_user,
         # )
         return new_user
 
+    @traced("db.users.get_user_by_email_or_login")
     async def get_user_by_email_or_login(
         self, identifier: str
     ) -> Optional[UsersDbModel]:
@@ -82,12 +225,14 @@ class UserRepository(AbstractUserRepository):
         # if cache:
         #     return cache
 
-        query = select(UsersDbModel).where(
-            (UsersDbModel.email == identifier) | (
-                UsersDbModel.login == identifier)
-        )
-        result = await self.db.execute(query)
+        lookup, normalized = _identifier_lookup(identifier)
+        if await self._known_missing(normalized):
+            return None
+        generation = unknown_identifiers.generation
+        result = await self.db.execute(lookup.orm, {"identifier": normalized})
         user = result.scalars().first()
+        if user is None and settings.USER_NEGATIVE_CACHE_ENABLED:
+            await unknown_identifiers.add(normalized, generation)
 
         # блок кеширования
         # if user:
@@ -104,6 +249,90 @@ class UserRepository(AbstractUserRepository):
 
         return user
 
+    @traced("db.users.get_user_record_by_email_or_login")
+    async def get_user_record_by_email_or_login(
+        self, identifier: str, use_negative_cache: bool = True
+    ) -> Optional[UserRecord]:
+        # запрос идёт напрямую в asyncpg на соединении этой же сессии
+        # (из того же пула); asyncpg сам кеширует prepared statement.
+        # use_negative_cache=False — для проверок занятости: промах другого
+        # воркера не должен разрешить занятый логин
+        lookup, normalized = _identifier_lookup(identifier)
+        use_negative_cache = use_negative_cache and settings.USER_NEGATIVE_CACHE_ENABLED
+        if use_negative_cache and await unknown_identifiers.contains(normalized):
+            return None
+        generation = unknown_identifiers.generation
+        conn = await self.db.connection()
+        if conn.dialect.driver != "asyncpg":
+            result = await conn.execute(lookup.record, {"identifier": normalized})
+            row = result.first()
+        else:
+            raw_connection = await conn.get_raw_connection()
+            start = perf_counter()
+            row = await raw_connection.driver_connection.fetchrow(
+                lookup.raw_sql, normalized
+            )
+            record_query(lookup.raw_sql, (normalized,), perf_counter() - start)
+        if row is None:
+            if use_negative_cache:
+                await unknown_identifiers.add(normalized, generation)
+            return None
+        return UserRecord(*row)
+
+    @traced("db.users.get_user_records_by_logins")
+    async def get_user_records_by_logins(
+        self, logins: Collection[str]
+    ) -> dict[str, UserRecord]:
+        normalized = sorted({normalize_identifier(login) for login in logins})
+        if not normalized:
+            return {}
+        conn = await self.db.connection()
+        if conn.dialect.driver != "asyncpg":
+            result = await conn.execute(
+                _SELECT_USER_RECORDS_BY_LOGINS, {"logins": normalized}
+            )
+            rows = result.all()
+        else:
+            raw_connection = await conn.get_raw_connection()
+            start = perf_counter()
+            rows = await raw_connection.driver_connection.fetch(
+                _SELECT_USER_RECORDS_BY_LOGINS_SQL, normalized
+            )
+            record_query(
+                _SELECT_USER_RECORDS_BY_LOGINS_SQL,
+                (normalized,),
+                perf_counter() - start,
+            )
+        records = (UserRecord(*row) for row in rows)
+        return {normalize_identifier(record.login): record for record in records}
+
+    @traced("db.users.get_user_by_id")
+    async def get_user_by_id(self, user_id: UUID) -> Optional[UserRecord]:
+        result = await self.db.execute(
+            _SELECT_USER_RECORD_BY_ID, {"user_id": user_id}
+        )
+        row = result.first()
+        return UserRecord(*row) if row else None
+
+    @traced("db.users.update_user")
+    async def update_user(self, user_id: UUID, **kwargs) -> Optional[UserRecord]:
+        # UPDATE ... RETURNING без загрузки строки; уже загруженный в сессию
+        # пользователь обновляется синхронизацией сессии
+        result = await self.db.execute(
+            update(UsersDbModel)
+            .where(UsersDbModel.id == user_id)
+            .values(**kwargs)
+            .returning(*_USER_RECORD_COLUMNS)
+        )
+        row = result.first()
+        await self.db.commit()
+        changed_identifiers = [
+            kwargs[name] for name in ("login", "email") if name in kwargs
+        ]
+        if changed_identifiers:
+            await self._forget_missing(*changed_identifiers)
+        return UserRecord(*row) if row else None
+
     # async def get_user_by_id(self, user_id: UUID) -> Optional[UsersDbModel]:
     #     # блок кеширования
     #     cache = await self._get_cache(
@@ -141,9 +370,19 @@ class UserRepository(AbstractUserRepository):
     #         await self.db.commit()
 
     #         # блок кеширования
-    #         await self._set_cache(prefix_key=self.key_prefix_id, key=user.id, model_data=user)
-    #         await self._set_cache(prefix_key=self.key_prefix_identifier, key=user.email, model_data=user)
-    #         await self._set_cache(prefix_key=self.key_prefix_identifier, key=user.login, model_data=user)
+    #         await self._set_cache(
+    #             prefix_key=self.key_prefix_id, key=user.id, model_data=user
+    #         )
+    #         await self._set_cache(
+    #             prefix_key=self.key_prefix_identifier,
+    #             key=user.email,
+    #             model_data=user,
+    #         )
+    #         await self._set_cache(
+    #             prefix_key=self.key_prefix_identifier,
+    #             key=user.login,
+    #             model_data=user,
+    #         )
 
     #         return user
     #     return None
@@ -157,9 +396,15 @@ class UserRepository(AbstractUserRepository):
     #         await self.db.commit()
 
     #         # блок кеширования
-    #         await self._invalidate_cache(prefix_key=self.key_prefix_id, key=user_id)
-    #         await self._invalidate_cache(prefix_key=self.key_prefix_identifier, key=user.email)
-    #         await self._invalidate_cache(prefix_key=self.key_prefix_identifier, key=user.login)
+    #         await self._invalidate_cache(
+    #             prefix_key=self.key_prefix_id, key=user_id
+    #         )
+    #         await self._invalidate_cache(
+    #             prefix_key=self.key_prefix_identifier, key=user.email
+    #         )
+    #         await self._invalidate_cache(
+    #             prefix_key=self.key_prefix_identifier, key=user.login
+    #         )
 
     #         return True
     #     return False
@@ -9,6 +9,14 @@ class Settings(BaseSettings):
     DB_USER: str
     DB_PASSWORD: str
     DB_NAME: str
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    # сколько соединений пула открыть и прогреть до приёма трафика
+    DB_POOL_WARMUP_CONNECTIONS: int = 5
+    # кеш prepared statements asyncpg на соединение и кеш компиляции
+    # SQLAlchemy на движок; оба должны вмещать все горячие запросы
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 256
+    DB_COMPILED_CACHE_SIZE: int = 500
     # SUPER_ADMIN_LOGIN: str
     # SUPER_ADMIN_PASSWORD: str
     # SUPER_ADMIN_EMAIL: str
@@ -34,6 +42,147 @@ class Settings(BaseSettings):
     # # sequrity settings jwt
     JWT_SECRET_KEY: str
 
+    # число воркеров gunicorn (run.sh передаёт его и gunicorn)
+    WEB_CONCURRENCY: int = 1
+
+    # worker pool for RSA/AES work offloaded from the event loop
+    CRYPTO_EXECUTOR_WORKERS: int = 4
+
+    # фоновые задачи воркера: синхронизация кеша ролей и пакетная
+    # запись истории входов
+    ROLE_CACHE_REFRESH_SECONDS: float = 60.0
+    # снимок ролей в общем файле (mmap): роли из БД раз в
+    # ROLE_CACHE_REFRESH_SECONDS читает один воркер-лидер, остальные
+    # проверяют версию снимка каждые CONFIG_SNAPSHOT_POLL_SECONDS;
+    # пустой путь — файл в /dev/shm (или во временном каталоге);
+    # рядом лежит соль развёртывания (.salt) для отпечатков в снимке
+    CONFIG_SNAPSHOT_ENABLED: bool = True
+    CONFIG_SNAPSHOT_PATH: str = ""
+    CONFIG_SNAPSHOT_POLL_SECONDS: float = 1.0
+    LOGIN_HISTORY_BATCH_SIZE: int = 100
+    LOGIN_HISTORY_FLUSH_INTERVAL_SECONDS: float = 1.0
+
+    # очистка refresh_tokens: истёкшие и давно отозванные токены удаляются
+    # пачками; за раз работает один воркер (advisory lock)
+    TOKEN_CLEANUP_ENABLED: bool = True
+    TOKEN_CLEANUP_INTERVAL_SECONDS: float = 300.0
+    TOKEN_CLEANUP_BATCH_SIZE: int = 1000
+    TOKEN_CLEANUP_BATCH_PAUSE_SECONDS: float = 0.1
+    TOKEN_CLEANUP_MAX_BATCHES: int = 100
+    # отозванные токены хранятся, пока по ним нужно ловить повторное
+    # использование
+    TOKEN_CLEANUP_REVOKED_RETENTION_SECONDS: int = 7 * 24 * 3600
+    TOKEN_CLEANUP_LOCK_KEY: int = 7_301_001
+
+    # инструментирование SQL: порог медленного запроса и детектор N+1
+    DB_SLOW_QUERY_THRESHOLD_MS: float = 100.0
+    DB_REPEATED_QUERY_THRESHOLD: int = 3
+    # в тестах включается, чтобы повтор запроса сразу ронял запрос
+    DB_REPEATED_QUERY_STRICT: bool = False
+
+    # трассировка: доля сэмплируемых запросов без входящего traceparent
+    # и экспортер спанов: none | memory | file
+    TRACING_SAMPLE_RATIO: float = 0.01
+    TRACING_EXPORTER: str = "none"
+    TRACING_FILE_PATH: str = "traces.jsonl"
+
+    # логи пишутся в stdout отдельным потоком через очередь на LOG_QUEUE_SIZE
+    # записей (при переполнении записи отбрасываются, а не блокируют
+    # event loop); формат json | text. Журнал запросов пишется для доли
+    # LOG_ACCESS_SAMPLE_RATIO, ответы 5xx и медленные — всегда
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_QUEUE_SIZE: int = 10_000
+    LOG_ACCESS_SAMPLE_RATIO: float = 0.01
+    LOG_ACCESS_SLOW_MS: float = 500.0
+    REQUEST_ID_HEADER: str = "X-Request-ID"
+
+    REDIS_HOST: str = "localhost"
+    REDIS_PORT: int = 6379
+    REDIS_DB: int = 0
+    # общий пул соединений Redis на воркер
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_POOL_TIMEOUT_SECONDS: float = 1.0
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 0.5
+
+    # кеш: memory | redis; сериализация: orjson | msgpack (нужен пакет
+    # msgpack); TTL записей отклоняется на ±CACHE_TTL_JITTER; beta
+    # вероятностного раннего обновления, 0 — отключено
+    CACHE_BACKEND: str = "memory"
+    CACHE_SERIALIZER: str = "orjson"
+    CACHE_TTL_JITTER: float = 0.1
+    CACHE_EARLY_REFRESH_BETA: float = 1.0
+
+    # rate limiting: token bucket на пару (IP клиента, маршрут);
+    # лимит задаётся как "<запросов>/<second|minute|hour>"
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # memory | redis
+    RATE_LIMITS: dict[str, str] = {
+        "/api/v1/tokens": "10/minute",
+        "/api/v1/signup": "5/minute",
+        "/api/v1/refresh": "30/minute",
+        "/api/v1/tokens/introspect": "120/minute",
+    }
+    # за nginx адрес клиента берётся из последнего элемента X-Forwarded-For
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False
+
+    # задержка после неудачных входов в аккаунт: после LOGIN_FREE_ATTEMPTS
+    # ошибок задержка растёт вдвое, после LOGIN_LOCKOUT_THRESHOLD — блокировка;
+    # счётчики общие для воркеров (redis), иначе у перебора столько попыток,
+    # сколько воркеров; auto — redis, если воркеров больше одного
+    LOGIN_THROTTLE_ENABLED: bool = True
+    LOGIN_THROTTLE_BACKEND: str = "auto"  # auto | memory | redis
+    LOGIN_FREE_ATTEMPTS: int = 3
+    LOGIN_BACKOFF_BASE_SECONDS: float = 1.0
+    LOGIN_BACKOFF_MAX_SECONDS: float = 60.0
+    LOGIN_LOCKOUT_THRESHOLD: int = 10
+    LOGIN_LOCKOUT_SECONDS: int = 900
+    LOGIN_FAILURE_WINDOW_SECONDS: int = 900
+
+    # кеш email и логинов, которых нет в users: memory — LRU в воркере,
+    # redis — общий для воркеров (сброс при регистрации виден всем сразу),
+    # auto — redis, если воркеров больше одного (WEB_CONCURRENCY)
+    USER_NEGATIVE_CACHE_ENABLED: bool = True
+    USER_NEGATIVE_CACHE_BACKEND: str = "auto"  # auto | memory | redis
+    USER_NEGATIVE_CACHE_TTL_SECONDS: float = 30.0
+    USER_NEGATIVE_CACHE_MAX_SIZE: int = 100_000
+
+    # пакетная интроспекция access токенов для шлюзов: не больше
+    # TOKEN_INTROSPECT_MAX_TOKENS токенов за запрос, результат кешируется
+    # по SHA-256 токена; шлюз передаёт один из ключей
+    # TOKEN_INTROSPECT_CLIENT_KEYS в заголовке X-Introspect-Key, без ключей
+    # маршрут закрыт
+    TOKEN_INTROSPECT_CLIENT_KEYS: list[str] = []
+    TOKEN_INTROSPECT_MAX_TOKENS: int = 100
+    TOKEN_INTROSPECT_CACHE_TTL_SECONDS: float = 30.0
+    # ответ /auth/verify для nginx auth_request кешируется на стороне nginx
+    # не дольше этого срока (и не дольше срока токена)
+    AUTH_REQUEST_CACHE_MAX_AGE_SECONDS: int = 30
+
+    # admission control: маршруты делятся на классы по стоимости, у класса
+    # свой лимит параллельности, длины очереди и ожидания; при освобождении
+    # слота первым допускается класс с меньшим priority
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_MAX_CONCURRENCY: int = 64
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+    ADMISSION_ROUTE_CLASSES: dict[str, str] = {
+        "/api/v1/signup": "crypto",
+        "/api/v1/tokens": "crypto",
+        "/api/v1/user": "crypto",
+        "/api/v1/refresh": "token",
+        "/api/v1/tokens/introspect": "token",
+        "/api/v1/auth/verify": "token",
+        "/api/v1/user/me": "token",
+        "/api/v1/logout": "db",
+        "/api/v1/login_history": "db",
+        "/api/v1/roles": "db",
+    }
+    ADMISSION_CLASS_LIMITS: dict[str, dict[str, float]] = {
+        "token": {"priority": 0, "concurrency": 64, "max_queue": 256, "max_wait": 1.0},
+        "db": {"priority": 1, "concurrency": 32, "max_queue": 128, "max_wait": 1.0},
+        "crypto": {"priority": 2, "concurrency": 8, "max_queue": 32, "max_wait": 2.0},
+    }
+
     @property
     def database_url(self) -> str:
         return (
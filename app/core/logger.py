@@ -1,58 +1,161 @@
-LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-LOG_DEFAULT_HANDLERS = [
-    "console",
-]
-
-
-LOGGING = {
-    "version": 1,
-    "disable_existing_loggers": False,
-    "formatters": {
-        "verbose": {"format": LOG_FORMAT},
-        "default": {
-            "()": "uvicorn.logging.DefaultFormatter",
-            "fmt": "%(levelprefix)s %(message)s",
-            "use_colors": None,
-        },
-        "access": {
-            "()": "uvicorn.logging.AccessFormatter",
-            "fmt": "%(levelprefix)s %(client_addr)s - '%(request_line)s' %(status_code)s",  # noqa
-        },
-    },
-    "handlers": {
-        "console": {
-            "level": "DEBUG",
-            "class": "logging.StreamHandler",
-            "formatter": "verbose",
-        },
-        "default": {
-            "formatter": "default",
-            "class": "logging.StreamHandler",
-            "stream": "ext://sys.stdout",
-        },
-        "access": {
-            "formatter": "access",
-            "class": "logging.StreamHandler",
-            "stream": "ext://sys.stdout",
-        },
-    },
-    "loggers": {
-        "": {
-            "handlers": LOG_DEFAULT_HANDLERS,
-            "level": "INFO",
-        },
-        "uvicorn.error": {
-            "level": "INFO",
-        },
-        "uvicorn.access": {
-            "handlers": ["access"],
-            "level": "INFO",
-            "propagate": False,
-        },
-    },
-    "root": {
-        "level": "INFO",
-        "formatter": "verbose",
-        "handlers": LOG_DEFAULT_HANDLERS,
-    },
+import copy
+import logging
+import queue
+import sys
+from contextvars import ContextVar, Token
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+import orjson
+
+from app.core.config import settings
+from app.core.metrics import LOG_RECORDS_DROPPED
+from app.core.tracing import current_span
+
+LOG_FORMAT = (
+    "%(asctime)s - %(name)s - %(levelname)s - %(request_id)s - %(message)s"
+)
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+def current_request_id() -> Optional[str]:
+    return _request_id.get()
+
+
+def bind_request_id(request_id: str) -> Token:
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token: Token) -> None:
+    _request_id.reset(token)
+
+
+class RequestContextFilter(logging.Filter):
+    """Добавляет к записи request id и, если запрос сэмплирован, trace/span id.
+
+    Висит на `QueueHandler`, то есть выполняется в потоке и контексте
+    того, кто пишет в лог, а не в потоке `QueueListener`.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        span = current_span()
+        record.trace_id = span.trace_id if span else None
+        record.span_id = span.span_id if span else None
+        return True
+
+
+_TRACEBACK_FORMATTER = logging.Formatter()
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Кладёт запись в ограниченную очередь; при переполнении отбрасывает её."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # сообщение и traceback вычисляются сразу: аргументы могут измениться
+        # до записи, а exc_info не переживает передачу в другой поток;
+        # остальное форматирование остаётся потоку слушателя
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _TRACEBACK_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+# атрибуты, которые есть у любой записи; всё остальное пришло через `extra`
+_RECORD_ATTRIBUTES = frozenset(vars(logging.makeLogRecord({}))) | {
+    "message",
+    "asctime",
+    "request_id",
+    "trace_id",
+    "span_id",
 }
+
+
+class JsonFormatter(logging.Formatter):
+    """Одна запись — один JSON-объект в строке (orjson)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id:
+            payload["trace_id"] = trace_id
+            payload["span_id"] = record.span_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                payload[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc_info"] = record.exc_text
+        if record.stack_info:
+            payload["stack_info"] = record.stack_info
+        return orjson.dumps(payload, default=str).decode()
+
+
+def build_formatter(name: str) -> logging.Formatter:
+    if name == "text":
+        return logging.Formatter(LOG_FORMAT)
+    return JsonFormatter()
+
+
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging() -> None:
+    """Переводит корневой логгер на очередь и запускает поток записи в stdout.
+
+    Вызывается при старте воркера (после fork), повторный вызов ничего
+    не делает.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(build_formatter(settings.LOG_FORMAT))
+    log_queue = queue.Queue(settings.LOG_QUEUE_SIZE)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(settings.LOG_LEVEL)
+    # логгеры uvicorn пишут через корневой; журнал запросов uvicorn заменён
+    # сэмплируемым AccessLogMiddleware
+    for name in ("uvicorn", "uvicorn.error"):
+        logging.getLogger(name).handlers.clear()
+        logging.getLogger(name).propagate = True
+    logging.getLogger("uvicorn.access").disabled = True
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Дописывает очередь и возвращает синхронный вывод для последних записей."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    root = logging.getLogger()
+    root.handlers[:] = list(_listener.handlers)
+    for handler in root.handlers:
+        handler.addFilter(RequestContextFilter())
+    _listener = None
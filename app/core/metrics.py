@@ -0,0 +1,116 @@
+import os
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# prometheus_client переключается на файловое хранилище значений, если эта
+# переменная задана до импорта (gunicorn с несколькими воркерами)
+MULTIPROC_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 4, 5, 8, 13, 21, 34)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being processed",
+    ["method", "route"],
+    multiprocess_mode="livesum",
+)
+HTTP_RESPONSES = Counter(
+    "http_responses_total",
+    "HTTP responses by status code",
+    ["method", "route", "status"],
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "Number of SQL statements executed per request",
+    ["route"],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+DB_QUERY_TIME_PER_REQUEST = Histogram(
+    "db_query_duration_per_request_seconds",
+    "Total SQL execution time per request",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+CRYPTO_EXECUTOR_QUEUE_DEPTH = Gauge(
+    "crypto_executor_queue_depth",
+    "Crypto jobs submitted to the executor and not yet started",
+    multiprocess_mode="livesum",
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "admission_queue_depth",
+    "Requests waiting for admission by route class",
+    ["route_class"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_REJECTED = Counter(
+    "admission_rejected_total",
+    "Requests shed by admission control",
+    ["route_class", "reason"],
+)
+REFRESH_TOKEN_REUSE = Counter(
+    "refresh_token_reuse_total",
+    "Rotated refresh tokens presented again; their family is revoked",
+)
+TOKEN_CLEANUP_DELETED = Counter(
+    "refresh_token_cleanup_deleted_total",
+    "Expired or revoked refresh tokens deleted by the cleanup task",
+)
+TOKEN_CLEANUP_RUNS = Counter(
+    "refresh_token_cleanup_runs_total",
+    "Cleanup runs by result",
+    ["result"],
+)
+TOKEN_CLEANUP_BATCH_DURATION = Histogram(
+    "refresh_token_cleanup_batch_duration_seconds",
+    "Duration of one cleanup delete batch",
+    buckets=LATENCY_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by namespace and result",
+    ["namespace", "result"],
+)
+LOGIN_LOCKOUTS = Counter(
+    "login_lockouts_total",
+    "Accounts temporarily locked after repeated failed logins",
+)
+LOGIN_THROTTLED = Counter(
+    "login_throttled_total",
+    "Login attempts rejected before credential checks",
+    ["reason"],
+)
+
+CONFIG_SNAPSHOT_LOADS = Counter(
+    "config_snapshot_loads_total",
+    "Role cache loads by source (snapshot, db) and snapshot publications",
+    ["source"],
+)
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped_total",
+    "Log records dropped because the log queue was full",
+)
+
+
+def render_metrics() -> bytes:
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
@@ -0,0 +1,228 @@
+import functools
+import random
+import re
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import time_ns
+from typing import Iterator, Optional
+
+import orjson
+
+from app.core.config import settings
+
+_TRACEPARENT = re.compile(
+    r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$"
+)
+_INVALID_TRACE_ID = "0" * 32
+_INVALID_SPAN_ID = "0" * 16
+_SAMPLED_FLAG = 0x01
+
+
+class Span:
+    __slots__ = (
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "name",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "status",
+    )
+
+    def __init__(
+        self, name: str, trace_id: str, parent_id: Optional[str], attributes: dict
+    ):
+        self.trace_id = trace_id
+        self.span_id = _new_span_id()
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.status = "ok"
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1_000_000
+
+    def set_attribute(self, key: str, value) -> None:
+        self.attributes[key] = value
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class SpanExporter(ABC):
+    @abstractmethod
+    def export(self, span: Span) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        pass
+
+
+class NoopSpanExporter(SpanExporter):
+    def export(self, span: Span) -> None:
+        pass
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Собирает завершённые спаны в список — для тестов."""
+
+    def __init__(self):
+        self.spans: list[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+class FileSpanExporter(SpanExporter):
+    """Пишет спаны в файл по одному JSON-объекту на строку."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "ab")
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = orjson.dumps(span.to_dict()) + b"\n"
+        with self._lock:
+            self._file.write(line)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+def _new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+def _new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[tuple[str, str, bool]]:
+    """Разбирает W3C `traceparent`: (trace_id, parent_span_id, sampled)."""
+    if not header:
+        return None
+    match = _TRACEPARENT.match(header.strip().lower())
+    if not match:
+        return None
+    version, trace_id, span_id, flags = match.groups()
+    if version == "ff" or trace_id == _INVALID_TRACE_ID or span_id == _INVALID_SPAN_ID:
+        return None
+    return trace_id, span_id, bool(int(flags, 16) & _SAMPLED_FLAG)
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+class Tracer:
+    def __init__(self, exporter: SpanExporter, sample_ratio: float):
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+
+    def should_sample(self, parent_sampled: Optional[bool] = None) -> bool:
+        if parent_sampled is not None:
+            return parent_sampled
+        return random.random() < self.sample_ratio
+
+    @contextmanager
+    def start_trace(
+        self, name: str, traceparent: Optional[str] = None, **attributes
+    ) -> Iterator[Optional[Span]]:
+        """Корневой спан запроса; продолжает входящий `traceparent`, если он есть.
+
+        Для несэмплированных запросов спан не создаётся, и все вложенные
+        `start_span`/`traced` сводятся к проверке contextvar.
+        """
+        parent = parse_traceparent(traceparent)
+        if parent is None:
+            sampled = self.should_sample()
+            trace_id, parent_id = _new_trace_id(), None
+        else:
+            trace_id, parent_id, parent_sampled = parent
+            sampled = self.should_sample(parent_sampled)
+        if not sampled:
+            yield None
+            return
+        with self._run(Span(name, trace_id, parent_id, attributes)) as span:
+            yield span
+
+    @contextmanager
+    def start_span(self, name: str, **attributes) -> Iterator[Optional[Span]]:
+        parent = _current_span.get()
+        if parent is None:
+            yield None
+            return
+        with self._run(Span(name, parent.trace_id, parent.span_id, attributes)) as span:
+            yield span
+
+    @contextmanager
+    def _run(self, span: Span) -> Iterator[Span]:
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.status = "error"
+            span.attributes["error.type"] = type(exc).__name__
+            raise
+        finally:
+            span.end_ns = time_ns()
+            _current_span.reset(token)
+            self.exporter.export(span)
+
+
+def build_exporter(name: str, path: str) -> SpanExporter:
+    if name == "memory":
+        return InMemorySpanExporter()
+    if name == "file":
+        return FileSpanExporter(path)
+    return NoopSpanExporter()
+
+
+tracer = Tracer(
+    exporter=build_exporter(settings.TRACING_EXPORTER, settings.TRACING_FILE_PATH),
+    sample_ratio=settings.TRACING_SAMPLE_RATIO,
+)
+
+
+def traced(name: Optional[str] = None):
+    """Оборачивает корутину в спан, если текущий запрос сэмплирован."""
+
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return await func(*args, **kwargs)
+            with tracer.start_span(span_name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -37,3 +37,25 @@ def get_database_error_exception():
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         detail="Database operation failed",
     )
+
+
+def get_too_many_login_attempts_exception(retry_after: int):
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many failed login attempts, try again later",
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+def get_introspection_client_exception():
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid introspection client key",
+    )
+
+
+def get_permission_denied_exception():
+    return HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="You do not have permission to perform this action",
+    )
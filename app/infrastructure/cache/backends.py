@@ -0,0 +1,116 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+from app.infrastructure.cache.client import init_redis
+
+
+class CacheBackend(ABC):
+    """Хранилище байтовых значений с TTL."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        pass
+
+    @abstractmethod
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """Записывает значение, только если ключа нет; True — записано."""
+        pass
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        pass
+
+    async def get_many(self, keys: list[str]) -> list[Optional[bytes]]:
+        return [await self.get(key) for key in keys]
+
+    async def set_many(self, items: dict[str, bytes], ttl: float) -> None:
+        for key, value in items.items():
+            await self.set(key, value, ttl)
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """Кеш в памяти процесса: для одного воркера, разработки и тестов.
+
+    Не больше `max_keys` записей; при переполнении вытесняется одна давно
+    не читавшаяся запись (LRU), горячие ключи остаются в кеше.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        # key -> (value, expires_at), порядок — давность обращения
+        self._entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+        self._max_keys = max_keys
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        now = time.monotonic()
+        if key not in self._entries and len(self._entries) >= self._max_keys:
+            self._entries.popitem(last=False)
+        self._entries[key] = (value, now + ttl)
+        self._entries.move_to_end(key)
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        if await self.get(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+
+class RedisCacheBackend(CacheBackend):
+    def __init__(self, redis: Redis):
+        self._redis = redis
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._redis.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._redis.set(key, value, px=max(1, int(ttl * 1000)))
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        return bool(
+            await self._redis.set(key, value, px=max(1, int(ttl * 1000)), nx=True)
+        )
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._redis.delete(*keys)
+
+    async def get_many(self, keys: list[str]) -> list[Optional[bytes]]:
+        # один MGET вместо запроса на ключ
+        return await self._redis.mget(keys) if keys else []
+
+    async def set_many(self, items: dict[str, bytes], ttl: float) -> None:
+        if not items:
+            return
+        px = max(1, int(ttl * 1000))
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(key, value, px=px)
+            await pipe.execute()
+
+
+def build_cache_backend() -> CacheBackend:
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCacheBackend(init_redis())
+    return InMemoryCacheBackend()
@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import math
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS
+from app.infrastructure.cache.backends import CacheBackend, build_cache_backend
+from app.infrastructure.cache.serializers import Serializer, build_serializer
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+class Cache:
+    """Кеш одного пространства ключей (`namespace`) поверх `CacheBackend`.
+
+    - TTL каждой записи случайно отклоняется на ±`ttl_jitter`, чтобы записи,
+      заполненные одновременно, не истекали одновременно.
+    - `get_or_load` объединяет конкурентные промахи по одному ключу в
+      процессе: загрузчик выполняется один раз, остальные ждут его результат.
+    - Запись может быть пересчитана раньше срока с вероятностью, растущей
+      к концу TTL и пропорциональной времени загрузки (XFetch,
+      `early_refresh_beta`; 0 отключает), — истечение горячего ключа
+      не приводит к лавине запросов в БД.
+
+    Хранится конверт `[значение, время загрузки, срок]`, поэтому None —
+    допустимое значение, отличимое от промаха. Ошибки Redis не
+    пробрасываются: кеш деградирует до прямой загрузки.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float,
+        backend: Optional[CacheBackend] = None,
+        serializer: Optional[Serializer] = None,
+        ttl_jitter: Optional[float] = None,
+        early_refresh_beta: Optional[float] = None,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.backend = backend or build_cache_backend()
+        self.serializer = serializer or build_serializer(settings.CACHE_SERIALIZER)
+        self.ttl_jitter = (
+            settings.CACHE_TTL_JITTER if ttl_jitter is None else ttl_jitter
+        )
+        self.early_refresh_beta = (
+            settings.CACHE_EARLY_REFRESH_BETA
+            if early_refresh_beta is None
+            else early_refresh_beta
+        )
+        self._inflight: dict[str, asyncio.Task] = {}
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _jittered(self, ttl: float) -> float:
+        return ttl * (1 + random.uniform(-self.ttl_jitter, self.ttl_jitter))
+
+    def _refresh_early(self, delta: float, expires_at: float) -> bool:
+        if self.early_refresh_beta <= 0 or delta <= 0:
+            return False
+        # -log(U) ~ Exp(1): чем дольше загрузка, тем раньше возможен пересчёт
+        gap = -delta * self.early_refresh_beta * math.log(1.0 - random.random())
+        return time.time() + gap >= expires_at
+
+    async def _read(self, key: str) -> Optional[list]:
+        try:
+            data = await self.backend.get(self._key(key))
+        except RedisError:
+            CACHE_REQUESTS.labels(self.namespace, "error").inc()
+            logger.warning("Cache backend unavailable, %s read skipped", self.namespace)
+            return None
+        return None if data is None else self.serializer.loads(data)
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        entry = await self._read(key)
+        CACHE_REQUESTS.labels(self.namespace, "miss" if entry is None else "hit").inc()
+        return default if entry is None else entry[0]
+
+    async def set(
+        self, key: str, value: Any, ttl: Optional[float] = None, delta: float = 0.0
+    ) -> None:
+        ttl = self._jittered(self.ttl if ttl is None else ttl)
+        envelope = [value, delta, time.time() + ttl]
+        try:
+            await self.backend.set(self._key(key), self.serializer.dumps(envelope), ttl)
+        except RedisError:
+            logger.warning(
+                "Cache backend unavailable, %s write skipped", self.namespace
+            )
+
+    async def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """Как `set`, но только если ключа нет; False — ключ уже есть или
+        Redis недоступен."""
+        ttl = self._jittered(self.ttl if ttl is None else ttl)
+        envelope = [value, 0.0, time.time() + ttl]
+        try:
+            return await self.backend.add(
+                self._key(key), self.serializer.dumps(envelope), ttl
+            )
+        except RedisError:
+            logger.warning(
+                "Cache backend unavailable, %s write skipped", self.namespace
+            )
+            return False
+
+    async def get_many(self, keys: list[str]) -> list[Any]:
+        """Значения по ключам в том же порядке; `default` не поддерживается —
+        промах и ошибка Redis возвращаются как None."""
+        try:
+            found = await self.backend.get_many([self._key(key) for key in keys])
+        except RedisError:
+            CACHE_REQUESTS.labels(self.namespace, "error").inc(len(keys))
+            logger.warning("Cache backend unavailable, %s read skipped", self.namespace)
+            return [None] * len(keys)
+        hits = sum(data is not None for data in found)
+        CACHE_REQUESTS.labels(self.namespace, "hit").inc(hits)
+        CACHE_REQUESTS.labels(self.namespace, "miss").inc(len(keys) - hits)
+        return [
+            None if data is None else self.serializer.loads(data)[0] for data in found
+        ]
+
+    async def set_many(
+        self, items: dict[str, Any], ttl: Optional[float] = None
+    ) -> None:
+        # пачка пишется с общим TTL, отклонение разводит сроки разных пачек
+        ttl = self._jittered(self.ttl if ttl is None else ttl)
+        expires_at = time.time() + ttl
+        encoded = {
+            self._key(key): self.serializer.dumps([value, 0.0, expires_at])
+            for key, value in items.items()
+        }
+        try:
+            await self.backend.set_many(encoded, ttl)
+        except RedisError:
+            logger.warning(
+                "Cache backend unavailable, %s write skipped", self.namespace
+            )
+
+    async def delete(self, *keys: str) -> None:
+        try:
+            await self.backend.delete(*(self._key(key) for key in keys))
+        except RedisError:
+            logger.warning(
+                "Cache backend unavailable, %s delete skipped", self.namespace
+            )
+
+    async def get_or_load(
+        self, key: str, loader: Loader, ttl: Optional[float] = None
+    ) -> Any:
+        entry = await self._read(key)
+        if entry is not None:
+            value, delta, expires_at = entry
+            if not self._refresh_early(delta, expires_at):
+                CACHE_REQUESTS.labels(self.namespace, "hit").inc()
+                return value
+            CACHE_REQUESTS.labels(self.namespace, "early_refresh").inc()
+        else:
+            CACHE_REQUESTS.labels(self.namespace, "miss").inc()
+        return await self._load_once(key, loader, ttl)
+
+    async def _load_once(self, key: str, loader: Loader, ttl: Optional[float]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load_and_store(key, loader, ttl))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            CACHE_REQUESTS.labels(self.namespace, "coalesced").inc()
+        # отмена одного ожидающего не отменяет загрузку для остальных
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        # ошибка уже получена ожидающими; если все они отменены, её не
+        # нужно выводить как "never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    async def _load_and_store(
+        self, key: str, loader: Loader, ttl: Optional[float]
+    ) -> Any:
+        start = time.perf_counter()
+        value = await loader()
+        await self.set(key, value, ttl, delta=time.perf_counter() - start)
+        return value
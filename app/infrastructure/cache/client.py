@@ -0,0 +1,34 @@
+from typing import Optional
+
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from app.core.config import settings
+
+# Один пул соединений Redis на процесс: его делят кеш, rate limiter и
+# счётчики неудачных входов. Клиент создаётся лениво или в lifespan;
+# создание клиента ещё не открывает соединений.
+redis_client: Optional[Redis] = None
+
+
+def init_redis() -> Redis:
+    global redis_client
+    if redis_client is None:
+        pool = BlockingConnectionPool(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            # сколько ждать свободного соединения при исчерпании пула
+            timeout=settings.REDIS_POOL_TIMEOUT_SECONDS,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+        )
+        redis_client = Redis(connection_pool=pool)
+    return redis_client
+
+
+async def close_redis() -> None:
+    # закрываются только соединения: клиент остаётся у бэкендов, созданных
+    # при импорте, и при следующем обращении пул откроет соединения заново
+    if redis_client is not None:
+        await redis_client.connection_pool.disconnect()
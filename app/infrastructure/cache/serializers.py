@@ -0,0 +1,58 @@
+from abc import ABC, abstractmethod
+from typing import Any
+
+import orjson
+
+
+class Serializer(ABC):
+    """Значения кеша — JSON-подобные: dict, list, str, числа, None."""
+
+    @abstractmethod
+    def dumps(self, value: Any) -> bytes:
+        pass
+
+    @abstractmethod
+    def loads(self, data: bytes) -> Any:
+        pass
+
+
+class OrjsonSerializer(Serializer):
+    def dumps(self, value: Any) -> bytes:
+        # UUID и datetime сериализуются строками и строками же читаются
+        return orjson.dumps(value)
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgpackSerializer(Serializer):
+    """Компактнее orjson на числах и бинарных данных; требует пакет msgpack."""
+
+    def __init__(self):
+        try:
+            import msgpack
+        except ImportError as e:
+            raise RuntimeError(
+                "CACHE_SERIALIZER=msgpack requires the msgpack package"
+            ) from e
+        self._packb = msgpack.packb
+        self._unpackb = msgpack.unpackb
+
+    def dumps(self, value: Any) -> bytes:
+        return self._packb(value, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return self._unpackb(data, raw=False)
+
+
+SERIALIZERS = {
+    "orjson": OrjsonSerializer,
+    "msgpack": MsgpackSerializer,
+}
+
+
+def build_serializer(name: str) -> Serializer:
+    try:
+        return SERIALIZERS[name]()
+    except KeyError:
+        raise ValueError(f"unknown cache serializer: {name}") from None
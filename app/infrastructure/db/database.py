@@ -1,5 +1,8 @@
+from typing import Optional
 
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
@@ -7,20 +10,61 @@ from sqlalchemy.ext.asyncio import (
 from sqlalchemy.orm import declarative_base
 
 from app.core.config import settings
+from app.infrastructure.db.instrumentation import instrument_engine
 
 Base = declarative_base()
 
-engine = create_async_engine(
-    str(settings.database_url_async),
-    future=True,
-)
+# движок создаётся в lifespan приложения (или лениво при первой сессии),
+# а не при импорте модуля
+engine: Optional[AsyncEngine] = None
 
-async_session = async_sessionmaker(
-    bind=engine, class_=AsyncSession, expire_on_commit=False
-)
+async_session = async_sessionmaker(class_=AsyncSession, expire_on_commit=False)
+
+
+def init_engine(url: Optional[str] = None) -> AsyncEngine:
+    global engine
+    if engine is None:
+        engine_url = make_url(url or settings.database_url_async)
+        if engine_url.get_driver_name() == "asyncpg":
+            engine_url = engine_url.update_query_dict(
+                {
+                    "prepared_statement_cache_size": str(
+                        settings.DB_PREPARED_STATEMENT_CACHE_SIZE
+                    )
+                }
+            )
+        engine = create_async_engine(
+            engine_url,
+            future=True,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            query_cache_size=settings.DB_COMPILED_CACHE_SIZE,
+        )
+        instrument_engine(engine)
+        async_session.configure(bind=engine)
+    return engine
+
+
+def reset_after_fork() -> None:
+    """Отвязывает воркер от пула, созданного в мастере до fork.
+
+    Соединения мастера не закрываются (они общие с ним и другими воркерами),
+    а просто забываются: воркер откроет свои.
+    """
+    if engine is not None:
+        engine.sync_engine.dispose(close=False)
+
+
+async def dispose_engine() -> None:
+    global engine
+    if engine is not None:
+        await engine.dispose()
+        engine = None
 
 
 async def get_session() -> AsyncSession:
+    if engine is None:
+        init_engine()
     async with async_session() as session:
         try:
             yield session
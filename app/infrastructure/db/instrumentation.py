@@ -0,0 +1,160 @@
+import logging
+import re
+from contextvars import ContextVar, Token
+from functools import lru_cache
+from time import perf_counter
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_POSITIONAL_PARAM = re.compile(r"\$\d+|%\(\w+\)s|(?<!:):\w+")
+_PARAM_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class RepeatedQueryError(RuntimeError):
+    """Один и тот же запрос выполнен в рамках HTTP-запроса больше N раз."""
+
+
+class QueryStats:
+    """Счётчики SQL-запросов, выполненных в рамках одного HTTP-запроса."""
+
+    __slots__ = ("count", "duration", "fingerprints")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = {}
+
+    def repeated(self, threshold: int) -> dict[str, int]:
+        return {
+            fingerprint: count
+            for fingerprint, count in self.fingerprints.items()
+            if count > threshold
+        }
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "query_stats", default=None
+)
+
+
+def begin_query_stats() -> Token:
+    return _query_stats.set(QueryStats())
+
+
+def end_query_stats(token: Token) -> QueryStats:
+    stats = _query_stats.get()
+    _query_stats.reset(token)
+    return stats
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _query_stats.get()
+
+
+@lru_cache(maxsize=1024)
+def fingerprint(statement: str) -> str:
+    """Нормализует SQL: литералы и плейсхолдеры заменяются на `?`.
+
+    Скомпилированные SQLAlchemy выражения повторяются буквально,
+    поэтому результат кешируется по исходной строке.
+    """
+    normalized = _STRING_LITERAL.sub("?", statement)
+    normalized = _POSITIONAL_PARAM.sub("?", normalized)
+    normalized = _NUMBER_LITERAL.sub("?", normalized)
+    normalized = _PARAM_LIST.sub("(?)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def parameter_shape(parameters, executemany: bool = False) -> str:
+    """Описывает параметры запроса типами, не раскрывая значений."""
+    if executemany:
+        size = len(parameters)
+        sample = parameter_shape(parameters[0]) if size else "()"
+        return f"[{size} x {sample}]"
+    if isinstance(parameters, dict):
+        items = ", ".join(
+            f"{key}: {type(value).__name__}" for key, value in parameters.items()
+        )
+        return f"{{{items}}}"
+    if isinstance(parameters, (tuple, list)):
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+def _before_cursor_execute(
+    conn, cursor, statement, parameters, context, executemany
+):
+    conn.info.setdefault("query_start_time", []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = perf_counter() - conn.info["query_start_time"].pop()
+    record_query(statement, parameters, elapsed, executemany)
+
+
+def record_query(statement: str, parameters, elapsed: float, executemany=False):
+    """Учитывает выполненный запрос: лог медленных и статистика HTTP-запроса.
+
+    Вызывается событиями движка, а также путями, которые работают с
+    драйвером напрямую, в обход SQLAlchemy.
+    """
+    if elapsed * 1000 >= settings.DB_SLOW_QUERY_THRESHOLD_MS:
+        logger.warning(
+            "Slow query (%.1f ms): %s params=%s",
+            elapsed * 1000,
+            fingerprint(statement),
+            parameter_shape(parameters, executemany),
+        )
+
+    # greenlet SQLAlchemy наследует контекст вызывающей задачи,
+    # поэтому здесь виден объект статистики текущего запроса
+    stats = _query_stats.get()
+    if stats is None:
+        return
+    stats.count += 1
+    stats.duration += elapsed
+    key = fingerprint(statement)
+    repeats = stats.fingerprints.get(key, 0) + 1
+    stats.fingerprints[key] = repeats
+    if (
+        settings.DB_REPEATED_QUERY_STRICT
+        and repeats > settings.DB_REPEATED_QUERY_THRESHOLD
+    ):
+        raise RepeatedQueryError(
+            f"Query executed {repeats} times in one request: {key}"
+        )
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute не вызывается для упавших запросов;
+    # RepeatedQueryError бросается уже после него
+    if isinstance(exception_context.original_exception, RepeatedQueryError):
+        return
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start_time"):
+        conn.info["query_start_time"].pop()
+
+
+def report_repeated_queries(stats: QueryStats, route: str) -> None:
+    for key, repeats in stats.repeated(settings.DB_REPEATED_QUERY_THRESHOLD).items():
+        logger.warning(
+            "Possible N+1 on %s: query executed %d times: %s", route, repeats, key
+        )
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
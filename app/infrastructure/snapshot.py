@@ -0,0 +1,154 @@
+import fcntl
+import mmap
+import os
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import orjson
+
+# magic, версия, длина данных, время записи, crc32 данных
+_HEADER = struct.Struct("<8sQQdI")
+_MAGIC = b"MPSNAP01"
+
+
+class SnapshotError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    version: int
+    written_at: float
+    payload: Any
+
+
+class SnapshotSegment:
+    """Версионированный снимок в файле, общем для процессов одного хоста.
+
+    Запись идёт во временный файл, который атомарно подменяет предыдущий
+    (`os.replace`), под блокировкой `flock`, поэтому версии строго растут
+    и читатель никогда не видит частично записанный снимок. Читатель
+    отображает файл в память и разбирает данные прямо из отображения, без
+    промежуточной копии; новая версия определяется по inode файла, то
+    есть проверка без изменений стоит одного `stat`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._seen: Optional[tuple[int, int, int]] = None
+
+    def _open_lock(self) -> int:
+        return os.open(f"{self.path}.lock", os.O_RDWR | os.O_CREAT, 0o600)
+
+    def write(self, payload: Any, base_version: Optional[int] = None) -> Optional[int]:
+        """Записывает снимок и возвращает его версию.
+
+        С `base_version` запись условная: если с тех пор опубликована более
+        новая версия, снимок не пишется и возвращается None.
+        """
+        data = orjson.dumps(payload)
+        lock_fd = self._open_lock()
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            current = self._read_header()
+            if base_version is not None and current and current[0] > base_version:
+                return None
+            version = current[0] + 1 if current else 1
+            header = _HEADER.pack(
+                _MAGIC, version, len(data), time.time(), zlib.crc32(data)
+            )
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(header)
+                tmp.write(data)
+            os.replace(tmp_path, self.path)
+            # свой снимок читать незачем
+            self._seen = self._identity()
+        finally:
+            os.close(lock_fd)
+        return version
+
+    def _read_header(self) -> Optional[tuple]:
+        try:
+            with open(self.path, "rb") as segment:
+                raw = segment.read(_HEADER.size)
+        except FileNotFoundError:
+            return None
+        if len(raw) < _HEADER.size:
+            return None
+        magic, *fields = _HEADER.unpack(raw)
+        return tuple(fields) if magic == _MAGIC else None
+
+    def read_if_changed(self) -> Optional[Snapshot]:
+        """Новый снимок или None, если файла нет или он не менялся
+        с прошлого чтения. Повреждённый снимок — `SnapshotError`."""
+        try:
+            identity = self._identity()
+        except FileNotFoundError:
+            return None
+        if identity == self._seen:
+            return None
+        snapshot = self._read()
+        self._seen = identity
+        return snapshot
+
+    def _identity(self) -> tuple[int, int, int]:
+        stat = os.stat(self.path)
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _read(self) -> Snapshot:
+        with open(self.path, "rb") as segment:
+            size = os.fstat(segment.fileno()).st_size
+            if size < _HEADER.size:
+                raise SnapshotError(f"Snapshot {self.path} is truncated")
+            with mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                magic, version, length, written_at, checksum = _HEADER.unpack_from(
+                    mapped
+                )
+                if magic != _MAGIC or _HEADER.size + length > size:
+                    raise SnapshotError(f"Snapshot {self.path} is malformed")
+                with memoryview(mapped) as view:
+                    data = view[_HEADER.size:_HEADER.size + length]
+                    try:
+                        if zlib.crc32(data) != checksum:
+                            raise SnapshotError(
+                                f"Snapshot {self.path} checksum mismatch"
+                            )
+                        payload = orjson.loads(data)
+                    finally:
+                        data.release()
+        return Snapshot(version=version, written_at=written_at, payload=payload)
+
+
+class LeaderLock:
+    """Лидер среди процессов хоста: держатель эксклюзивного `flock`.
+
+    Блокировка берётся без ожидания и держится до конца процесса; ОС
+    снимает её при выходе или падении лидера, и следующая попытка другого
+    процесса делает лидером его.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def try_acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -1,15 +1,124 @@
-from fastapi import FastAPI
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST
 
 from app.api.v1.api import api_router
+from app.auth.role_cache import role_cache
 from app.core.config import settings
+from app.core.logger import setup_logging, shutdown_logging
+from app.core.metrics import render_metrics
+from app.infrastructure.cache.client import close_redis, init_redis
+from app.infrastructure.db.database import async_session, dispose_engine, init_engine
+from app.middleware.access_log import AccessLogMiddleware
+from app.middleware.admission import AdmissionControlMiddleware
+from app.middleware.metrics import PrometheusMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.request_id import RequestIdMiddleware
+from app.middleware.tracing import TracingMiddleware
+from app.services.background import BackgroundWorkers, run_periodically
+from app.services.config_snapshot import init_config_snapshot
+from app.services.login_history_writer import login_history_writer
+from app.services.token_cleanup import token_cleanup
+from app.services.warmup import warm_crypto, warm_pool
+
+logger = logging.getLogger(__name__)
+
+
+async def _reload_role_cache() -> None:
+    async with async_session() as session:
+        await role_cache.load(session)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Прогрев воркера до приёма трафика и освобождение ресурсов при остановке.
+
+    `/ready` отвечает 200 только после того, как пул соединений, кеш
+    prepared statements, роли и криптография прогреты.
+    """
+    app.state.ready = False
+    setup_logging()
+    engine = init_engine()
+    init_redis()
+    workers = BackgroundWorkers()
+    try:
+        await warm_pool(engine, settings.DB_POOL_WARMUP_CONNECTIONS)
+        config_snapshot = init_config_snapshot(engine)
+        if config_snapshot is not None:
+            await config_snapshot.sync()
+        else:
+            await _reload_role_cache()
+        await warm_crypto()
+
+        workers.start("login-history-writer", login_history_writer.run())
+        if config_snapshot is not None:
+            workers.start(
+                "config-snapshot-sync",
+                run_periodically(
+                    settings.CONFIG_SNAPSHOT_POLL_SECONDS, config_snapshot.sync
+                ),
+            )
+        else:
+            workers.start(
+                "role-cache-sync",
+                run_periodically(
+                    settings.ROLE_CACHE_REFRESH_SECONDS, _reload_role_cache
+                ),
+            )
+        if settings.TOKEN_CLEANUP_ENABLED:
+            workers.start(
+                "refresh-token-cleanup",
+                run_periodically(
+                    settings.TOKEN_CLEANUP_INTERVAL_SECONDS, token_cleanup.run_once
+                ),
+            )
+        app.state.ready = True
+        logger.info("Warmup finished, accepting traffic")
+        yield
+    finally:
+        app.state.ready = False
+        await workers.stop()
+        await dispose_engine()
+        await close_redis()
+        shutdown_logging()
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(
+        title='Moviepoisk Auth',
+        default_response_class=ORJSONResponse,
+        lifespan=lifespan,
+    )
+    app.state.ready = False
+
+    app.add_middleware(AdmissionControlMiddleware)
+    app.add_middleware(RateLimitMiddleware)
+    # внутри трассировки: в строку журнала попадает trace id
+    app.add_middleware(AccessLogMiddleware)
+    app.add_middleware(TracingMiddleware)
+    app.add_middleware(RequestIdMiddleware)
+    app.add_middleware(PrometheusMiddleware, routes=app.router.routes)
 
-app = FastAPI(title='Moviepoisk Auth')
+    @app.get("/", status_code=200)
+    def read_root():
+        return {"Hello": "World"}
 
+    @app.get("/health", include_in_schema=False)
+    def health():
+        return {"status": "ok"}
 
-@app.get("/", status_code=200)
-def read_root():
-    print(settings)
-    return {"Hello": "World"}
+    @app.get("/ready", include_in_schema=False)
+    def ready():
+        if not app.state.ready:
+            return ORJSONResponse(status_code=503, content={"status": "starting"})
+        return {"status": "ready"}
 
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
 
-app.include_router(api_router, prefix="/api/v1")
+    app.include_router(api_router, prefix="/api/v1")
+    return app
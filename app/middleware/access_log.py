@@ -0,0 +1,70 @@
+import logging
+import random
+from time import perf_counter
+from typing import Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.access")
+
+
+class AccessLogMiddleware:
+    """Журнал запросов с сэмплированием.
+
+    Ответы 5xx и запросы дольше `slow_ms` пишутся всегда, остальные — с
+    вероятностью `sample_ratio`: полный журнал под нагрузкой стоит больше,
+    чем даёт, а счётчики по всем запросам есть в метриках.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        sample_ratio: Optional[float] = None,
+        slow_ms: Optional[float] = None,
+    ):
+        self.app = app
+        self.sample_ratio = (
+            settings.LOG_ACCESS_SAMPLE_RATIO if sample_ratio is None else sample_ratio
+        )
+        self.slow_ms = settings.LOG_ACCESS_SLOW_MS if slow_ms is None else slow_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration_ms = (perf_counter() - start) * 1000
+            if (
+                status_code >= 500
+                or duration_ms >= self.slow_ms
+                or random.random() < self.sample_ratio
+            ):
+                logger.info(
+                    "%s %s %d %.1fms",
+                    scope["method"],
+                    scope["path"],
+                    status_code,
+                    duration_ms,
+                    extra={
+                        "http": {
+                            "method": scope["method"],
+                            "path": scope["path"],
+                            "status": status_code,
+                            "duration_ms": round(duration_ms, 3),
+                        }
+                    },
+                )
@@ -0,0 +1,157 @@
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.metrics import ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTED
+
+
+@dataclass(frozen=True)
+class RouteClass:
+    name: str
+    priority: int
+    concurrency: int
+    max_queue: int
+    max_wait: float
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class AdmissionController:
+    """Ограничивает параллельность по классам маршрутов с приоритетами.
+
+    Внутри класса очередь FIFO. Освободившийся слот получает первый
+    ожидающий из класса с наименьшим priority, у которого не исчерпан
+    собственный лимит, — поэтому всплеск регистраций (дорогой RSA keygen)
+    не вытесняет проверку токенов.
+    """
+
+    def __init__(self, max_concurrency: int, route_classes: list[RouteClass]):
+        self.max_concurrency = max_concurrency
+        self.route_classes = sorted(route_classes, key=lambda item: item.priority)
+        self._active_total = 0
+        self._active = {item.name: 0 for item in route_classes}
+        self._queues: dict[str, deque] = {item.name: deque() for item in route_classes}
+
+    def _has_capacity(self, route_class: RouteClass) -> bool:
+        return (
+            self._active_total < self.max_concurrency
+            and self._active[route_class.name] < route_class.concurrency
+        )
+
+    def _admit(self, route_class: RouteClass) -> None:
+        self._active_total += 1
+        self._active[route_class.name] += 1
+
+    async def acquire(self, route_class: RouteClass) -> None:
+        queue = self._queues[route_class.name]
+        # после каждого release ожидающие с доступным слотом уже допущены,
+        # поэтому непустая очередь класса означает, что слота для него нет
+        if not queue and self._has_capacity(route_class):
+            self._admit(route_class)
+            return
+        if len(queue) >= route_class.max_queue:
+            raise AdmissionRejected("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        ADMISSION_QUEUE_DEPTH.labels(route_class.name).inc()
+        try:
+            await asyncio.wait_for(waiter, route_class.max_wait)
+        except BaseException as exc:
+            if waiter.done() and not waiter.cancelled():
+                # слот выдан, но запрос отменён (клиент отключился) — вернуть
+                self.release(route_class)
+            else:
+                try:
+                    queue.remove(waiter)
+                except ValueError:
+                    pass
+            if isinstance(exc, asyncio.TimeoutError):
+                raise AdmissionRejected("timeout")
+            raise
+        finally:
+            ADMISSION_QUEUE_DEPTH.labels(route_class.name).dec()
+
+    def release(self, route_class: RouteClass) -> None:
+        self._active_total -= 1
+        self._active[route_class.name] -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        for route_class in self.route_classes:
+            queue = self._queues[route_class.name]
+            while queue and self._has_capacity(route_class):
+                waiter = queue.popleft()
+                if waiter.done():
+                    continue
+                self._admit(route_class)
+                waiter.set_result(None)
+            if self._active_total >= self.max_concurrency:
+                return
+
+
+def route_classes_from_settings() -> list[RouteClass]:
+    return [
+        RouteClass(
+            name=name,
+            priority=int(limits["priority"]),
+            concurrency=int(limits["concurrency"]),
+            max_queue=int(limits["max_queue"]),
+            max_wait=float(limits["max_wait"]),
+        )
+        for name, limits in settings.ADMISSION_CLASS_LIMITS.items()
+    ]
+
+
+class AdmissionControlMiddleware:
+    """Отвечает 503 с `Retry-After`, когда класс маршрута перегружен.
+
+    Маршруты без класса в `ADMISSION_ROUTE_CLASSES` не ограничиваются.
+    """
+
+    def __init__(
+        self, app: ASGIApp, controller: Optional[AdmissionController] = None
+    ):
+        self.app = app
+        self.controller = controller or AdmissionController(
+            settings.ADMISSION_MAX_CONCURRENCY, route_classes_from_settings()
+        )
+        by_name = {item.name: item for item in self.controller.route_classes}
+        self.routes = {
+            path: by_name[name]
+            for path, name in settings.ADMISSION_ROUTE_CLASSES.items()
+        }
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.ADMISSION_CONTROL_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        route_class = self.routes.get(scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.controller.acquire(route_class)
+        except AdmissionRejected as exc:
+            ADMISSION_REJECTED.labels(route_class.name, exc.reason).inc()
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Service overloaded, retry later"},
+                headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(route_class)
@@ -0,0 +1,112 @@
+from time import perf_counter
+
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import (
+    DB_QUERIES_PER_REQUEST,
+    DB_QUERY_TIME_PER_REQUEST,
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS_IN_PROGRESS,
+    HTTP_RESPONSES,
+)
+from app.infrastructure.db.instrumentation import (
+    begin_query_stats,
+    end_query_stats,
+    report_repeated_queries,
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class _RouteSeries:
+    """Заранее разрешённые дочерние метрики для пары (method, route).
+
+    `labels()` стоит несколько микросекунд на каждый вызов, поэтому
+    серии создаются один раз и переиспользуются.
+    """
+
+    __slots__ = (
+        "in_progress", "duration", "db_queries", "db_time", "responses", "labels"
+    )
+
+    def __init__(self, method: str, route: str):
+        self.labels = (method, route)
+        self.in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method, route)
+        self.duration = HTTP_REQUEST_DURATION.labels(method, route)
+        self.db_queries = DB_QUERIES_PER_REQUEST.labels(route)
+        self.db_time = DB_QUERY_TIME_PER_REQUEST.labels(route)
+        self.responses = {}
+
+    def response_counter(self, status_code: int):
+        counter = self.responses.get(status_code)
+        if counter is None:
+            counter = HTTP_RESPONSES.labels(*self.labels, str(status_code))
+            self.responses[status_code] = counter
+        return counter
+
+
+class PrometheusMiddleware:
+    """ASGI middleware с метриками латентности, in-flight и статусов по маршрутам.
+
+    Метка маршрута — шаблон пути роутера, а не сырой путь, чтобы
+    кардинальность не зависела от входящего трафика.
+    """
+
+    def __init__(self, app: ASGIApp, routes: list):
+        self.app = app
+        self.routes = routes
+        self._static_routes = None
+        self._series = {}
+
+    def _resolve_route(self, scope: Scope) -> str:
+        if self._static_routes is None:
+            # маршруты подключаются после создания middleware,
+            # поэтому индекс строится при первом запросе
+            self._static_routes = {
+                route.path: route.path
+                for route in self.routes
+                if "{" not in getattr(route, "path", "{")
+            }
+        route = self._static_routes.get(scope["path"])
+        if route is not None:
+            return route
+        for candidate in self.routes:
+            match, _ = candidate.matches(scope)
+            if match is Match.FULL:
+                return candidate.path
+        return UNMATCHED_ROUTE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self._resolve_route(scope)
+        key = (method, route)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _RouteSeries(*key)
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats_token = begin_query_stats()
+        series.in_progress.inc()
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            series.duration.observe(perf_counter() - start)
+            series.in_progress.dec()
+            series.response_counter(status_code).inc()
+            stats = end_query_stats(stats_token)
+            series.db_queries.observe(stats.count)
+            series.db_time.observe(stats.duration)
+            report_repeated_queries(stats, route)
@@ -0,0 +1,181 @@
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import settings
+from app.infrastructure.cache.client import init_redis
+
+logger = logging.getLogger(__name__)
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    capacity: int
+    refill_per_second: float
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateLimit":
+        """Разбирает лимит вида "10/minute": ёмкость 10, пополнение 10 в минуту."""
+        amount, _, period = spec.partition("/")
+        if period not in _PERIODS:
+            raise ValueError(f"Invalid rate limit: {spec!r}")
+        capacity = int(amount)
+        return cls(capacity=capacity, refill_per_second=capacity / _PERIODS[period])
+
+    @property
+    def ttl_seconds(self) -> float:
+        # за это время пустой bucket заполняется целиком и его можно забыть
+        return self.capacity / self.refill_per_second
+
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    async def acquire(self, key: str, limit: RateLimit) -> float:
+        """Списывает токен; возвращает 0 или через сколько секунд повторить."""
+        pass
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Token bucket в памяти процесса — лимиты действуют на каждый воркер отдельно.
+
+    Не больше `max_keys` bucket'ов; при переполнении вытесняются дольше
+    всех простаивавшие (LRU), активные клиенты своё состояние не теряют.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        # key -> (tokens, updated_at), порядок — давность обращения
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._max_keys = max_keys
+
+    async def acquire(self, key: str, limit: RateLimit) -> float:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (limit.capacity, now))
+        tokens = min(
+            limit.capacity, tokens + (now - updated_at) * limit.refill_per_second
+        )
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / limit.refill_per_second
+        if key not in self._buckets and len(self._buckets) >= self._max_keys:
+            self._buckets.popitem(last=False)
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        return retry_after
+
+
+_TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local ttl_ms = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], ttl_ms)
+return tostring(retry_after)
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Token bucket в Redis: лимиты общие для всех воркеров и реплик.
+
+    Пополнение и списание выполняются одним Lua-скриптом, атомарно.
+    """
+
+    def __init__(self, redis: Redis):
+        self._script = redis.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    async def acquire(self, key: str, limit: RateLimit) -> float:
+        retry_after = await self._script(
+            keys=[key],
+            args=[
+                limit.capacity,
+                limit.refill_per_second,
+                time.time(),
+                math.ceil(limit.ttl_seconds * 1000),
+            ],
+        )
+        return float(retry_after)
+
+
+def build_rate_limit_backend() -> RateLimitBackend:
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimitBackend(init_redis())
+    return InMemoryRateLimitBackend()
+
+
+def client_ip(scope: Scope, trust_forwarded_for: bool) -> str:
+    if trust_forwarded_for:
+        for name, value in scope["headers"]:
+            if name == b"x-forwarded-for":
+                return value.decode("latin-1").rsplit(",", 1)[-1].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+class RateLimitMiddleware:
+    """Ограничивает частоту запросов к маршрутам из `RATE_LIMITS` по IP клиента.
+
+    При превышении отвечает 429 с `Retry-After`. Если Redis недоступен,
+    запрос пропускается: лимитер не должен ронять аутентификацию.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        backend: Optional[RateLimitBackend] = None,
+        limits: Optional[dict[str, str]] = None,
+    ):
+        self.app = app
+        self.backend = backend or build_rate_limit_backend()
+        if limits is None:
+            limits = settings.RATE_LIMITS
+        self.limits = {path: RateLimit.parse(spec) for path, spec in limits.items()}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
+        limit = self.limits.get(path)
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        ip = client_ip(scope, settings.RATE_LIMIT_TRUST_FORWARDED_FOR)
+        try:
+            retry_after = await self.backend.acquire(f"rate_limit:{path}:{ip}", limit)
+        except RedisError:
+            logger.warning("Rate limit backend unavailable, request allowed")
+            retry_after = 0.0
+
+        if retry_after > 0:
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests"},
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -0,0 +1,52 @@
+import re
+from uuid import uuid4
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.logger import bind_request_id, reset_request_id
+
+# входящий идентификатор принимается, только если он не может испортить
+# строку лога или заголовок ответа
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+class RequestIdMiddleware:
+    """Идентификатор запроса для логов, спанов и ответа.
+
+    Берётся из входящего заголовка (его проставляет nginx или вызывающий
+    сервис) или генерируется, доступен через `current_request_id()` и
+    возвращается в том же заголовке ответа.
+    """
+
+    def __init__(self, app: ASGIApp, header: str = settings.REQUEST_ID_HEADER):
+        self.app = app
+        self.header = header.lower().encode("latin-1")
+
+    def _incoming(self, scope: Scope) -> str:
+        for name, value in scope["headers"]:
+            if name == self.header:
+                request_id = value.decode("latin-1")
+                if _VALID_REQUEST_ID.match(request_id):
+                    return request_id
+                break
+        return uuid4().hex
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = self._incoming(scope)
+        header = (self.header, request_id.encode("latin-1"))
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), header]
+            await send(message)
+
+        token = bind_request_id(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            reset_request_id(token)
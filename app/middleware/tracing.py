@@ -0,0 +1,45 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.logger import current_request_id
+from app.core.tracing import tracer
+
+
+class TracingMiddleware:
+    """Открывает корневой спан на HTTP-запрос, продолжая входящий `traceparent`.
+
+    Request id запроса сохраняется в атрибутах спана, trace id — в строках
+    лога, так что спаны и логи одного запроса связываются в обе стороны.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for name, value in scope["headers"]:
+            if name == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+
+        with tracer.start_trace(
+            f"{scope['method']} {scope['path']}",
+            traceparent=traceparent,
+            **{"request.id": current_request_id()},
+        ) as span:
+            if span is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
+            route = scope.get("route")
+            if route is not None:
+                span.name = f"{scope['method']} {route.path}"
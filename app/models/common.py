@@ -1,12 +1,12 @@
 import orjson
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
-def orjson_dumps(v, *, default):
+def orjson_dumps(v, *, default=None):
     return orjson.dumps(v, default=default).decode()
 
 
 class BaseOrjsonModel(BaseModel):
-    class Config:
-        json_loads = orjson.loads
-        json_dumps = orjson_dumps
+    # pydantic v2 не использует json_loads/json_dumps из конфига: модели
+    # сериализуются в pydantic-core, ответы без модели — через ORJSONResponse
+    model_config = ConfigDict(from_attributes=True)
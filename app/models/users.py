@@ -7,16 +7,18 @@ from sqlalchemy import (
     DateTime,
     ForeignKey,
     Index,
+    Integer,
     LargeBinary,
     MetaData,
+    SmallInteger,
     String,
     Text,
+    func,
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
-
 Base = declarative_base()
 
 
@@ -26,6 +28,10 @@ class RoleDbModel(Base):
     name = Column(String(255), nullable=False, unique=True)
     description = Column(String(255), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # роль-родитель стоит выше в иерархии; пути иерархии — в role_closure
+    parent_id = Column(
+        UUID(as_uuid=True), ForeignKey("roles.id", ondelete="SET NULL"), nullable=True
+    )
 
     def to_dict(self):
         return {
@@ -88,7 +94,10 @@ class LoginHistoryDbModel(Base):
 class RefreshTokenDbModel(Base):
     __tablename__ = "refresh_tokens"
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    token = Column(Text, nullable=False, unique=True)  # Сам refresh токен
+    # SHA-256 от refresh токена: 32 байта вместо JWT в индексе и таблице
+    token_hash = Column(LargeBinary, nullable=False)
+    # все токены одной цепочки ротации, начиная со входа
+    family_id = Column(UUID(as_uuid=True), nullable=False)
     user_id = Column(UUID(as_uuid=True), ForeignKey(
         "users.id"), nullable=False)
     expires_at = Column(
@@ -102,7 +111,8 @@ class RefreshTokenDbModel(Base):
     def to_dict(self):
         return {
             "id": str(self.id),
-            "token": self.token,
+            "token_hash": self.token_hash.hex(),
+            "family_id": str(self.family_id),
             "user_id": str(self.user_id),
             "expires_at": self.expires_at.isoformat(),
             "created_at": self.created_at.isoformat(),
@@ -138,6 +148,60 @@ class EncryptionKeysModel(Base):
         }
 
 
+class PermissionDbModel(Base):
+    __tablename__ = "permissions"
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    code = Column(String(100), nullable=False, unique=True)
+    # номер бита права в маске роли; не меняется после выдачи, иначе маски
+    # разойдутся между версиями приложения
+    bit = Column(SmallInteger, nullable=False, unique=True)
+    description = Column(String(255), nullable=False)
+
+    def to_dict(self):
+        return {
+            "id": str(self.id),
+            "code": self.code,
+            "bit": self.bit,
+            "description": self.description,
+        }
+
+
+class RolePermissionDbModel(Base):
+    __tablename__ = "role_permissions"
+    role_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("roles.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    permission_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("permissions.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+
+class RoleClosureDbModel(Base):
+    """Транзитивное замыкание иерархии ролей: строка на каждую пару
+    (предок, потомок), включая (роль, роль) с depth 0."""
+
+    __tablename__ = "role_closure"
+    ancestor_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("roles.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    descendant_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("roles.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    depth = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_role_closure_descendant_id", "descendant_id", "ancestor_id"),
+    )
+
+
 # Back-populates fields
 RoleDbModel.users = relationship(
     "UsersDbModel", order_by=UsersDbModel.id, back_populates="role"
@@ -156,9 +220,24 @@ UsersDbModel.encryption_keys = relationship(
     back_populates="user",
 )
 
-# Indexes
-Index("idx_email", UsersDbModel.email)
-Index("idx_login", UsersDbModel.login)
+# Indexes: регистронезависимая уникальность и поиск по email/логину
+Index("ux_users_email_lower", func.lower(UsersDbModel.email), unique=True)
+Index("ux_users_login_lower", func.lower(UsersDbModel.login), unique=True)
+Index(
+    "ux_refresh_tokens_token_hash", RefreshTokenDbModel.token_hash, unique=True
+)
+# частичные индексы только по действующим токенам: отзыв при выходе
+# и отзыв семейства при повторном использовании
+Index(
+    "ix_refresh_tokens_active_user_id",
+    RefreshTokenDbModel.user_id,
+    postgresql_where=RefreshTokenDbModel.revoked.is_(False),
+)
+Index(
+    "ix_refresh_tokens_active_family_id",
+    RefreshTokenDbModel.family_id,
+    postgresql_where=RefreshTokenDbModel.revoked.is_(False),
+)
 
 
 def combined_metadata():
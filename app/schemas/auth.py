@@ -2,7 +2,10 @@ from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from app.core.config import settings
+from app.models.common import BaseOrjsonModel
 
 
 class TokenBase(BaseModel):
@@ -23,18 +26,37 @@ class Tokens(AcessToken, RefreshToken):
 
 class AccessTokenData(BaseModel):
     login: Optional[str] = None
+    role_id: Optional[UUID] = None
 
 
 class RefreshTokenData(BaseModel):
     login: Optional[str] = None
 
 
-class RefreshTokenDb(BaseModel):
+class TokenIntrospectRequest(BaseModel):
+    tokens: list[str] = Field(
+        min_length=1, max_length=settings.TOKEN_INTROSPECT_MAX_TOKENS
+    )
+
+
+class TokenIntrospection(BaseModel):
+    active: bool
+    # подпись верна, но владельца токена больше нет; выход отзывает только
+    # refresh токены и на этот флаг не влияет
+    revoked: bool
+    sub: Optional[str]
+    user_id: Optional[UUID]
+    role_id: Optional[UUID]
+    exp: Optional[int]
+
+
+class TokenIntrospectResponse(BaseModel):
+    results: list[TokenIntrospection]
+
+
+class RefreshTokenDb(BaseOrjsonModel):
     id: UUID
-    token: str
+    family_id: UUID
     user_id: UUID
     expires_at: datetime
     revoked: bool
-
-    class Config:
-        from_attributes = True
@@ -1,10 +1,12 @@
 from datetime import datetime
 from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import ConfigDict, Field, TypeAdapter
 
+from app.models.common import BaseOrjsonModel
 
-class LoginHistoryGet(BaseModel):
+
+class LoginHistoryGet(BaseOrjsonModel):
     id: UUID | None = Field(
         default=None, description="Уникальный идентификатор истории входа"
     )
@@ -14,9 +16,8 @@ class LoginHistoryGet(BaseModel):
         default=None, description="Дата и время создания записи"
     )
 
-    class Config:
-        from_attributes = True
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "user_id": "d550a0d2-23d2-4a68-bd1f-3b6e7b1e55e1",
                 "ip": "192.168.1.1",
@@ -25,3 +26,7 @@ class LoginHistoryGet(BaseModel):
                 + " (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3",
             }
         }
+    )
+
+
+LOGIN_HISTORY_LIST_ADAPTER = TypeAdapter(list[LoginHistoryGet])
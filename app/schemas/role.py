@@ -1,7 +1,11 @@
 from datetime import datetime
+from typing import Optional
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
+
+from app.auth.permissions import Permission
+from app.models.common import BaseOrjsonModel
 
 
 class RoleBase(BaseModel):
@@ -10,16 +14,32 @@ class RoleBase(BaseModel):
 
 
 class RoleCreate(RoleBase):
-    pass
+    parent_id: Optional[UUID] = None
 
 
 class RoleUpdate(RoleBase):
     id: UUID
 
 
-class RoleGet(RoleBase):
+class RoleGet(RoleBase, BaseOrjsonModel):
     id: UUID
     created_at: datetime
+    parent_id: Optional[UUID] = None
+
+
+class RoleParentUpdate(BaseModel):
+    # None делает роль корнем иерархии
+    parent_id: Optional[UUID] = None
+
+
+class RolePermissionsUpdate(BaseModel):
+    permissions: list[Permission]
+
+
+class RolePermissions(BaseModel):
+    role_id: UUID
+    permissions: list[Permission]
+
 
-    class Config:
-        from_attributes = True
+# TypeAdapter строит валидатор и сериализатор один раз при импорте
+ROLE_LIST_ADAPTER = TypeAdapter(list[RoleGet])
@@ -1,6 +1,9 @@
+from typing import Optional
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
+
+from app.models.common import BaseOrjsonModel
 
 
 class UserLogin(BaseModel):
@@ -15,16 +18,26 @@ class UserCreate(BaseModel):
     last_name: str
     email: str
 
+    @field_validator("email")
+    @classmethod
+    def email_contains_at(cls, value: str) -> str:
+        # поиск по идентификатору отличает email от логина по "@"
+        if "@" not in value:
+            raise ValueError("email must contain '@'")
+        return value
+
 
-class UserGet(BaseModel):
+class UserGet(BaseOrjsonModel):
     id: UUID
     login: str
     first_name: str
     last_name: str
     email: str
-    
-    class Config:
-        from_attributes = True
+
+
+class UserAuthenticated(UserGet):
+    # роль нужна для claim `rid` выпускаемого access токена
+    role_id: Optional[UUID] = None
 
 
 class UserRoleUpdate(BaseModel):
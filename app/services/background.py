@@ -0,0 +1,39 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Coroutine
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundWorkers:
+    """Фоновые задачи процесса, живущие от старта до остановки приложения."""
+
+    def __init__(self):
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self, name: str, coro: Coroutine) -> None:
+        self._tasks.append(asyncio.create_task(coro, name=name))
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        for task, result in zip(
+            tasks, await asyncio.gather(*tasks, return_exceptions=True)
+        ):
+            if isinstance(result, Exception):
+                logger.error(
+                    "Background task %s failed", task.get_name(), exc_info=result
+                )
+
+
+async def run_periodically(
+    interval: float, func: Callable[[], Awaitable[None]]
+) -> None:
+    """Вызывает `func` каждые `interval` секунд; ошибка не останавливает цикл."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await func()
+        except Exception:
+            logger.exception("Periodic task %s failed", func.__qualname__)
@@ -0,0 +1,256 @@
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import tempfile
+import time
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.auth.role_cache import role_cache
+from app.core.config import settings
+from app.core.metrics import CONFIG_SNAPSHOT_LOADS
+from app.infrastructure.db.database import async_session
+from app.infrastructure.snapshot import (
+    LeaderLock,
+    Snapshot,
+    SnapshotError,
+    SnapshotSegment,
+)
+from app.schemas.role import ROLE_LIST_ADAPTER
+
+logger = logging.getLogger(__name__)
+
+JWT_ALGORITHM = "HS256"
+
+
+def _snapshot_directory() -> str:
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+def load_deployment_salt(path: str) -> bytes:
+    """Случайная соль развёртывания: создаёт первый воркер, читают все.
+
+    Файл доступен только пользователю сервиса, поэтому отпечатки ключа JWT,
+    вычисленные с солью, нельзя перебрать по словарю, даже видя имя файла
+    снимка в общем каталоге.
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as tmp:
+        tmp.write(secrets.token_bytes(32))
+    try:
+        # link не подменяет существующий файл: соль пишется один раз
+        os.link(tmp_path, path)
+    except FileExistsError:
+        pass
+    finally:
+        os.unlink(tmp_path)
+    with open(path, "rb") as salt_file:
+        return salt_file.read()
+
+
+def default_salt_path(engine: AsyncEngine) -> str:
+    # соль общая для развёртываний с одной базой; в имени нет ничего о ключе
+    database = engine.url.render_as_string(hide_password=True)
+    digest = hashlib.sha256(database.encode()).hexdigest()[:16]
+    return os.path.join(_snapshot_directory(), f"moviepoisk-auth-{digest}.salt")
+
+
+def _keyed_fingerprint(salt: bytes, value: str) -> str:
+    return hmac.new(salt, value.encode(), hashlib.sha256).hexdigest()[:16]
+
+
+def snapshot_scope(engine: AsyncEngine, salt: bytes) -> str:
+    # снимок годится только воркерам с той же базой и тем же ключом JWT
+    database = engine.url.render_as_string(hide_password=True)
+    return _keyed_fingerprint(salt, f"{database}|{settings.JWT_SECRET_KEY}")
+
+
+def jwt_key_id(salt: bytes) -> str:
+    return _keyed_fingerprint(salt, f"jwt|{settings.JWT_SECRET_KEY}")
+
+
+def default_snapshot_path(scope: str) -> str:
+    return os.path.join(_snapshot_directory(), f"moviepoisk-auth-{scope}.snapshot")
+
+
+class ConfigSnapshotSync:
+    """Кеш ролей воркеров хоста через общий снимок.
+
+    Лидер (держатель `LeaderLock`) раз в `refresh_interval` читает роли из
+    БД и публикует снимок, если он изменился; остальные воркеры при каждом
+    `sync()` проверяют версию снимка и подменяют кеш целиком. Лидер тоже
+    применяет снимки, опубликованные другими воркерами после изменения
+    ролей через API, и не перезаписывает их своей загрузкой из БД, если
+    она началась раньше публикации. Воркер, у
+    которого нет пригодного снимка (файла ещё нет, он повреждён или от
+    другой базы/ключа), читает роли из БД, как без снимка.
+
+    Вместе с ролями в снимке лежат номера битов прав, маски прав ролей
+    и пары предок-потомок иерархии ролей.
+    Кроме того, снимок содержит параметры проверки JWT — алгоритм и
+    отпечаток ключа (HMAC с солью развёртывания); снимок воркера с другим
+    ключом не применяется. Сам ключ в файл не пишется, он и так есть у
+    каждого воркера в настройках.
+    """
+
+    def __init__(
+        self,
+        segment: SnapshotSegment,
+        leader: LeaderLock,
+        scope: str,
+        key_id: str,
+        refresh_interval: float,
+    ):
+        self.segment = segment
+        self.leader = leader
+        self.scope = scope
+        self.key_id = key_id
+        self.refresh_interval = refresh_interval
+        self.version = 0
+        self._snapshot_valid = False
+        self._db_loaded_at: Optional[float] = None
+        self._published: Optional[dict] = None
+
+    def _jwt(self) -> dict:
+        return {"algorithm": JWT_ALGORITHM, "key_id": self.key_id}
+
+    def _payload(self) -> dict:
+        return {
+            "scope": self.scope,
+            "jwt": self._jwt(),
+            "roles": ROLE_LIST_ADAPTER.dump_python(role_cache.all(), mode="json"),
+            "permissions": role_cache.permission_bits(),
+            "role_permissions": {
+                str(role_id): mask
+                for role_id, mask in role_cache.role_masks().items()
+            },
+            "role_closure": [
+                [str(ancestor), str(descendant)]
+                for ancestor, descendant in role_cache.closure()
+            ],
+        }
+
+    def _db_due(self) -> bool:
+        return (
+            self._db_loaded_at is None
+            or time.monotonic() - self._db_loaded_at >= self.refresh_interval
+        )
+
+    async def _load_from_db(self) -> None:
+        async with async_session() as session:
+            await role_cache.load(session)
+        self._db_loaded_at = time.monotonic()
+        CONFIG_SNAPSHOT_LOADS.labels("db").inc()
+
+    def publish(self, base_version: Optional[int] = None) -> bool:
+        """Публикует текущий кеш ролей этого воркера, если он изменился.
+
+        False — с `base_version` уже опубликована более новая версия.
+        """
+        payload = self._payload()
+        if payload == self._published:
+            return True
+        version = self.segment.write(payload, base_version)
+        if version is None:
+            return False
+        self.version = version
+        self._published = payload
+        self._snapshot_valid = True
+        CONFIG_SNAPSHOT_LOADS.labels("published").inc()
+        return True
+
+    def _apply(self, snapshot: Snapshot) -> bool:
+        payload = snapshot.payload
+        if payload.get("scope") != self.scope:
+            logger.warning(
+                "Config snapshot v%d belongs to another deployment, ignored",
+                snapshot.version,
+            )
+            return False
+        if payload.get("jwt") != self._jwt():
+            logger.warning(
+                "Config snapshot v%d was published with another JWT key, ignored",
+                snapshot.version,
+            )
+            return False
+        if snapshot.version > self.version:
+            role_cache.replace(
+                ROLE_LIST_ADAPTER.validate_python(payload["roles"]),
+                payload.get("permissions", {}),
+                {
+                    UUID(role_id): mask
+                    for role_id, mask in payload.get("role_permissions", {}).items()
+                },
+                [
+                    (UUID(ancestor), UUID(descendant))
+                    for ancestor, descendant in payload.get("role_closure", [])
+                ],
+            )
+            self.version = snapshot.version
+            CONFIG_SNAPSHOT_LOADS.labels("snapshot").inc()
+        return True
+
+    def _read_segment(self) -> None:
+        try:
+            snapshot = self.segment.read_if_changed()
+        except SnapshotError as exc:
+            logger.warning("%s, roles are loaded from the database", exc)
+            self._snapshot_valid = False
+        else:
+            if snapshot is not None:
+                self._snapshot_valid = self._apply(snapshot)
+
+    async def sync(self) -> None:
+        """Шаг синхронизации: при старте воркера и периодически."""
+        self._read_segment()
+        if self.leader.try_acquire():
+            if self._db_due():
+                # пока роли читаются из БД, другой воркер может опубликовать
+                # изменение; тогда загрузка устарела и публиковать её нельзя.
+                # Чужой или повреждённый снимок перезаписывается безусловно
+                loaded_version = self.version
+                base_version = loaded_version if self._snapshot_valid else None
+                await self._load_from_db()
+                self._read_segment()
+                if self.version == loaded_version and not self.publish(
+                    base_version
+                ):
+                    self._read_segment()
+            return
+
+        if not self._snapshot_valid and self._db_due():
+            await self._load_from_db()
+
+
+config_snapshot: Optional[ConfigSnapshotSync] = None
+
+
+def init_config_snapshot(engine: AsyncEngine) -> Optional[ConfigSnapshotSync]:
+    global config_snapshot
+    if config_snapshot is None and settings.CONFIG_SNAPSHOT_ENABLED:
+        if settings.CONFIG_SNAPSHOT_PATH:
+            salt_path = f"{settings.CONFIG_SNAPSHOT_PATH}.salt"
+        else:
+            salt_path = default_salt_path(engine)
+        salt = load_deployment_salt(salt_path)
+        scope = snapshot_scope(engine, salt)
+        path = settings.CONFIG_SNAPSHOT_PATH or default_snapshot_path(scope)
+        config_snapshot = ConfigSnapshotSync(
+            segment=SnapshotSegment(path),
+            leader=LeaderLock(f"{path}.leader"),
+            scope=scope,
+            key_id=jwt_key_id(salt),
+            refresh_interval=settings.ROLE_CACHE_REFRESH_SECONDS,
+        )
+    return config_snapshot
+
+
+def publish_role_cache() -> None:
+    """Публикует кеш ролей сразу после изменения ролей через API воркера."""
+    if config_snapshot is not None:
+        config_snapshot.publish()
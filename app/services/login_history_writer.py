@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth.login_history_repository import LoginHistoryRepositoryFactory
+from app.core.config import settings
+from app.infrastructure.db.database import async_session
+from app.models.users import LoginHistoryDbModel
+
+logger = logging.getLogger(__name__)
+
+
+class LoginHistoryWriter:
+    """Пакетная запись истории входов вне пути запроса.
+
+    Пока фоновая задача запущена, `record` только кладёт строку в очередь,
+    а задача пишет накопленное одним INSERT раз в `flush_interval` секунд
+    или по достижении `batch_size`. Без задачи (CLI, скрипты) или при
+    переполненной очереди строка пишется сразу в сессию запроса.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: Optional[asyncio.Queue] = None
+
+    async def record(
+        self, db: AsyncSession, user_id: UUID, ip: str, user_agent: str
+    ) -> None:
+        if self._queue is not None:
+            row = {
+                "id": uuid.uuid4(),
+                "user_id": user_id,
+                "ip": ip,
+                "user_agent": user_agent,
+                "created_at": datetime.utcnow(),
+            }
+            try:
+                self._queue.put_nowait(row)
+                return
+            except asyncio.QueueFull:
+                logger.warning("Login history queue is full, writing inline")
+        login_history_repo = LoginHistoryRepositoryFactory(db).get_repository()
+        await login_history_repo.create_login_history(
+            user_id=user_id, ip=ip, user_agent=user_agent
+        )
+
+    async def run(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.batch_size * 100)
+        batch: list[dict] = []
+        try:
+            while True:
+                await self._collect(batch)
+                await self._write(batch)
+                batch = []
+        except asyncio.CancelledError:
+            # остановка воркера: дописать всё, что успели принять; id строк
+            # заданы заранее, а уже записанные при повторе прерванного
+            # INSERT пропускаются (ON CONFLICT DO NOTHING), не роняя пачку
+            queue, self._queue = self._queue, None
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            if batch:
+                await self._write(batch)
+            raise
+
+    async def _collect(self, batch: list[dict]) -> None:
+        batch.append(await self._queue.get())
+        try:
+            async with asyncio.timeout(self.flush_interval):
+                while len(batch) < self.batch_size:
+                    batch.append(await self._queue.get())
+        except TimeoutError:
+            pass
+
+    async def _write(self, rows: list[dict]) -> None:
+        try:
+            async with async_session() as session:
+                await session.execute(
+                    insert(LoginHistoryDbModel).on_conflict_do_nothing(
+                        index_elements=[LoginHistoryDbModel.id]
+                    ),
+                    rows,
+                )
+                await session.commit()
+        except Exception:
+            logger.exception("Failed to write %d login history rows", len(rows))
+
+
+login_history_writer = LoginHistoryWriter(
+    batch_size=settings.LOGIN_HISTORY_BATCH_SIZE,
+    flush_interval=settings.LOGIN_HISTORY_FLUSH_INTERVAL_SECONDS,
+)
@@ -0,0 +1,46 @@
+"""Полный пересчёт таблицы role_closure по `roles.parent_id`.
+
+Обычно замыкание меняется инкрементально вместе с ролями; пересчёт нужен
+после правки `roles` в обход API (ручной SQL, восстановление из бэкапа).
+Воркеры подхватят новое замыкание со следующим обновлением кеша ролей.
+
+    python -m app.services.role_closure
+"""
+import asyncio
+
+from app.auth.role_repository import RoleRepositoryFactory
+from app.infrastructure.db.database import async_session, dispose_engine, init_engine
+
+
+async def rebuild_role_closure() -> int:
+    init_engine()
+    async with async_session() as db:
+        role_repo = await RoleRepositoryFactory(db).get_repository()
+        return await role_repo.rebuild_role_closure()
+
+
+def build_cli():
+    # typer нужен только для ручного запуска, воркеры его не импортируют
+    import typer
+
+    cli = typer.Typer()
+
+    @cli.command()
+    def run():
+        """
+        Rebuild the role hierarchy closure table from roles.parent_id.
+        """
+
+        async def main() -> int:
+            try:
+                return await rebuild_role_closure()
+            finally:
+                await dispose_engine()
+
+        typer.echo(f"Role closure rebuilt: {asyncio.run(main())} rows")
+
+    return cli
+
+
+if __name__ == "__main__":
+    build_cli()()
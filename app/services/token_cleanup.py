@@ -0,0 +1,153 @@
+"""Очистка refresh_tokens от истёкших и отозванных токенов.
+
+Работает в lifespan каждого воркера, но выполняется одним из них: проход
+начинается только с взятым advisory lock. Можно запустить и вручную:
+
+    python -m app.services.token_cleanup
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import settings
+from app.core.metrics import (
+    TOKEN_CLEANUP_BATCH_DURATION,
+    TOKEN_CLEANUP_DELETED,
+    TOKEN_CLEANUP_RUNS,
+)
+from app.infrastructure.db.database import dispose_engine, init_engine
+
+logger = logging.getLogger(__name__)
+
+# Пачка выбирается по ctid без сортировки; строки, заблокированные
+# ротацией или соседним процессом, пропускаются, а не ждутся
+_DELETE_BATCH = text(
+    """
+    DELETE FROM refresh_tokens
+    WHERE ctid = ANY(ARRAY(
+        SELECT ctid FROM refresh_tokens
+        WHERE expires_at < :now
+           OR (revoked IS true AND created_at < :revoked_before)
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ))
+    """
+)
+_TRY_LOCK = text("SELECT pg_try_advisory_lock(:key)")
+_UNLOCK = text("SELECT pg_advisory_unlock(:key)")
+
+
+class RefreshTokenCleanup:
+    """Удаляет токены пачками по `batch_size` строк, с паузой между
+    пачками и не больше `max_batches` пачек за проход, чтобы не нагружать
+    базу и не держать долгие транзакции."""
+
+    def __init__(
+        self,
+        batch_size: int,
+        batch_pause: float,
+        max_batches: int,
+        revoked_retention: timedelta,
+        lock_key: int,
+    ):
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.max_batches = max_batches
+        self.revoked_retention = revoked_retention
+        self.lock_key = lock_key
+
+    async def run_once(self) -> int:
+        """Один проход; возвращает число удалённых строк (0, если проход
+        уже выполняет другой процесс)."""
+        engine = init_engine()
+        async with engine.connect() as conn:
+            locked = (await conn.execute(_TRY_LOCK, {"key": self.lock_key})).scalar()
+            await conn.commit()
+            if not locked:
+                TOKEN_CLEANUP_RUNS.labels("skipped").inc()
+                return 0
+            try:
+                deleted = await self._delete_batches(conn)
+            except Exception:
+                TOKEN_CLEANUP_RUNS.labels("error").inc()
+                raise
+            finally:
+                # блокировка сессионная: без явного снятия она уйдёт
+                # в пул вместе с соединением
+                await conn.rollback()
+                await conn.execute(_UNLOCK, {"key": self.lock_key})
+                await conn.commit()
+        TOKEN_CLEANUP_RUNS.labels("done").inc()
+        if deleted:
+            logger.info("Deleted %d expired or revoked refresh tokens", deleted)
+        return deleted
+
+    async def _delete_batches(self, conn: AsyncConnection) -> int:
+        deleted = 0
+        for batch in range(self.max_batches):
+            if batch:
+                await asyncio.sleep(self.batch_pause)
+            now = datetime.utcnow()
+            start = perf_counter()
+            result = await conn.execute(
+                _DELETE_BATCH,
+                {
+                    "now": now,
+                    "revoked_before": now - self.revoked_retention,
+                    "batch_size": self.batch_size,
+                },
+            )
+            await conn.commit()
+            TOKEN_CLEANUP_BATCH_DURATION.observe(perf_counter() - start)
+            TOKEN_CLEANUP_DELETED.inc(result.rowcount)
+            deleted += result.rowcount
+            if result.rowcount < self.batch_size:
+                break
+        return deleted
+
+
+token_cleanup = RefreshTokenCleanup(
+    batch_size=settings.TOKEN_CLEANUP_BATCH_SIZE,
+    batch_pause=settings.TOKEN_CLEANUP_BATCH_PAUSE_SECONDS,
+    max_batches=settings.TOKEN_CLEANUP_MAX_BATCHES,
+    revoked_retention=timedelta(
+        seconds=settings.TOKEN_CLEANUP_REVOKED_RETENTION_SECONDS
+    ),
+    lock_key=settings.TOKEN_CLEANUP_LOCK_KEY,
+)
+
+
+def build_cli():
+    # typer нужен только для ручного запуска, воркеры его не импортируют
+    import typer
+
+    cli = typer.Typer()
+
+    @cli.command()
+    def run(
+        max_batches: int = typer.Option(
+            settings.TOKEN_CLEANUP_MAX_BATCHES, help="Upper bound of delete batches."
+        ),
+    ):
+        """
+        Delete expired and revoked refresh tokens once.
+        """
+
+        async def main() -> int:
+            token_cleanup.max_batches = max_batches
+            try:
+                return await token_cleanup.run_once()
+            finally:
+                await dispose_engine()
+
+        typer.echo(f"Deleted {asyncio.run(main())} refresh tokens")
+
+    return cli
+
+
+if __name__ == "__main__":
+    build_cli()()
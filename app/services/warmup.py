@@ -0,0 +1,108 @@
+import asyncio
+import importlib
+import logging
+import uuid
+from contextlib import AsyncExitStack
+from datetime import timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from app.auth.encryption_facade import EncryptionFacade
+from app.auth.encryption_repository import KeyStorageRepositoryFactory
+from app.auth.encryption_strategy import get_session_key_async
+from app.auth.identifier_cache import unknown_identifiers
+from app.auth.role_repository import RoleRepositoryFactory
+from app.auth.token_repository import RefreshTokenRepositoryFactory
+from app.auth.token_strategy import AccessTokenStrategy
+from app.auth.user_repository import UserRepositoryFactory
+
+logger = logging.getLogger(__name__)
+
+# идентификатор, которого заведомо нет в таблицах
+_MISSING_ID = uuid.UUID(int=0)
+
+# модули, которые приложение импортирует лениво, при первой операции
+LAZY_MODULES = (
+    "Crypto.Cipher.AES",
+    "Crypto.Cipher.PKCS1_OAEP",
+    "Crypto.PublicKey.RSA",
+    "Crypto.Random",
+    "jose.jwt",
+)
+
+
+def import_lazy_modules() -> None:
+    """Импортирует ленивые зависимости заранее.
+
+    Вызывается в мастере gunicorn с `--preload` до fork: код модулей
+    загружается один раз и делится воркерами copy-on-write.
+    """
+    for name in LAZY_MODULES:
+        importlib.import_module(name)
+
+
+async def prime_statements(conn: AsyncConnection) -> None:
+    """Выполняет горячие запросы на соединении, ничего не находя.
+
+    asyncpg готовит statement и кеширует его на соединении, а SQLAlchemy
+    кеширует компиляцию, поэтому запросы идут через те же репозитории,
+    что и обработчики: первый реальный запрос попадает в оба кеша.
+    """
+    session = AsyncSession(bind=conn)
+    try:
+        user_repo = await UserRepositoryFactory(session).get_repository()
+        # оба варианта поиска: по логину и по email-или-логину
+        for identifier in ("", "@"):
+            await user_repo.get_user_by_email_or_login(identifier)
+            # иначе второй поиск ответит кеш промахов, а не БД
+            await unknown_identifiers.discard(identifier)
+            await user_repo.get_user_record_by_email_or_login(identifier)
+            await unknown_identifiers.discard(identifier)
+        await user_repo.get_user_by_id(_MISSING_ID)
+        keys_repo = await KeyStorageRepositoryFactory(session).get_repository()
+        await keys_repo.get_decryption_keys(_MISSING_ID)
+        token_repo = await RefreshTokenRepositoryFactory(session).get_repository()
+        await token_repo.get_refresh_token_by_user_id(_MISSING_ID)
+        # UPDATE ... RETURNING без совпадений; транзакция откатывается
+        await token_repo.rotate_refresh_token(b"")
+        role_repo = await RoleRepositoryFactory(session).get_repository()
+        await role_repo.get_role_by_id(_MISSING_ID)
+    finally:
+        await session.close()
+
+
+async def warm_pool(engine: AsyncEngine, connections: int) -> None:
+    """Открывает `connections` соединений пула и прогревает каждое.
+
+    Соединения удерживаются одновременно — иначе пул отдал бы одно и то же
+    соединение несколько раз — и после прогрева возвращаются в пул.
+    """
+    async with AsyncExitStack() as stack:
+        conns = [
+            await stack.enter_async_context(engine.connect())
+            for _ in range(connections)
+        ]
+
+        async def warm(conn: AsyncConnection) -> None:
+            await conn.execute(text("SELECT 1"))
+            await prime_statements(conn)
+            await conn.rollback()
+
+        await asyncio.gather(*(warm(conn) for conn in conns))
+    logger.info("Warmed %d database connections", connections)
+
+
+async def warm_crypto() -> None:
+    """Прогоняет AES и JWT один раз: ленивые импорты и потоки пула
+    криптографии создаются до первого пользовательского запроса."""
+    encryption_facade = EncryptionFacade()
+    session_key = await get_session_key_async()
+    encrypted = await encryption_facade.encrypt_data("warmup", session_key)
+    await encryption_facade.decrypt_data(encrypted, session_key)
+
+    token_strategy = AccessTokenStrategy()
+    token = await token_strategy.create_token(
+        data={"sub": "warmup"}, expires_delta=timedelta(minutes=1)
+    )
+    await token_strategy.verify_token(token)
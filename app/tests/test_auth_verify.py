@@ -0,0 +1,112 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from app.auth.token_strategy import RefreshTokenStrategy
+from app.core.config import settings
+from app.tests.conftest import new_user
+
+pytestmark = pytest.mark.anyio
+
+VERIFY_URL = "/api/v1/auth/verify"
+INTROSPECT_URL = "/api/v1/tokens/introspect"
+INTROSPECT_HEADERS = {"X-Introspect-Key": settings.TOKEN_INTROSPECT_CLIENT_KEYS[0]}
+
+
+@pytest.fixture
+async def tokens(client) -> dict:
+    user = new_user("verify_user")
+    response = await client.post("/api/v1/signup", json=user)
+    assert response.status_code == 200
+    response = await client.post(
+        "/api/v1/tokens",
+        data={"username": user["login"], "password": user["password"]},
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+async def test_access_token_accepted(client, tokens):
+    response = await client.get(
+        VERIFY_URL, headers={"Authorization": f"Bearer {tokens['access_token']}"}
+    )
+
+    assert response.status_code == 204
+    assert response.headers["X-User-Id"]
+
+
+async def test_refresh_token_rejected(client, tokens):
+    response = await client.get(
+        VERIFY_URL, headers={"Authorization": f"Bearer {tokens['refresh_token']}"}
+    )
+
+    assert response.status_code == 401
+    assert "X-User-Id" not in response.headers
+
+
+async def test_refresh_token_inactive_in_introspection(client, tokens):
+    response = await client.post(
+        INTROSPECT_URL,
+        headers=INTROSPECT_HEADERS,
+        json={"tokens": [tokens["refresh_token"], tokens["access_token"]]},
+    )
+
+    assert response.status_code == 200
+    assert [result["active"] for result in response.json()["results"]] == [
+        False,
+        True,
+    ]
+
+
+@pytest.mark.parametrize("headers", [{}, {"X-Introspect-Key": "wrong"}])
+async def test_introspection_requires_client_key(client, tokens, headers):
+    response = await client.post(
+        INTROSPECT_URL, headers=headers, json={"tokens": [tokens["access_token"]]}
+    )
+
+    assert response.status_code == 401
+
+
+async def test_logout_keeps_access_token_active(client, tokens):
+    # выход отзывает только refresh токены, `revoked` — владельца больше нет
+    await client.post(
+        "/api/v1/logout",
+        headers={"Authorization": f"Bearer {tokens['access_token']}"},
+    )
+
+    response = await client.post(
+        INTROSPECT_URL,
+        headers=INTROSPECT_HEADERS,
+        json={"tokens": [tokens["access_token"]]},
+    )
+
+    [result] = response.json()["results"]
+    assert result["active"] and not result["revoked"]
+
+
+def _untyped_token(login: str) -> str:
+    # так выглядели и access, и refresh токены до появления `typ`
+    expire = datetime.utcnow() + timedelta(minutes=5)
+    return jwt.encode(
+        {"sub": login, "exp": expire}, settings.JWT_SECRET_KEY, algorithm="HS256"
+    )
+
+
+async def test_untyped_token_rejected(client, tokens):
+    token = _untyped_token("verify_user")
+
+    verify = await client.get(
+        VERIFY_URL, headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert verify.status_code == 401
+    with pytest.raises(HTTPException):
+        await RefreshTokenStrategy().verify_token(token)
+
+
+async def test_missing_token_rejected(client):
+    response = await client.get(VERIFY_URL)
+
+    assert response.status_code == 401
@@ -0,0 +1,96 @@
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+
+from app.auth.role_cache import role_cache
+from app.infrastructure.snapshot import LeaderLock, SnapshotSegment
+from app.services.config_snapshot import JWT_ALGORITHM, ConfigSnapshotSync
+
+pytestmark = pytest.mark.anyio
+
+SCOPE = "test-scope"
+KEY_ID = "test-key"
+
+
+def _payload(role_name: str, key_id: str = KEY_ID) -> dict:
+    # снимок, который опубликовал бы другой воркер после изменения ролей
+    return {
+        "scope": SCOPE,
+        "jwt": {"algorithm": JWT_ALGORITHM, "key_id": key_id},
+        "roles": [
+            {
+                "id": str(uuid4()),
+                "name": role_name,
+                "description": role_name,
+                "created_at": datetime.utcnow().isoformat(),
+                "parent_id": None,
+            }
+        ],
+        "permissions": {},
+        "role_permissions": {},
+        "role_closure": [],
+    }
+
+
+@pytest.fixture
+def path(tmp_path) -> str:
+    return str(tmp_path / "roles.snapshot")
+
+
+def _worker(path: str) -> ConfigSnapshotSync:
+    return ConfigSnapshotSync(
+        segment=SnapshotSegment(path),
+        leader=LeaderLock(f"{path}.leader"),
+        scope=SCOPE,
+        key_id=KEY_ID,
+        refresh_interval=60,
+    )
+
+
+async def test_leader_applies_snapshot_published_by_another_worker(
+    sqlite_engine, path
+):
+    leader = _worker(path)
+    await leader.sync()
+    SnapshotSegment(path).write(_payload("editor"))
+
+    await leader.sync()
+
+    assert role_cache.get_by_name("editor") is not None
+
+
+async def test_leader_does_not_overwrite_newer_snapshot(
+    sqlite_engine, path, monkeypatch
+):
+    leader = _worker(path)
+    await leader.sync()
+    load_from_db = leader._load_from_db
+
+    async def load_while_another_worker_publishes():
+        SnapshotSegment(path).write(_payload("editor"))
+        await load_from_db()
+
+    monkeypatch.setattr(
+        leader, "_load_from_db", load_while_another_worker_publishes
+    )
+    leader._db_loaded_at = None
+
+    await leader.sync()
+
+    # устаревшая загрузка из БД не опубликована, применён снимок другого воркера
+    snapshot = SnapshotSegment(path).read_if_changed()
+    assert snapshot.payload["roles"][0]["name"] == "editor"
+    assert role_cache.get_by_name("editor") is not None
+
+
+async def test_snapshot_with_another_jwt_key_ignored(sqlite_engine, path):
+    # лидер — другой процесс, этот воркер только читает снимок
+    assert LeaderLock(f"{path}.leader").try_acquire()
+    SnapshotSegment(path).write(_payload("editor", key_id="other-key"))
+    follower = _worker(path)
+
+    await follower.sync()
+
+    assert follower.version == 0
+    assert role_cache.get_by_name("editor") is None
@@ -0,0 +1,30 @@
+import os
+import statistics
+
+import pytest
+
+from benchmarks.importtime import TARGET_MODULE, profile_import
+
+# тот же бюджет, что у `python -m benchmarks.importtime`
+IMPORT_BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", "2000"))
+RUNS = 3
+
+
+@pytest.fixture(scope="module")
+def profiles():
+    # первый прогон компилирует .pyc и в медиану не входит
+    profile_import()
+    return [profile_import() for _ in range(RUNS)]
+
+
+def test_lazy_dependencies_not_imported(profiles):
+    assert profiles[-1].forbidden() == []
+
+
+def test_import_time_within_budget(profiles):
+    median_ms = statistics.median(profile.total_us for profile in profiles) / 1000
+
+    assert median_ms <= IMPORT_BUDGET_MS, (
+        f"import {TARGET_MODULE}: {median_ms:.0f} ms, slowest modules: "
+        f"{profiles[-1].top(10)}"
+    )
@@ -0,0 +1,60 @@
+import pytest
+from sqlalchemy import bindparam, select
+
+from app.core.config import settings
+from app.infrastructure.db.database import async_session
+from app.infrastructure.db.instrumentation import (
+    RepeatedQueryError,
+    begin_query_stats,
+    end_query_stats,
+    fingerprint,
+)
+from app.models.users import UsersDbModel
+
+pytestmark = pytest.mark.anyio
+
+_SELECT_USER = select(UsersDbModel.id).where(UsersDbModel.login == bindparam("login"))
+
+
+def test_strict_mode_enabled_in_tests():
+    assert settings.DB_REPEATED_QUERY_STRICT
+
+
+def test_fingerprint_replaces_literals_and_placeholders():
+    assert fingerprint(
+        "SELECT id FROM users WHERE login = 'alice' AND age > 42 AND id IN (?, ?)"
+    ) == fingerprint(
+        "SELECT id FROM users  WHERE login = 'bob' AND age > 7 AND id IN (?)"
+    )
+    assert fingerprint("SELECT * FROM users WHERE id = $1") == (
+        "SELECT * FROM users WHERE id = ?"
+    )
+
+
+async def test_queries_counted_per_fingerprint(sqlite_engine):
+    token = begin_query_stats()
+    try:
+        async with async_session() as session:
+            for login in ("alice", "bob"):
+                await session.execute(_SELECT_USER, {"login": login})
+    finally:
+        stats = end_query_stats(token)
+    assert stats.count == 2
+    assert list(stats.fingerprints.values()) == [2]
+
+
+async def test_repeated_query_fails_in_strict_mode(sqlite_engine):
+    token = begin_query_stats()
+    try:
+        async with async_session() as session:
+            with pytest.raises(RepeatedQueryError):
+                for index in range(settings.DB_REPEATED_QUERY_THRESHOLD + 1):
+                    await session.execute(_SELECT_USER, {"login": f"user_{index}"})
+    finally:
+        end_query_stats(token)
+
+
+async def test_queries_outside_request_are_not_counted(sqlite_engine):
+    async with async_session() as session:
+        for index in range(settings.DB_REPEATED_QUERY_THRESHOLD + 1):
+            await session.execute(_SELECT_USER, {"login": f"user_{index}"})
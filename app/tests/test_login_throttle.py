@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy import delete, select
+
+from app.auth.login_throttle import InMemoryAttemptStore, login_throttle
+from app.infrastructure.db.database import async_session
+from app.models.users import EncryptionKeysModel, UsersDbModel
+from app.tests.conftest import new_user
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def store(monkeypatch) -> InMemoryAttemptStore:
+    store = InMemoryAttemptStore()
+    monkeypatch.setattr(login_throttle, "store", store)
+    return store
+
+
+@pytest.fixture
+async def user(client) -> dict:
+    user = new_user("throttled")
+    assert (await client.post("/api/v1/signup", json=user)).status_code == 200
+    async with async_session() as session:
+        user["id"] = await session.scalar(
+            select(UsersDbModel.id).where(UsersDbModel.login == user["login"])
+        )
+    return user
+
+
+async def _login(client, username: str, password: str):
+    return await client.post(
+        "/api/v1/tokens", data={"username": username, "password": password}
+    )
+
+
+async def _failures(store, subject: str) -> int:
+    failures, _ = await store.get(login_throttle._key(subject))
+    return failures
+
+
+async def test_login_and_email_share_failure_budget(client, store, user):
+    await _login(client, user["login"], "wrong-password")
+    await _login(client, user["email"].upper(), "wrong-password")
+
+    subject = login_throttle.subject(user["login"], user["id"])
+    assert await _failures(store, subject) == 2
+
+
+async def test_unknown_identifier_counted_separately(client, store, user):
+    await _login(client, "Nobody@example.com", "wrong-password")
+
+    assert await _failures(store, "identifier:nobody@example.com") == 1
+
+
+async def test_missing_keys_counted_as_failure(client, store, user):
+    async with async_session() as session:
+        await session.execute(
+            delete(EncryptionKeysModel).where(
+                EncryptionKeysModel.user_id == user["id"]
+            )
+        )
+        await session.commit()
+
+    response = await _login(client, user["login"], user["password"])
+
+    assert response.status_code == 401
+    subject = login_throttle.subject(user["login"], user["id"])
+    assert await _failures(store, subject) == 1
+
+
+async def test_success_resets_failures(client, store, user):
+    await _login(client, user["email"], "wrong-password")
+
+    response = await _login(client, user["login"], user["password"])
+
+    assert response.status_code == 200
+    subject = login_throttle.subject(user["login"], user["id"])
+    assert await _failures(store, subject) == 0
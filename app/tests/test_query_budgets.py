@@ -0,0 +1,30 @@
+import pytest
+
+from benchmarks.queries import BUDGETS, run_scenario
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_queries_per_endpoint_within_budget(client):
+    # запросы считают события движка (record_query) в рамках каждого
+    # HTTP-запроса; повтор одного запроса роняет его в strict-режиме
+    counts = await run_scenario(client)
+
+    over_budget = {
+        f"{BUDGETS[name].method} {BUDGETS[name].route}": (
+            count,
+            BUDGETS[name].max_queries,
+        )
+        for name, count in counts.items()
+        if count > BUDGETS[name].max_queries
+    }
+    assert not over_budget
+    assert counts.keys() == BUDGETS.keys()
+
+
+async def test_user_loaded_once_per_request(client):
+    counts = await run_scenario(client)
+
+    # токен проверяется без базы, пользователь загружается одним запросом
+    assert counts["user_me"] == 1
+    assert counts["introspect"] == 1
@@ -0,0 +1,15 @@
+import pytest
+
+from benchmarks.plans import PLAN_CHECKS, explain, populate_users, verify
+
+pytestmark = pytest.mark.anyio
+
+# столько строк, чтобы планировщик не предпочёл seq scan маленькой таблицы
+SEED_USERS = 20_000
+
+
+@pytest.mark.parametrize("check", PLAN_CHECKS, ids=lambda check: check.name)
+async def test_hot_query_uses_indexes(pg_engine, check):
+    await populate_users(pg_engine, SEED_USERS)
+
+    assert verify(check, await explain(pg_engine, check)) == []
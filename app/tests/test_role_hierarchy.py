@@ -0,0 +1,213 @@
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import delete, select
+
+from app.auth import role_helpers
+from app.auth.role_cache import RoleCache
+from app.auth.role_helpers import role_required
+from app.auth.role_hierarchy import (
+    RoleHierarchyError,
+    ancestors_or_self,
+    compute_closure,
+)
+from app.auth.role_repository import RoleRepository
+from app.infrastructure.db.database import async_session
+from app.models.users import RoleClosureDbModel, RoleDbModel
+from app.services.role_closure import rebuild_role_closure
+
+pytestmark = pytest.mark.anyio
+
+# super_admin > admin > user > {subscriber, guest}
+HIERARCHY = [
+    ("super_admin", None),
+    ("admin", "super_admin"),
+    ("user", "admin"),
+    ("subscriber", "user"),
+    ("guest", "user"),
+]
+
+
+def test_compute_closure_chain():
+    a, b, c = uuid4(), uuid4(), uuid4()
+
+    rows = compute_closure({a: None, b: a, c: b})
+
+    assert sorted(rows, key=str) == sorted(
+        [
+            (a, a, 0),
+            (b, b, 0),
+            (c, c, 0),
+            (a, b, 1),
+            (b, c, 1),
+            (a, c, 2),
+        ],
+        key=str,
+    )
+
+
+def test_compute_closure_forest():
+    a, b, c, d = uuid4(), uuid4(), uuid4(), uuid4()
+
+    rows = set(compute_closure({d: c, a: None, b: a, c: None}))
+
+    assert rows == {(a, a, 0), (b, b, 0), (c, c, 0), (d, d, 0), (a, b, 1), (c, d, 1)}
+
+
+def test_compute_closure_long_chain():
+    roles = [uuid4() for _ in range(500)]
+    parents = {role: parent for parent, role in zip([None] + roles, roles)}
+
+    rows = compute_closure(parents)
+
+    assert len(rows) == len(roles) * (len(roles) + 1) // 2
+    assert (roles[0], roles[-1], len(roles) - 1) in rows
+
+
+def test_compute_closure_rejects_cycle():
+    a, b, c = uuid4(), uuid4(), uuid4()
+
+    with pytest.raises(RoleHierarchyError):
+        compute_closure({a: c, b: a, c: b})
+
+
+def test_ancestors_or_self():
+    a, b, c = uuid4(), uuid4(), uuid4()
+
+    ancestors = ancestors_or_self([a, b, c], [(a, b), (a, c), (b, c)])
+
+    assert ancestors == {a: {a}, b: {a, b}, c: {a, b, c}}
+
+
+async def _closure_rows() -> set[tuple]:
+    async with async_session() as session:
+        result = await session.execute(
+            select(
+                RoleClosureDbModel.ancestor_id,
+                RoleClosureDbModel.descendant_id,
+                RoleClosureDbModel.depth,
+            )
+        )
+        return {tuple(row) for row in result}
+
+
+async def _expected_rows() -> set[tuple]:
+    async with async_session() as session:
+        result = await session.execute(select(RoleDbModel.id, RoleDbModel.parent_id))
+        return set(compute_closure(dict(result.all())))
+
+
+@pytest.fixture
+async def roles(sqlite_engine) -> dict:
+    ids = {}
+    async with async_session() as session:
+        repository = RoleRepository(session)
+        for name, parent in HIERARCHY:
+            role = await repository.create_role(
+                name, name, parent_id=ids.get(parent)
+            )
+            ids[name] = role.id
+    return ids
+
+
+async def test_create_role_attaches_to_parent(roles):
+    rows = await _closure_rows()
+
+    assert rows == await _expected_rows()
+    assert (roles["super_admin"], roles["guest"], 3) in rows
+
+
+async def test_set_role_parent_moves_subtree(roles):
+    async with async_session() as session:
+        await RoleRepository(session).set_role_parent(
+            roles["user"], roles["super_admin"]
+        )
+
+    rows = await _closure_rows()
+    assert rows == await _expected_rows()
+    assert (roles["admin"], roles["guest"], 2) not in rows
+    assert (roles["super_admin"], roles["guest"], 2) in rows
+
+
+async def test_set_role_parent_detaches_to_root(roles):
+    async with async_session() as session:
+        await RoleRepository(session).set_role_parent(roles["user"], None)
+
+    rows = await _closure_rows()
+    assert rows == await _expected_rows()
+    assert not any(
+        descendant == roles["subscriber"] and depth > 1
+        for _, descendant, depth in rows
+    )
+
+
+async def test_set_role_parent_rejects_cycle(roles):
+    async with async_session() as session:
+        with pytest.raises(RoleHierarchyError):
+            await RoleRepository(session).set_role_parent(
+                roles["admin"], roles["guest"]
+            )
+
+    assert await _closure_rows() == await _expected_rows()
+
+
+async def test_delete_role_relinks_children(roles):
+    async with async_session() as session:
+        assert await RoleRepository(session).delete_role(roles["user"])
+
+    rows = await _closure_rows()
+    assert rows == await _expected_rows()
+    assert (roles["admin"], roles["guest"], 1) in rows
+    assert (roles["super_admin"], roles["subscriber"], 2) in rows
+
+
+async def test_rebuild_role_closure_restores_table(roles):
+    expected = await _closure_rows()
+    async with async_session() as session:
+        await session.execute(delete(RoleClosureDbModel))
+        await session.commit()
+
+    assert await rebuild_role_closure() == len(expected)
+    assert await _closure_rows() == expected
+
+
+@pytest.fixture
+async def loaded_role_cache(roles, monkeypatch) -> RoleCache:
+    cache = RoleCache()
+    async with async_session() as session:
+        await cache.load(session)
+    monkeypatch.setattr(role_helpers, "role_cache", cache)
+    return cache
+
+
+def _identity(role_id):
+    async def user():
+        return SimpleNamespace(role_id=role_id)
+
+    return SimpleNamespace(user=user)
+
+
+@pytest.mark.parametrize(
+    "role, allowed",
+    [
+        ("super_admin", True),
+        ("admin", True),
+        ("user", False),
+        ("guest", False),
+        (None, False),
+    ],
+)
+async def test_role_required_admits_roles_above(
+    roles, loaded_role_cache, role, allowed
+):
+    checker = role_required(["admin"])
+    identity = _identity(roles.get(role))
+
+    if allowed:
+        await checker(identity)
+    else:
+        with pytest.raises(HTTPException) as error:
+            await checker(identity)
+        assert error.value.status_code == 403
@@ -0,0 +1,163 @@
+import os
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from alembic.script import ScriptDirectory
+from sqlalchemy import insert, select, text, update
+
+from app.auth.permissions import Permission
+from app.auth.role_helpers import set_user_role
+from app.auth.role_repository import RoleRepository
+from app.infrastructure.db.database import async_session
+from app.models.users import Base, PermissionDbModel, RoleDbModel, UsersDbModel
+from app.tests.conftest import new_user
+
+pytestmark = pytest.mark.anyio
+
+ROOT = os.path.join(os.path.dirname(__file__), "..", "..")
+PERMISSIONS_REVISION = "4c9e2d7a1b05"
+SUPER_ADMIN_REVISION = "e5a1c7d3f820"
+
+
+def _alembic_config() -> Config:
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "alembic"))
+    return config
+
+
+def _migration(revision: str):
+    script = ScriptDirectory.from_config(_alembic_config())
+    return script.get_revision(revision).module
+
+
+def _grant_super_admin(connection) -> None:
+    # схема SQLite строится из моделей, данные — теми же миграциями
+    permissions = _migration(PERMISSIONS_REVISION).PERMISSIONS
+    connection.execute(
+        insert(PermissionDbModel),
+        [
+            {"code": code, "bit": bit, "description": description}
+            for code, bit, description in permissions
+        ],
+    )
+    with Operations.context(MigrationContext.configure(connection)):
+        _migration(SUPER_ADMIN_REVISION).upgrade()
+
+
+def _alembic_upgrade_head(connection) -> None:
+    # на Postgres — настоящая цепочка миграций с пустой базы
+    Base.metadata.drop_all(connection)
+    connection.execute(text("DROP TABLE IF EXISTS alembic_version"))
+    config = _alembic_config()
+    config.attributes["connection"] = connection
+    command.upgrade(config, "head")
+
+
+@pytest.fixture
+async def migrated(engine):
+    if engine.dialect.name == "sqlite":
+        migrate = _grant_super_admin
+    else:
+        migrate = _alembic_upgrade_head
+    async with engine.begin() as conn:
+        await conn.run_sync(migrate)
+    return engine
+
+
+@pytest.fixture
+def app_engine(migrated):
+    return migrated
+
+
+@pytest.fixture
+async def super_admin_headers(migrated, client) -> dict:
+    user = new_user("root")
+    assert (await client.post("/api/v1/signup", json=user)).status_code == 200
+    async with async_session() as session:
+        role_id = await session.scalar(
+            select(RoleDbModel.id).where(RoleDbModel.name == "super_admin")
+        )
+        await session.execute(
+            update(UsersDbModel)
+            .where(UsersDbModel.login == user["login"])
+            .values(role_id=role_id)
+        )
+        await session.commit()
+    response = await client.post(
+        "/api/v1/tokens",
+        data={"username": user["login"], "password": user["password"]},
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def _role_id(name: str):
+    async with async_session() as session:
+        return await session.scalar(
+            select(RoleDbModel.id).where(RoleDbModel.name == name)
+        )
+
+
+async def test_super_admin_sets_role_permissions(client, super_admin_headers):
+    role_id = await _role_id("super_admin")
+
+    response = await client.put(
+        f"/api/v1/roles/{role_id}/permissions",
+        headers=super_admin_headers,
+        json={"permissions": [permission.value for permission in Permission]},
+    )
+
+    assert response.status_code == 200
+    assert set(response.json()["permissions"]) == {p.value for p in Permission}
+
+
+async def test_super_admin_sets_role_parent(client, super_admin_headers):
+    async with async_session() as session:
+        role = await RoleRepository(session).create_role("admin", "admin")
+
+    response = await client.put(
+        f"/api/v1/roles/{role.id}/parent",
+        headers=super_admin_headers,
+        json={"parent_id": str(await _role_id("super_admin"))},
+    )
+
+    assert response.status_code == 200
+
+
+async def test_user_without_role_denied(client, migrated):
+    user = new_user("plain")
+    await client.post("/api/v1/signup", json=user)
+    tokens = (
+        await client.post(
+            "/api/v1/tokens",
+            data={"username": user["login"], "password": user["password"]},
+        )
+    ).json()
+
+    response = await client.put(
+        f"/api/v1/roles/{await _role_id('super_admin')}/permissions",
+        headers={"Authorization": f"Bearer {tokens['access_token']}"},
+        json={"permissions": []},
+    )
+
+    assert response.status_code == 403
+
+
+async def test_demoted_user_denied_with_old_token(client, super_admin_headers):
+    async with async_session() as session:
+        role = await RoleRepository(session).create_role("user", "user")
+        user_id = await session.scalar(
+            select(UsersDbModel.id).where(UsersDbModel.login == "root")
+        )
+        await set_user_role(session, user_id, role.id)
+
+    # тот же access токен, в claim `rid` которого всё ещё super_admin
+    response = await client.put(
+        f"/api/v1/roles/{role.id}/parent",
+        headers=super_admin_headers,
+        json={"parent_id": None},
+    )
+
+    assert response.status_code == 403
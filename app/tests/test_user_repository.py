@@ -0,0 +1,129 @@
+import pytest
+from sqlalchemy import insert
+
+from app.auth.user_repository import UserRecord, UserRepository
+from app.core.config import settings
+from app.infrastructure.db.database import async_session
+from app.models.users import RoleDbModel, UsersDbModel
+
+pytestmark = pytest.mark.anyio
+
+# запись пользователя на SQLite читается через SQLAlchemy Core, на
+# Postgres — напрямую через asyncpg fetchrow; ORM-путь общий для обоих
+IDENTIFIERS = [
+    "alice",
+    "ALICE",
+    " Alice ",
+    "alice@example.com",
+    "Alice@Example.COM",
+    "bob",
+    "bob@example.com",
+    "nobody",
+    "nobody@example.com",
+]
+
+
+@pytest.fixture(autouse=True)
+def without_negative_cache(monkeypatch):
+    # промахи не должны переживать базу одного теста
+    monkeypatch.setattr(settings, "USER_NEGATIVE_CACHE_ENABLED", False)
+
+
+@pytest.fixture
+async def users(engine) -> dict[str, UsersDbModel]:
+    async with async_session() as session:
+        role = RoleDbModel(name="user", description="user")
+        session.add(role)
+        await session.flush()
+        users = {
+            "alice": UsersDbModel(
+                login="Alice",
+                email="Alice@Example.com",
+                first_name="Alice",
+                last_name="Liddell",
+                encrypted_password="-",
+                role_id=role.id,
+            ),
+            "bob": UsersDbModel(
+                login="bob",
+                email="bob@example.com",
+                first_name="Bob",
+                last_name="Builder",
+                encrypted_password="-",
+            ),
+        }
+        session.add_all(users.values())
+        await session.commit()
+    return users
+
+
+def _fields(user) -> tuple:
+    return tuple(getattr(user, name) for name in UserRecord.__slots__)
+
+
+@pytest.mark.parametrize("identifier", IDENTIFIERS)
+async def test_record_matches_orm(users, identifier):
+    async with async_session() as session:
+        repository = UserRepository(session)
+        model = await repository.get_user_by_email_or_login(identifier)
+        record = await repository.get_user_record_by_email_or_login(identifier)
+
+    if model is None:
+        assert record is None
+    else:
+        assert isinstance(record, UserRecord)
+        assert _fields(record) == _fields(model)
+
+
+async def test_records_by_logins(users):
+    async with async_session() as session:
+        records = await UserRepository(session).get_user_records_by_logins(
+            ["ALICE", "bob", "nobody", "alice"]
+        )
+
+    assert sorted(records) == ["alice", "bob"]
+    for key, record in records.items():
+        assert _fields(record) == _fields(users[key])
+
+
+async def test_record_by_id_matches_orm(users):
+    async with async_session() as session:
+        record = await UserRepository(session).get_user_by_id(users["alice"].id)
+
+    assert _fields(record) == _fields(users["alice"])
+
+
+async def test_record_after_update(users):
+    async with async_session() as session:
+        repository = UserRepository(session)
+        updated = await repository.update_user(users["bob"].id, login="Robert")
+        record = await repository.get_user_record_by_email_or_login("robert")
+        model = await repository.get_user_by_email_or_login("ROBERT")
+
+    assert _fields(updated) == _fields(record) == _fields(model)
+    assert record.login == "Robert"
+
+
+async def test_bulk_insert_visible_to_both_paths(engine):
+    async with engine.begin() as conn:
+        await conn.execute(
+            insert(UsersDbModel),
+            [
+                {
+                    "login": f"bulk_{index}",
+                    "email": f"bulk_{index}@example.com",
+                    "first_name": "Bulk",
+                    "last_name": "User",
+                    "encrypted_password": "-",
+                }
+                for index in range(3)
+            ],
+        )
+    async with async_session() as session:
+        repository = UserRepository(session)
+        for index in range(3):
+            model = await repository.get_user_by_email_or_login(f"bulk_{index}")
+            record = await repository.get_user_record_by_email_or_login(
+                f"BULK_{index}@example.com"
+            )
+            assert _fields(record) == _fields(model)
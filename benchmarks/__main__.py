@@ -0,0 +1,99 @@
+import asyncio
+import importlib
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+import typer
+
+from benchmarks.harness import (
+    REGISTRY,
+    BenchmarkResult,
+    compare,
+    dump_results,
+    format_comparison,
+    format_results,
+    load_results,
+    measure,
+)
+
+# группа -> модуль с бенчмарками и фабрика контекста группы
+SUITES = {
+    "micro": ("benchmarks.micro", None),
+    "requests": ("benchmarks.endpoints", "request_context"),
+    "serialization": ("benchmarks.serialization", None),
+    "statements": ("benchmarks.statements", None),
+}
+
+cli = typer.Typer()
+
+
+@asynccontextmanager
+async def _no_context():
+    yield None
+
+
+async def _run_group(group: str, name_filter: Optional[str]) -> list[BenchmarkResult]:
+    module_name, context_name = SUITES[group]
+    module = importlib.import_module(module_name)
+    context = getattr(module, context_name)() if context_name else _no_context()
+
+    results = []
+    async with context as suite_context:
+        for spec in REGISTRY.values():
+            if spec.group != group:
+                continue
+            if name_filter and name_filter not in spec.name:
+                continue
+            fn = await spec.factory(suite_context)
+            result = await measure(spec.name, fn, spec.rounds, spec.warmup)
+            typer.echo(f"  {spec.name}: median {result.median_ms:.3f} ms")
+            results.append(result)
+    return results
+
+
+async def _run(groups: list[str], name_filter: Optional[str]) -> list[BenchmarkResult]:
+    results = []
+    for group in groups:
+        typer.echo(f"Running {group} benchmarks...")
+        results.extend(await _run_group(group, name_filter))
+    return results
+
+
+@cli.command()
+def run(
+    group: Optional[List[str]] = typer.Option(
+        None, help="Benchmark groups to run (default: all)."
+    ),
+    name_filter: Optional[str] = typer.Option(
+        None, "--filter", help="Run only benchmarks whose name contains this."
+    ),
+    output: Optional[str] = typer.Option(None, help="Write results as JSON."),
+    baseline: Optional[str] = typer.Option(
+        None, help="Compare medians against a stored JSON run."
+    ),
+    tolerance: float = typer.Option(
+        0.10, help="Allowed slowdown against the baseline (0.10 = 10%)."
+    ),
+):
+    """
+    Run benchmarks and optionally compare them with a baseline.
+    """
+    groups = group or list(SUITES)
+    unknown = set(groups) - set(SUITES)
+    if unknown:
+        raise typer.BadParameter(f"unknown groups: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(_run(groups, name_filter))
+    typer.echo(format_results(results))
+    if output:
+        dump_results(results, output)
+
+    if baseline:
+        comparisons = compare(results, load_results(baseline))
+        typer.echo(format_comparison(comparisons, tolerance))
+        if any(item.is_regression(tolerance) for item in comparisons):
+            raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    cli()
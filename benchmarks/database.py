@@ -0,0 +1,48 @@
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import asyncpg
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.infrastructure.db.database import dispose_engine, init_engine
+from app.models.users import Base
+
+# Отдельная одноразовая база на локальном Postgres (например,
+# `docker compose up postgres`): пересоздаётся перед прогоном и удаляется после
+BENCH_DB_NAME = os.environ.get("BENCH_DB_NAME", f"{settings.DB_NAME}_bench")
+
+
+async def _admin_execute(statement: str) -> None:
+    conn = await asyncpg.connect(
+        user=settings.DB_USER,
+        password=settings.DB_PASSWORD,
+        host=settings.DB_HOST,
+        port=settings.DB_PORT,
+        database="postgres",
+    )
+    try:
+        await conn.execute(statement)
+    finally:
+        await conn.close()
+
+
+@asynccontextmanager
+async def bench_database() -> AsyncIterator[AsyncEngine]:
+    """Создаёт бенчмарк-базу со схемой из моделей и направляет в неё движок
+    приложения (`init_engine`)."""
+    await _admin_execute(f'DROP DATABASE IF EXISTS "{BENCH_DB_NAME}"')
+    await _admin_execute(f'CREATE DATABASE "{BENCH_DB_NAME}"')
+
+    engine = init_engine(
+        f"postgresql+asyncpg://{settings.DB_USER}:{settings.DB_PASSWORD}"
+        f"@{settings.DB_HOST}:{settings.DB_PORT}/{BENCH_DB_NAME}"
+    )
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        yield engine
+    finally:
+        await dispose_engine()
+        await _admin_execute(f'DROP DATABASE IF EXISTS "{BENCH_DB_NAME}"')
@@ -0,0 +1,253 @@
+import asyncio
+import itertools
+import secrets
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import httpx
+
+from app.auth.user_repository import UserRepository
+from app.core.config import settings
+from app.infrastructure.db.database import async_session
+from app.main import create_app
+from app.schemas.user import UserGet
+from benchmarks.database import bench_database
+from benchmarks.harness import benchmark
+
+PASSWORD = "correct horse battery staple"
+
+_user_ids = itertools.count()
+
+
+def _new_user() -> dict:
+    index = next(_user_ids)
+    return {
+        "login": f"bench_user_{index}",
+        "email": f"bench_user_{index}@example.com",
+        "first_name": "Bench",
+        "last_name": "User",
+        "password": PASSWORD,
+    }
+
+
+@asynccontextmanager
+async def request_context() -> AsyncIterator[httpx.AsyncClient]:
+    """HTTP-клиент поверх ASGI-приложения, подключённого к бенчмарк-базе."""
+    if not settings.TOKEN_INTROSPECT_CLIENT_KEYS:
+        # без ключей шлюза /tokens/introspect закрыт; сценарий ходит как шлюз
+        settings.TOKEN_INTROSPECT_CLIENT_KEYS = [secrets.token_urlsafe()]
+    async with bench_database():
+        app = create_app()
+        # lifespan прогревает пул и кеши так же, как воркер gunicorn
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://bench"
+            ) as client:
+                yield client
+
+
+def introspect_headers() -> dict:
+    return {"X-Introspect-Key": settings.TOKEN_INTROSPECT_CLIENT_KEYS[0]}
+
+
+def _check(response: httpx.Response) -> httpx.Response:
+    if response.status_code != 200:
+        raise RuntimeError(
+            f"{response.request.method} {response.request.url.path} "
+            f"returned {response.status_code}: {response.text}"
+        )
+    return response
+
+
+async def signup(client: httpx.AsyncClient) -> dict:
+    user = _new_user()
+    _check(await client.post("/api/v1/signup", json=user))
+    return user
+
+
+async def login(client: httpx.AsyncClient, user: dict) -> dict:
+    response = await client.post(
+        "/api/v1/tokens",
+        data={"username": user["login"], "password": user["password"]},
+    )
+    return _check(response).json()
+
+
+@benchmark("requests", "signup", rounds=20, warmup=2)
+async def signup_request(client):
+    async def run():
+        await signup(client)
+
+    return run
+
+
+@benchmark("requests", "tokens", rounds=100, warmup=5)
+async def tokens_request(client):
+    user = await signup(client)
+
+    async def run():
+        await login(client, user)
+
+    return run
+
+
+async def rotate(client: httpx.AsyncClient, tokens: dict) -> dict:
+    response = await client.post("/api/v1/refresh", json=tokens["refresh_token"])
+    return _check(response).json()
+
+
+# Обменянный refresh токен повторно не принимается, поэтому каждый замер
+# продолжает свою цепочку ротации последним выданным токеном
+
+
+@benchmark("requests", "refresh", rounds=200, warmup=10)
+async def refresh_request(client):
+    user = await signup(client)
+    tokens = await login(client, user)
+
+    async def run():
+        nonlocal tokens
+        tokens = await rotate(client, tokens)
+
+    return run
+
+
+REFRESH_CONCURRENCY = 20
+
+
+@benchmark("requests", "refresh_concurrent", rounds=50, warmup=3)
+async def refresh_concurrent_request(client):
+    """Пропускная способность: REFRESH_CONCURRENCY параллельных ротаций
+    разных семейств за замер (ops/s x REFRESH_CONCURRENCY = refresh/s)."""
+    chains = []
+    for _ in range(REFRESH_CONCURRENCY):
+        chains.append(await login(client, await signup(client)))
+
+    async def run():
+        chains[:] = await asyncio.gather(
+            *(rotate(client, tokens) for tokens in chains)
+        )
+
+    return run
+
+
+@benchmark("requests", "user_me", rounds=500, warmup=20)
+async def user_me_request(client):
+    user = await signup(client)
+    tokens = await login(client, user)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+
+    async def run():
+        _check(await client.post("/api/v1/user/me", headers=headers))
+
+    return run
+
+
+# Поиск пользователя по логину из токена: ORM против прямого asyncpg.
+# Перед замером оба пути сверяются на найденном и на отсутствующем логине.
+
+
+async def _identity_lookup_parity(client) -> str:
+    user = await signup(client)
+    async with async_session() as session:
+        repo = UserRepository(session)
+        for identifier in (user["login"], user["email"], "missing_user"):
+            orm_user = await repo.get_user_by_email_or_login(identifier)
+            record = await repo.get_user_record_by_email_or_login(identifier)
+            if (orm_user is None) != (record is None):
+                raise RuntimeError(f"identity lookup mismatch for {identifier!r}")
+            if orm_user is not None and (
+                UserGet.model_validate(orm_user) != UserGet.model_validate(record)
+                or orm_user.role_id != record.role_id
+            ):
+                raise RuntimeError(f"identity lookup mismatch for {identifier!r}")
+    return user["login"]
+
+
+@benchmark("requests", "identity_lookup_orm", rounds=1000, warmup=50)
+async def identity_lookup_orm(client):
+    identifier = await _identity_lookup_parity(client)
+
+    async def run():
+        async with async_session() as session:
+            repo = UserRepository(session)
+            UserGet.model_validate(await repo.get_user_by_email_or_login(identifier))
+
+    return run
+
+
+@benchmark("requests", "identity_lookup_raw", rounds=1000, warmup=50)
+async def identity_lookup_raw(client):
+    identifier = await _identity_lookup_parity(client)
+
+    async def run():
+        async with async_session() as session:
+            repo = UserRepository(session)
+            UserGet.model_validate(
+                await repo.get_user_record_by_email_or_login(identifier)
+            )
+
+    return run
+
+
+# Подзапрос nginx auth_request против /user/me на одном и том же токене.
+# Повторы токена в проде поглощает proxy_cache nginx; здесь замеряется
+# сам сервис, в том числе его кеш интроспекции.
+
+
+async def _bearer_headers(client: httpx.AsyncClient) -> dict:
+    tokens = await login(client, await signup(client))
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
+
+async def auth_verify(client: httpx.AsyncClient, headers: dict) -> None:
+    response = await client.get("/api/v1/auth/verify", headers=headers)
+    if response.status_code != 204 or not response.headers.get("x-user-id"):
+        raise RuntimeError(
+            f"GET /api/v1/auth/verify returned {response.status_code}: {response.text}"
+        )
+
+
+@benchmark("requests", "auth_verify", rounds=500, warmup=20)
+async def auth_verify_request(client):
+    headers = await _bearer_headers(client)
+
+    async def run():
+        await auth_verify(client, headers)
+
+    return run
+
+
+AUTH_CONCURRENCY = 50
+
+
+@benchmark("requests", "user_me_concurrent", rounds=50, warmup=3)
+async def user_me_concurrent_request(client):
+    """Пропускная способность: AUTH_CONCURRENCY параллельных /user/me за замер
+    (ops/s x AUTH_CONCURRENCY = запросов/с)."""
+    headers = await _bearer_headers(client)
+
+    async def run():
+        responses = await asyncio.gather(
+            *(
+                client.post("/api/v1/user/me", headers=headers)
+                for _ in range(AUTH_CONCURRENCY)
+            )
+        )
+        for response in responses:
+            _check(response)
+
+    return run
+
+
+@benchmark("requests", "auth_verify_concurrent", rounds=50, warmup=3)
+async def auth_verify_concurrent_request(client):
+    """То же для /auth/verify; сравнивается с `user_me_concurrent`."""
+    headers = await _bearer_headers(client)
+
+    async def run():
+        await asyncio.gather(
+            *(auth_verify(client, headers) for _ in range(AUTH_CONCURRENCY))
+        )
+
+    return run
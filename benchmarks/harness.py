@@ -0,0 +1,176 @@
+import gc
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+import orjson
+
+BenchmarkFn = Callable[[], Awaitable[None]]
+# фабрика получает контекст набора (например, HTTP-клиент), выполняет
+# подготовку и возвращает замеряемую корутину без аргументов
+BenchmarkFactory = Callable[..., Awaitable[BenchmarkFn]]
+
+
+@dataclass
+class BenchmarkSpec:
+    name: str
+    group: str
+    factory: BenchmarkFactory
+    rounds: int
+    warmup: int
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    rounds: int
+    min_ms: float
+    median_ms: float
+    mean_ms: float
+    p95_ms: float
+    stdev_ms: float
+    ops_per_sec: float
+    extra: dict = field(default_factory=dict)
+
+
+REGISTRY: dict[str, BenchmarkSpec] = {}
+
+
+def benchmark(group: str, name: str, rounds: int = 200, warmup: int = 10):
+    """Регистрирует фабрику бенчмарка в группе (`micro`, `requests`, ...)."""
+
+    def decorator(factory: BenchmarkFactory) -> BenchmarkFactory:
+        full_name = f"{group}.{name}"
+        REGISTRY[full_name] = BenchmarkSpec(full_name, group, factory, rounds, warmup)
+        return factory
+
+    return decorator
+
+
+def _percentile(samples: list[float], percent: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def measure(
+    name: str, fn: BenchmarkFn, rounds: int, warmup: int
+) -> BenchmarkResult:
+    for _ in range(warmup):
+        await fn()
+
+    samples = []
+    gc.collect()
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter_ns()
+            await fn()
+            samples.append((time.perf_counter_ns() - start) / 1_000_000)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    mean = statistics.fmean(samples)
+    return BenchmarkResult(
+        name=name,
+        rounds=rounds,
+        min_ms=min(samples),
+        median_ms=statistics.median(samples),
+        mean_ms=mean,
+        p95_ms=_percentile(samples, 95),
+        stdev_ms=statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        ops_per_sec=1000 / mean if mean else 0.0,
+    )
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> dict:
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "git_revision": _git_revision(),
+        "created_at": datetime.utcnow().isoformat(),
+    }
+
+
+def dump_results(results: list[BenchmarkResult], path: str) -> None:
+    payload = {
+        "environment": environment(),
+        "results": {result.name: asdict(result) for result in results},
+    }
+    with open(path, "wb") as file:
+        file.write(orjson.dumps(payload, option=orjson.OPT_INDENT_2))
+
+
+def load_results(path: str) -> dict[str, dict]:
+    with open(path, "rb") as file:
+        return orjson.loads(file.read())["results"]
+
+
+@dataclass
+class Comparison:
+    name: str
+    baseline_ms: float
+    current_ms: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current_ms / self.baseline_ms if self.baseline_ms else 1.0
+
+    def is_regression(self, tolerance: float) -> bool:
+        return self.ratio > 1 + tolerance
+
+
+def compare(
+    results: list[BenchmarkResult], baseline: dict[str, dict]
+) -> list[Comparison]:
+    """Сравнивает медианы с сохранённым базовым прогоном."""
+    return [
+        Comparison(result.name, baseline[result.name]["median_ms"], result.median_ms)
+        for result in results
+        if result.name in baseline
+    ]
+
+
+def format_results(results: list[BenchmarkResult]) -> str:
+    lines = [
+        f"{'benchmark':<40} {'rounds':>6} {'median ms':>10} "
+        f"{'p95 ms':>10} {'ops/s':>10}"
+    ]
+    for result in results:
+        lines.append(
+            f"{result.name:<40} {result.rounds:>6} {result.median_ms:>10.3f} "
+            f"{result.p95_ms:>10.3f} {result.ops_per_sec:>10.1f}"
+        )
+    return "\n".join(lines)
+
+
+def format_comparison(comparisons: list[Comparison], tolerance: float) -> str:
+    lines = [f"{'benchmark':<40} {'baseline':>10} {'current':>10} {'ratio':>7}"]
+    for item in comparisons:
+        marker = "  REGRESSION" if item.is_regression(tolerance) else ""
+        lines.append(
+            f"{item.name:<40} {item.baseline_ms:>10.3f} {item.current_ms:>10.3f} "
+            f"{item.ratio:>7.2f}{marker}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,105 @@
+"""Бюджет времени импорта приложения.
+
+    python -m benchmarks.importtime --budget-ms 2000
+
+Импортирует `app.main` в отдельном интерпретаторе под `python -X importtime`
+(`--runs` раз, берётся медиана) и проверяет две вещи: суммарное время
+импорта укладывается в бюджет и ленивые зависимости (pycryptodome,
+python-jose, typer) не импортируются при загрузке приложения. Код
+возврата 1 при нарушении.
+"""
+import statistics
+import subprocess
+import sys
+from dataclasses import dataclass
+
+import typer
+
+from app.services.warmup import LAZY_MODULES
+
+TARGET_MODULE = "app.main"
+# верхние пакеты, которые воркер не должен импортировать при загрузке
+FORBIDDEN_PACKAGES = frozenset(
+    {name.split(".")[0] for name in LAZY_MODULES} | {"typer"}
+)
+
+
+@dataclass
+class ImportProfile:
+    # модуль -> (собственное время, накопленное время), мкс
+    modules: dict[str, tuple[int, int]]
+
+    @property
+    def total_us(self) -> int:
+        return self.modules[TARGET_MODULE][1]
+
+    def top(self, count: int) -> list[tuple[str, int]]:
+        ranked = sorted(
+            ((name, own) for name, (own, _) in self.modules.items()),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+        return ranked[:count]
+
+    def forbidden(self) -> list[str]:
+        return sorted(
+            name
+            for name in self.modules
+            if name.split(".")[0] in FORBIDDEN_PACKAGES
+        )
+
+
+def parse_importtime(stderr: str) -> ImportProfile:
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(own), int(cumulative))
+    return ImportProfile(modules)
+
+
+def profile_import(module: str = TARGET_MODULE) -> ImportProfile:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+cli = typer.Typer()
+
+
+@cli.command()
+def run(
+    budget_ms: float = typer.Option(2000.0, help="Upper bound of import time."),
+    runs: int = typer.Option(5, help="Interpreter runs; the median is checked."),
+    top: int = typer.Option(15, help="Slowest modules to print."),
+):
+    """
+    Check import time of the application against a budget.
+    """
+    # первый прогон компилирует .pyc и в медиану не входит
+    profile_import()
+    profiles = [profile_import() for _ in range(runs)]
+    median_ms = statistics.median(profile.total_us for profile in profiles) / 1000
+
+    for name, own in profiles[-1].top(top):
+        typer.echo(f"{own / 1000:9.1f} ms  {name}")
+    ok = median_ms <= budget_ms
+    typer.echo(
+        f"import {TARGET_MODULE}: {median_ms:.0f} ms (budget {budget_ms:.0f} ms) "
+        f"{'ok' if ok else 'FAIL'}"
+    )
+    forbidden = profiles[-1].forbidden()
+    if forbidden:
+        ok = False
+        typer.echo(f"eagerly imported lazy dependencies: {', '.join(forbidden)} FAIL")
+    if not ok:
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    cli()
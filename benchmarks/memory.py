@@ -0,0 +1,150 @@
+"""Память горячих путей чтения на бенчмарк-базе.
+
+    python -m benchmarks.memory
+
+Заполняет `users` и `encryption_keys` строками реального размера и для
+каждого пути загружает по одной строке на пользователя в одной сессии
+(объекты остаются в identity map, как в пакетной обработке). Выводит
+удерживаемую и пиковую память tracemalloc в пересчёте на строку.
+"""
+import asyncio
+import gc
+import tracemalloc
+import uuid
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+import typer
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.auth.encryption_facade import EncryptionFacade
+from app.auth.encryption_repository import KeyStorageRepository
+from app.auth.user_repository import UserRepository
+from app.infrastructure.db.database import async_session
+from app.models.users import EncryptionKeysModel, UsersDbModel
+from benchmarks.database import bench_database
+
+
+@dataclass(frozen=True)
+class SeededUser:
+    id: uuid.UUID
+    login: str
+
+
+@dataclass(frozen=True)
+class MemoryCase:
+    name: str
+    load: Callable[[AsyncSession, SeededUser], Awaitable[object]]
+
+
+async def _user_orm(session: AsyncSession, user: SeededUser):
+    return await UserRepository(session).get_user_by_email_or_login(user.login)
+
+
+async def _user_record(session: AsyncSession, user: SeededUser):
+    return await UserRepository(session).get_user_record_by_email_or_login(user.login)
+
+
+async def _keys_full(session: AsyncSession, user: SeededUser):
+    return await KeyStorageRepository(session).get_keys(user.id)
+
+
+async def _keys_for_decryption(session: AsyncSession, user: SeededUser):
+    return await KeyStorageRepository(session).get_decryption_keys(user.id)
+
+
+MEMORY_CASES = [
+    MemoryCase("user by login, ORM", _user_orm),
+    MemoryCase("user record by login", _user_record),
+    MemoryCase("encryption keys, full row", _keys_full),
+    MemoryCase("encryption keys, decryption only", _keys_for_decryption),
+]
+
+
+async def _seed(engine: AsyncEngine, count: int) -> list[SeededUser]:
+    # одна настоящая пара ключей на всех: размер строк как у живых
+    # пользователей, без генерации RSA на каждого
+    facade = EncryptionFacade()
+    keys = await facade.generate_keys()
+    encrypted_password = await facade.encrypt_data(
+        "benchmark-password", keys["session_key"]
+    )
+    users = [
+        SeededUser(id=uuid.uuid4(), login=f"bench_user_{index}")
+        for index in range(count)
+    ]
+    async with engine.begin() as conn:
+        await conn.execute(
+            insert(UsersDbModel),
+            [
+                {
+                    "id": user.id,
+                    "email": f"{user.login}@example.com",
+                    "login": user.login,
+                    "first_name": "Bench",
+                    "last_name": "User",
+                    "encrypted_password": encrypted_password,
+                }
+                for user in users
+            ],
+        )
+        await conn.execute(
+            insert(EncryptionKeysModel),
+            [
+                {
+                    "user_id": user.id,
+                    "private_key": keys["private_key"].export_key(),
+                    "public_key": keys["public_key"].export_key(),
+                    "encrypted_session_key": keys["encrypted_session_key"],
+                }
+                for user in users
+            ],
+        )
+    return users
+
+
+async def measure_case(case: MemoryCase, users: list[SeededUser]) -> tuple[int, int]:
+    """Возвращает (удерживаемые, пиковые) байты на одну строку."""
+    async with async_session() as session:
+        # кеши компиляции и prepared statement заполняются до замера
+        await case.load(session, users[0])
+        session.expunge_all()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            loaded = [await case.load(session, user) for user in users]
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert all(item is not None for item in loaded)
+    return current // len(users), peak // len(users)
+
+
+async def _run(seed_users: int) -> None:
+    async with bench_database() as engine:
+        users = await _seed(engine, seed_users)
+        for case in MEMORY_CASES:
+            retained, peak = await measure_case(case, users)
+            typer.echo(
+                f"{case.name}: {retained} B/row retained, {peak} B/row peak"
+            )
+
+
+cli = typer.Typer()
+
+
+@cli.command()
+def run(
+    seed_users: int = typer.Option(
+        2_000, help="Users (and key rows) loaded by every path."
+    ),
+):
+    """
+    Measure memory per loaded row on the hot read paths.
+    """
+    asyncio.run(_run(seed_users))
+
+
+if __name__ == "__main__":
+    cli()
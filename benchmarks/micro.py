@@ -0,0 +1,243 @@
+import logging
+import os
+import queue
+import random
+from datetime import timedelta
+from uuid import uuid4
+
+from app.auth.encryption_facade import EncryptionFacade
+from app.auth.encryption_strategy import (
+    AESEncryptor,
+    RSAEncryptor,
+    RSAKeyPairGenerator,
+    get_session_key_async,
+)
+from app.auth.introspection import AccessTokenBatchVerifier
+from app.auth.role_hierarchy import compute_closure
+from app.auth.token_strategy import AccessTokenStrategy, RefreshTokenStrategy
+from app.core.config import settings
+from app.core.logger import JsonFormatter, NonBlockingQueueHandler
+from benchmarks.harness import benchmark
+
+PASSWORD = "correct horse battery staple"
+INTROSPECT_BATCH = 100
+ROLE_HIERARCHY_SIZE = 5000
+
+
+@benchmark("micro", "rsa_keygen", rounds=10, warmup=1)
+async def rsa_keygen(context):
+    generator = RSAKeyPairGenerator()
+
+    async def run():
+        await generator.generate_key_pair()
+
+    return run
+
+
+@benchmark("micro", "rsa_encrypt_session_key")
+async def rsa_encrypt_session_key(context):
+    encryptor = RSAEncryptor()
+    _, public_key = await RSAKeyPairGenerator().generate_key_pair()
+    session_key = await get_session_key_async()
+
+    async def run():
+        await encryptor.encrypt_session_key(session_key, public_key)
+
+    return run
+
+
+@benchmark("micro", "rsa_decrypt_session_key")
+async def rsa_decrypt_session_key(context):
+    encryptor = RSAEncryptor()
+    private_key, public_key = await RSAKeyPairGenerator().generate_key_pair()
+    session_key = await get_session_key_async()
+    encrypted = await encryptor.encrypt_session_key(session_key, public_key)
+
+    async def run():
+        await encryptor.decrypt_session_key(encrypted, private_key)
+
+    return run
+
+
+@benchmark("micro", "aes_encrypt")
+async def aes_encrypt(context):
+    encryptor = AESEncryptor()
+    session_key = await get_session_key_async()
+
+    async def run():
+        await encryptor.encrypt(PASSWORD, session_key)
+
+    return run
+
+
+@benchmark("micro", "aes_decrypt")
+async def aes_decrypt(context):
+    encryptor = AESEncryptor()
+    session_key = await get_session_key_async()
+    encrypted = await encryptor.encrypt(PASSWORD, session_key)
+
+    async def run():
+        await encryptor.decrypt(encrypted, session_key)
+
+    return run
+
+
+@benchmark("micro", "facade_encrypt_data")
+async def facade_encrypt_data(context):
+    facade = EncryptionFacade()
+    session_key = await get_session_key_async()
+
+    async def run():
+        await facade.encrypt_data(PASSWORD, session_key)
+
+    return run
+
+
+@benchmark("micro", "facade_decrypt_data")
+async def facade_decrypt_data(context):
+    facade = EncryptionFacade()
+    session_key = await get_session_key_async()
+    encrypted = await facade.encrypt_data(PASSWORD, session_key)
+
+    async def run():
+        await facade.decrypt_data(encrypted, session_key)
+
+    return run
+
+
+@benchmark("micro", "access_token_create", rounds=1000, warmup=50)
+async def access_token_create(context):
+    strategy = AccessTokenStrategy()
+    expires = timedelta(minutes=60)
+
+    async def run():
+        await strategy.create_token(data={"sub": "bench"}, expires_delta=expires)
+
+    return run
+
+
+@benchmark("micro", "access_token_verify", rounds=1000, warmup=50)
+async def access_token_verify(context):
+    strategy = AccessTokenStrategy()
+    token = await strategy.create_token(
+        data={"sub": "bench"}, expires_delta=timedelta(minutes=60)
+    )
+
+    async def run():
+        await strategy.verify_token(token)
+
+    return run
+
+
+@benchmark("micro", "refresh_token_create", rounds=1000, warmup=50)
+async def refresh_token_create(context):
+    strategy = RefreshTokenStrategy()
+    expires = timedelta(days=30)
+
+    async def run():
+        await strategy.create_token(data={"sub": "bench"}, expires_delta=expires)
+
+    return run
+
+
+@benchmark("micro", "refresh_token_verify", rounds=1000, warmup=50)
+async def refresh_token_verify(context):
+    strategy = RefreshTokenStrategy()
+    token = await strategy.create_token(
+        data={"sub": "bench"}, expires_delta=timedelta(days=30)
+    )
+
+    async def run():
+        await strategy.verify_token(token)
+
+    return run
+
+
+async def _access_tokens(count: int) -> list[str]:
+    strategy = AccessTokenStrategy()
+    return [
+        await strategy.create_token(
+            data={"sub": f"bench_{i}"}, expires_delta=timedelta(minutes=60)
+        )
+        for i in range(count)
+    ]
+
+
+@benchmark("micro", "access_token_verify_batch_jose", rounds=100, warmup=5)
+async def access_token_verify_batch_jose(context):
+    strategy = AccessTokenStrategy()
+    tokens = await _access_tokens(INTROSPECT_BATCH)
+
+    async def run():
+        for token in tokens:
+            await strategy.verify_token(token)
+
+    return run
+
+
+@benchmark("micro", "access_token_verify_batch", rounds=100, warmup=5)
+async def access_token_verify_batch(context):
+    verifier = AccessTokenBatchVerifier(settings.JWT_SECRET_KEY)
+    tokens = await _access_tokens(INTROSPECT_BATCH)
+    # пакетная проверка обязана совпадать с AccessTokenStrategy
+    strategy = AccessTokenStrategy()
+    for token, claims in zip(tokens, verifier.verify_many(tokens)):
+        assert claims["sub"] == (await strategy.verify_token(token)).login
+
+    async def run():
+        verifier.verify_many(tokens)
+
+    return run
+
+
+# Стоимость строки лога для вызывающего кода: синхронная запись в поток
+# против очереди (запись в поток выполняет QueueListener в своём потоке).
+
+
+def _bench_logger(name: str, handler: logging.Handler) -> logging.Logger:
+    logger = logging.getLogger(f"benchmarks.{name}")
+    logger.handlers[:] = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    return logger
+
+
+@benchmark("micro", "log_line_stream", rounds=5000, warmup=100)
+async def log_line_stream(context):
+    handler = logging.StreamHandler(open(os.devnull, "w"))
+    handler.setFormatter(JsonFormatter())
+    logger = _bench_logger("stream", handler)
+
+    async def run():
+        logger.info("GET %s %d", "/api/v1/user/me", 200)
+
+    return run
+
+
+@benchmark("micro", "log_line_queue", rounds=5000, warmup=100)
+async def log_line_queue(context):
+    # очередь без слушателя: замеряется только сторона вызывающего
+    handler = NonBlockingQueueHandler(queue.SimpleQueue())
+    logger = _bench_logger("queue", handler)
+
+    async def run():
+        logger.info("GET %s %d", "/api/v1/user/me", 200)
+
+    return run
+
+
+@benchmark("micro", "role_closure_compute", rounds=20, warmup=2)
+async def role_closure_compute(context):
+    # случайное дерево: родитель каждой роли — одна из созданных раньше
+    rnd = random.Random(0)
+    roles = []
+    parents = {}
+    for _ in range(ROLE_HIERARCHY_SIZE):
+        role_id = uuid4()
+        parents[role_id] = rnd.choice(roles) if roles else None
+        roles.append(role_id)
+
+    async def run():
+        compute_closure(parents)
+
+    return run
@@ -0,0 +1,135 @@
+"""Проверка планов горячих запросов на бенчмарк-базе.
+
+    python -m benchmarks.plans
+
+Заполняет `users`, собирает статистику и сверяет EXPLAIN каждого запроса
+с ожидаемыми индексами; код возврата 1, если план не совпал. Те же
+проверки выполняет `app/tests/test_query_plans.py` на `TEST_DATABASE_URL`.
+"""
+import asyncio
+from dataclasses import dataclass
+from typing import Iterator
+
+import orjson
+import typer
+from sqlalchemy import Executable, insert, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.auth.user_repository import (
+    _LOOKUP_BY_EMAIL_OR_LOGIN,
+    _LOOKUP_BY_LOGIN,
+    normalize_identifier,
+)
+from app.models.users import UsersDbModel
+from benchmarks.database import bench_database
+
+
+@dataclass(frozen=True)
+class PlanCheck:
+    name: str
+    statement: Executable
+    params: dict
+    expected_indexes: frozenset[str]
+    table: str
+
+
+PLAN_CHECKS = [
+    PlanCheck(
+        name="user lookup by login",
+        statement=_LOOKUP_BY_LOGIN.orm,
+        params={"identifier": normalize_identifier("Bench_User_42")},
+        expected_indexes=frozenset({"ux_users_login_lower"}),
+        table="users",
+    ),
+    PlanCheck(
+        name="user lookup by email or login",
+        statement=_LOOKUP_BY_EMAIL_OR_LOGIN.orm,
+        params={"identifier": normalize_identifier("Bench_User_42@Example.com")},
+        expected_indexes=frozenset({"ux_users_email_lower", "ux_users_login_lower"}),
+        table="users",
+    ),
+]
+
+
+def _plan_nodes(node: dict) -> Iterator[dict]:
+    yield node
+    for child in node.get("Plans", ()):
+        yield from _plan_nodes(child)
+
+
+async def populate_users(engine: AsyncEngine, count: int) -> None:
+    rows = [
+        {
+            "email": f"bench_user_{index}@example.com",
+            "login": f"bench_user_{index}",
+            "first_name": "Bench",
+            "last_name": "User",
+            "encrypted_password": "-",
+        }
+        for index in range(count)
+    ]
+    async with engine.begin() as conn:
+        await conn.execute(insert(UsersDbModel), rows)
+    async with engine.connect() as conn:
+        await conn.execute(text("ANALYZE users"))
+        await conn.commit()
+
+
+async def explain(engine: AsyncEngine, check: PlanCheck) -> dict:
+    # запрос компилируется так же, как при выполнении через сессию,
+    # и EXPLAIN получает те же $n-параметры
+    compiled = check.statement.compile(dialect=engine.dialect)
+    values = compiled.construct_params(check.params)
+    async with engine.connect() as conn:
+        raw_connection = await conn.get_raw_connection()
+        plan = await raw_connection.driver_connection.fetchval(
+            f"EXPLAIN (FORMAT JSON) {compiled}",
+            *(values[name] for name in compiled.positiontup),
+        )
+    return orjson.loads(plan)[0]["Plan"]
+
+
+def verify(check: PlanCheck, plan: dict) -> list[str]:
+    nodes = list(_plan_nodes(plan))
+    used = {node["Index Name"] for node in nodes if "Index Name" in node}
+    problems = [
+        f"index {name} not used" for name in sorted(check.expected_indexes - used)
+    ]
+    if any(
+        node["Node Type"] == "Seq Scan" and node.get("Relation Name") == check.table
+        for node in nodes
+    ):
+        problems.append(f"sequential scan on {check.table}")
+    return problems
+
+
+async def _run(seed_users: int) -> bool:
+    ok = True
+    async with bench_database() as engine:
+        await populate_users(engine, seed_users)
+        for check in PLAN_CHECKS:
+            problems = verify(check, await explain(engine, check))
+            status = "ok" if not problems else "FAIL: " + "; ".join(problems)
+            typer.echo(f"{check.name}: {status}")
+            ok = ok and not problems
+    return ok
+
+
+cli = typer.Typer()
+
+
+@cli.command()
+def run(
+    seed_users: int = typer.Option(
+        20_000, help="Users inserted before EXPLAIN so the planner sees a real table."
+    ),
+):
+    """
+    Check that hot queries use the expected indexes.
+    """
+    if not asyncio.run(_run(seed_users)):
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    cli()
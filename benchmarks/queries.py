@@ -0,0 +1,126 @@
+"""Бюджет SQL-запросов на эндпоинт.
+
+    python -m benchmarks.queries
+
+Проходит пользовательский сценарий через ASGI-приложение на бенчмарк-базе
+и сверяет число запросов каждого эндпоинта (по метрике
+`db_queries_per_request`) с бюджетом; код возврата 1 при превышении.
+Бюджет фиксирует, что токен проверяется, а пользователь загружается не
+больше одного раза за запрос.
+"""
+import asyncio
+from dataclasses import dataclass
+
+import httpx
+import typer
+from prometheus_client import REGISTRY
+
+from benchmarks.endpoints import _check, _new_user, introspect_headers, request_context
+
+
+@dataclass(frozen=True)
+class QueryBudget:
+    method: str
+    route: str
+    max_queries: int
+
+
+# signup: две проверки занятости, пользователь и ключи (INSERT + refresh)
+# tokens: пользователь, ключи, refresh токен; история входа пишется фоном
+# refresh: ротация и новый refresh токен
+# user/me, login_history, logout: пользователь один раз + своя работа
+# tokens/introspect: владельцы всех токенов пачки одним запросом
+# PATCH /user: пользователь, проверка логина, UPDATE, замена ключей,
+# отзыв refresh токенов
+BUDGETS = {
+    "signup": QueryBudget("POST", "/api/v1/signup", 6),
+    "tokens": QueryBudget("POST", "/api/v1/tokens", 3),
+    "refresh": QueryBudget("POST", "/api/v1/refresh", 2),
+    "user_me": QueryBudget("POST", "/api/v1/user/me", 1),
+    "login_history": QueryBudget("GET", "/api/v1/login_history", 2),
+    "update_user": QueryBudget("PATCH", "/api/v1/user", 7),
+    "logout": QueryBudget("POST", "/api/v1/logout", 2),
+    "introspect": QueryBudget("POST", "/api/v1/tokens/introspect", 1),
+}
+
+
+def _queries_observed(route: str) -> float:
+    return REGISTRY.get_sample_value(
+        "db_queries_per_request_sum", {"route": route}
+    ) or 0.0
+
+
+async def count_queries(
+    client: httpx.AsyncClient, budget: QueryBudget, **request
+) -> tuple[httpx.Response, int]:
+    # запросы сценария идут по одному, поэтому прирост суммы по маршруту —
+    # число запросов этого вызова
+    before = _queries_observed(budget.route)
+    response = _check(await client.request(budget.method, budget.route, **request))
+    return response, int(_queries_observed(budget.route) - before)
+
+
+async def run_scenario(client: httpx.AsyncClient) -> dict[str, int]:
+    user = _new_user()
+    counts = {}
+
+    async def call(name: str, **request) -> httpx.Response:
+        response, counts[name] = await count_queries(client, BUDGETS[name], **request)
+        return response
+
+    await call("signup", json=user)
+    tokens = (
+        await call(
+            "tokens", data={"username": user["login"], "password": user["password"]}
+        )
+    ).json()
+    tokens = (await call("refresh", json=tokens["refresh_token"])).json()
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    await call("user_me", headers=headers)
+    await call("login_history", headers=headers)
+    await call(
+        "introspect",
+        headers=introspect_headers(),
+        json={"tokens": [tokens["access_token"], "invalid", tokens["access_token"]]},
+    )
+    await call("logout", headers=headers)
+    await call(
+        "update_user",
+        headers=headers,
+        json={"login": f"{user['login']}_renamed", "password": user["password"]},
+    )
+    return counts
+
+
+def verify(counts: dict[str, int]) -> bool:
+    ok = True
+    for name, budget in BUDGETS.items():
+        count = counts[name]
+        status = "ok" if count <= budget.max_queries else "FAIL"
+        typer.echo(
+            f"{budget.method} {budget.route}: {count} queries "
+            f"(budget {budget.max_queries}) {status}"
+        )
+        ok = ok and count <= budget.max_queries
+    return ok
+
+
+async def _run() -> bool:
+    async with request_context() as client:
+        return verify(await run_scenario(client))
+
+
+cli = typer.Typer()
+
+
+@cli.command()
+def run():
+    """
+    Check the number of SQL queries per endpoint against its budget.
+    """
+    if not asyncio.run(_run()):
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,91 @@
+import json
+import uuid
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+
+from app.models.users import LoginHistoryDbModel, RoleDbModel
+from app.schemas.login_history import LOGIN_HISTORY_LIST_ADAPTER
+from app.schemas.role import ROLE_LIST_ADAPTER, RoleGet
+from benchmarks.harness import benchmark
+
+LIST_SIZE = 1000
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    " (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
+)
+
+
+def _roles() -> list[RoleDbModel]:
+    return [
+        RoleDbModel(
+            id=uuid.UUID(int=index),
+            name=f"role_{index}",
+            description="Benchmark role",
+            created_at=datetime(2024, 1, 1),
+        )
+        for index in range(LIST_SIZE)
+    ]
+
+
+def _login_history() -> list[LoginHistoryDbModel]:
+    user_id = uuid.UUID(int=1)
+    return [
+        LoginHistoryDbModel(
+            id=uuid.UUID(int=index),
+            user_id=user_id,
+            ip="192.168.1.1",
+            user_agent=USER_AGENT,
+            created_at=datetime(2024, 1, 1),
+        )
+        for index in range(LIST_SIZE)
+    ]
+
+
+# "before": from_orm по элементу, затем jsonable_encoder и json.dumps,
+# как это делал FastAPI с JSONResponse по умолчанию
+
+
+@benchmark("serialization", "roles_list_before")
+async def roles_list_before(context):
+    roles = _roles()
+
+    async def run():
+        models = [RoleGet.model_validate(role) for role in roles]
+        json.dumps(jsonable_encoder(models)).encode()
+
+    return run
+
+
+@benchmark("serialization", "roles_list_after")
+async def roles_list_after(context):
+    roles = _roles()
+
+    async def run():
+        ROLE_LIST_ADAPTER.dump_json(
+            ROLE_LIST_ADAPTER.validate_python(roles, from_attributes=True)
+        )
+
+    return run
+
+
+@benchmark("serialization", "login_history_list_before")
+async def login_history_list_before(context):
+    rows = _login_history()
+
+    async def run():
+        json.dumps(jsonable_encoder(rows)).encode()
+
+    return run
+
+
+@benchmark("serialization", "login_history_list_after")
+async def login_history_list_after(context):
+    rows = _login_history()
+
+    async def run():
+        LOGIN_HISTORY_LIST_ADAPTER.dump_json(
+            LOGIN_HISTORY_LIST_ADAPTER.validate_python(rows, from_attributes=True)
+        )
+
+    return run
@@ -0,0 +1,46 @@
+from sqlalchemy.dialects.postgresql.asyncpg import PGDialect_asyncpg
+from sqlalchemy.future import select
+
+from app.auth.user_repository import _LOOKUP_BY_EMAIL_OR_LOGIN
+from app.models.users import UsersDbModel
+from benchmarks.harness import benchmark
+
+IDENTIFIER = "bench_user@example.com"
+
+# Повторяет работу Session.execute до обращения к драйверу: ключ кеша
+# компиляции, поиск скомпилированного запроса, сборка параметров.
+# Сам запрос к БД одинаков в обоих вариантах и здесь не участвует.
+
+
+def _prepare(dialect, cache: dict, statement, params=None):
+    compiled, extracted, _ = statement._compile_w_cache(
+        dialect, compiled_cache=cache, column_keys=[]
+    )
+    return compiled.construct_params(params, extracted_parameters=extracted)
+
+
+@benchmark("statements", "user_lookup_inline", rounds=2000, warmup=100)
+async def user_lookup_inline(context):
+    """Как было: select() строится и хешируется заново на каждый вызов."""
+    dialect, cache = PGDialect_asyncpg(), {}
+
+    async def run():
+        statement = select(UsersDbModel).where(
+            (UsersDbModel.email == IDENTIFIER) | (UsersDbModel.login == IDENTIFIER)
+        )
+        _prepare(dialect, cache, statement)
+
+    return run
+
+
+@benchmark("statements", "user_lookup_cached", rounds=2000, warmup=100)
+async def user_lookup_cached(context):
+    """Модульный запрос с bindparam: ключ кеша мемоизирован на объекте."""
+    dialect, cache = PGDialect_asyncpg(), {}
+
+    async def run():
+        _prepare(
+            dialect, cache, _LOOKUP_BY_EMAIL_OR_LOGIN.orm, {"identifier": IDENTIFIER}
+        )
+
+    return run
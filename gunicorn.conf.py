@@ -0,0 +1,32 @@
+import gc
+
+from prometheus_client import multiprocess
+
+
+def when_ready(server):
+    # с --preload приложение уже загружено в мастере; ленивые тяжёлые модули
+    # тоже импортируются до fork, чтобы воркеры делили их copy-on-write
+    if server.cfg.preload_app:
+        from app.services.warmup import import_lazy_modules
+
+        import_lazy_modules()
+
+
+def pre_fork(server, worker):
+    # объекты мастера переносятся в постоянное поколение GC: сборщик воркера
+    # их не обходит и не копирует страницы, в которых они лежат
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # пул БД, если мастер успел его создать, воркеру не принадлежит; Redis и
+    # prometheus_client сами замечают смену pid, потоки и очередь логов
+    # создаются в lifespan воркера
+    from app.infrastructure.db.database import reset_after_fork
+
+    reset_after_fork()
+
+
+def child_exit(server, worker):
+    # убираем live-gauge файлы завершившегося воркера из PROMETHEUS_MULTIPROC_DIR
+    multiprocess.mark_process_dead(worker.pid)
@@ -2,5 +2,13 @@
 
 # exec uvicorn --reload --host $HOST --port $PORT "$APP_MODULE"
 
+# каталог для метрик всех воркеров gunicorn, очищается при каждом старте
+export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/prometheus_multiproc}
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+# gunicorn берёт число воркеров из WEB_CONCURRENCY, настройки приложения — тоже
+export WEB_CONCURRENCY=${WEB_CONCURRENCY:-4}
+
 alembic upgrade head
-gunicorn -w 4 -k uvicorn.workers.UvicornWorker -b 0.0.0.0:8000 "app.main:app"
+gunicorn -c gunicorn.conf.py --preload -k uvicorn.workers.UvicornWorker -b 0.0.0.0:8000 "app.main:create_app()"